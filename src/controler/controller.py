@@ -19,14 +19,20 @@ from src.model.strategies.strategy_lib.TF_ASIC import TF_ASIC_Stage_1_Strategy_l
     TF_ASIC_Stage_2_Strategy_linear, TF_ASIC_Strategy_linear
 from src.model.input_parameters import InputParameters
 from src.model.engine import CalculationEngine
+from src.model.executors import ParallelExecutor
+from src.model.tracing import traced
 from src.model.strategies.strategy_lib.Nz import AnalyticalNzStrategy
 from src.model.strategies.strategy_lib.capacitance import AnalyticalCapacitanceStrategy
-from src.model.strategies.strategy_lib.frequency import FrequencyVectorStrategy
+from src.model.strategies.strategy_lib.frequency import FrequencyVectorStrategy, AdaptiveFrequencyVectorStrategy
+from src.model.strategies.strategy_lib.features import ResonanceFrequencyStrategy, QualityFactorStrategy, \
+    CLTF_Bandwidth, NEMI_Minimum
 from src.model.strategies.strategy_lib.impedance import AnalyticalImpedanceStrategy
 from src.model.strategies.strategy_lib.inductance import AnalyticalInductanceStrategy
 from src.model.strategies.strategy_lib.lambda_strategy import AnalyticalLambdaStrategy
 from src.model.strategies.strategy_lib.mu_app import AnalyticalMu_appStrategy
 from src.model.strategies.strategy_lib.resistance import AnalyticalResistanceStrategy, AnalyticalResistanceStrategyv2
+from src.model.strategies.strategy_lib.RLC import OmegaStrategy, OmegaSquaredStrategy, RLC_Denominator_Open_Loop, \
+    RLC_Denominator_Closed_Loop
 from src.model.strategies.strategy_lib.SPICE import SPICE_test, SPICE_op_Amp_gain, SPICE_op_Amp_transcient, \
     SPICE_impedance
 
@@ -37,7 +43,7 @@ STRATEGY_MAP = {
     },
     "frequency_vector": {
         "default": FrequencyVectorStrategy,
-        "strategies": [FrequencyVectorStrategy]
+        "strategies": [FrequencyVectorStrategy, AdaptiveFrequencyVectorStrategy]
     },
     "Nz": {
         "default": AnalyticalNzStrategy,
@@ -61,6 +67,22 @@ STRATEGY_MAP = {
         "default": AnalyticalCapacitanceStrategy,
         "strategies": [AnalyticalCapacitanceStrategy]
     },
+    "omega": {
+        "default": OmegaStrategy,
+        "strategies": [OmegaStrategy]
+    },
+    "omega_squared": {
+        "default": OmegaSquaredStrategy,
+        "strategies": [OmegaSquaredStrategy]
+    },
+    "RLC_denominator_open_loop": {
+        "default": RLC_Denominator_Open_Loop,
+        "strategies": [RLC_Denominator_Open_Loop]
+    },
+    "RLC_denominator_closed_loop": {
+        "default": RLC_Denominator_Closed_Loop,
+        "strategies": [RLC_Denominator_Closed_Loop]
+    },
     "impedance": {
         "default": AnalyticalImpedanceStrategy,
         "strategies": [AnalyticalImpedanceStrategy]
@@ -157,6 +179,22 @@ STRATEGY_MAP = {
         "default": NEMI_FIltered,
         "strategies": [NEMI_FIltered,NEMI_FIlteredv2, NEMI_FIlteredv3]
     },
+    "resonance_frequency": {
+        "default": ResonanceFrequencyStrategy,
+        "strategies": [ResonanceFrequencyStrategy]
+    },
+    "quality_factor": {
+        "default": QualityFactorStrategy,
+        "strategies": [QualityFactorStrategy]
+    },
+    "CLTF_bandwidth": {
+        "default": CLTF_Bandwidth,
+        "strategies": [CLTF_Bandwidth]
+    },
+    "NEMI_minimum": {
+        "default": NEMI_Minimum,
+        "strategies": [NEMI_Minimum]
+    },
     # "SPICE_test": {
     #     "default": SPICE_test,
     #     "strategies": [SPICE_test]
@@ -180,7 +218,7 @@ class CalculationController:
         of the engine. This controller is the main interface between the user interface and the calculation engine.
         It can be used to run the engine headless or to update the parameters and run the calculations.
     """
-    def __init__(self, params_dict=None, backups_count=3):
+    def __init__(self, params_dict=None, backups_count=3, max_workers=None, cache_max_bytes=None, backend="numpy"):
         """
                 Initializes the CalculationController with optional parameters. This controller
                 sets up the calculation engine.
@@ -190,14 +228,20 @@ class CalculationController:
                 Parameters:
                 - params_dict (dict, optional): A dictionary of parameters to initialize the
                 input parameters of the engine.
+                - max_workers (int, optional): If set, independent nodes are calculated concurrently on a thread
+                pool of this size, and the strategies hinted "process" (SPICE simulations) in a process pool.
+                Otherwise, nodes are calculated one after another in this process.
+                - cache_max_bytes (int, optional): If set, node results are memoized in a cache of this size (bytes),
+                so revisiting a previous configuration does not recalculate the nodes.
+                - backend (str, optional): "numpy" (default) or "numba", the backend running the strategy kernels.
         """
-        self.engine = CalculationEngine(backups_count=backups_count)
+        executor = ParallelExecutor(max_workers) if max_workers else None
+        self.engine = CalculationEngine(backups_count=backups_count, executor=executor,
+                                        cache_max_bytes=cache_max_bytes, backend=backend)
         self.is_data_ready = False
         self.params = None
 
-        for node_name, info in STRATEGY_MAP.items():
-            default_strategy = info["default"]()
-            self.engine.add_or_update_node(node_name, default_strategy)
+        self.engine.add_or_update_nodes({node_name: info["default"]() for node_name, info in STRATEGY_MAP.items()})
 
         if params_dict:
             self.update_parameters(params_dict)
@@ -206,13 +250,16 @@ class CalculationController:
         for node_name in spice_nodes:
             self.engine.delete_node(node_name)
             print(f"Deleted node {node_name}")
-    def update_parameters(self, params_dict):
+    @traced("controller")
+    def update_parameters(self, params_dict, targets=None):
         """
                Updates the input parameters of the calculation engine using the provided dictionary. This method
                also triggers the update of the engine's parameters and marks the output data as ready for plot.
 
                Parameters:
                - params_dict (dict): A dictionary containing the new parameters to be updated in the engine.
+               - targets (list, optional): The results to bring up to date, e.g. the plotted ones. The other results
+                                           are left stale until requested with `compute`. Defaults to all results.
 
                The dict should respect the following format:
 
@@ -225,13 +272,68 @@ class CalculationController:
                Returns:
                - dict: The current results after updating the parameters, if any calculation was previously run.
            """
-        self.params = params_dict
+        # Copied: the engine compares the next parameters with these ones, a dict modified in place by the caller
+        # and passed again would otherwise show no change
+        self.params = dict(params_dict)
         new_parameters = InputParameters(self.params)
-        self.engine.update_parameters(new_parameters)
+        self.engine.update_parameters(new_parameters, targets)
 
         self.is_data_ready = True
         return self.get_current_results()
 
+    def update_parameters_batch(self, params_dicts, node_names=None):
+        """
+               Evaluates the calculation graph over a batch of parameter sets in a single call, e.g. a whole
+               population of candidate designs during an optimization. The current results displayed by
+               the GUI are not modified.
+
+               Parameters:
+               - params_dicts (list): The K parameter dicts, in the same format as for `update_parameters`.
+                                      Only the varying parameters are evaluated K times.
+               - node_names (list, optional): The results to calculate and return. Defaults to all nodes.
+
+               Returns:
+               - dict: The results keyed by node name, each with a leading batch axis of size K.
+           """
+        return self.engine.run_batch(params_dicts, node_names)
+
+    @traced("controller")
+    def compute(self, targets):
+        """
+               Brings the given results up to date with the current parameters, calculating only what they need.
+
+               Parameters:
+               - targets (list): The names of the results to calculate.
+
+               Returns:
+               - dict: The results of the targets, keyed by name.
+           """
+        return self.engine.compute(targets)
+
+    def compile_function(self, targets, parameter_names):
+        """
+               Returns a single generated function calculating the given results for a vector of values of
+               the given parameters, the other parameters keeping their current values. Meant for the tight loop
+               of an optimizer, the current results displayed by the GUI are not modified.
+
+               Parameters:
+               - targets (list): The names of the results to calculate.
+               - parameter_names (list): The names of the varying parameters, in the order of the vector values.
+
+               Returns:
+               - callable: Called as function(values), returns the data of the targets keyed by name.
+           """
+        return self.engine.compile_function(targets, parameter_names)
+
+    def get_available_results(self):
+        """
+               Lists the results the calculation graph can produce, whether they are already calculated or not.
+
+               Returns:
+               - list: The names of the calculation nodes, in calculation order.
+           """
+        return list(self.engine.get_execution_plan())
+
     def run_calculation(self):
         """
                Executes the calculations based on the current set of parameters and strategies defined in the engine.
@@ -281,10 +383,24 @@ class CalculationController:
            """
         self.engine.clear_calculation_results()
 
-    def set_node_strategy(self, node_name, strategy_class, params_dict):
+    def set_node_strategy(self, node_name, strategy_class, params_dict, targets=None):
         strategy_instance = strategy_class()
         print(strategy_instance)
-        self.engine.swap_strategy_for_node(node_name, strategy_instance, params_dict)
+        self.engine.swap_strategy_for_node(node_name, strategy_instance, params_dict, targets)
+
+    def set_node_strategies(self, strategy_classes, params_dict, targets=None):
+        """
+               Swaps the strategies of several nodes at once, validating the graph and recalculating
+               the affected nodes only once.
+
+               Parameters:
+               - strategy_classes (dict): The strategy classes to instantiate, keyed by node name.
+               - params_dict (dict): The parameters to use for the calculations.
+               - targets (list, optional): The results to bring up to date, e.g. the plotted ones. The other
+                                           affected results are left stale until requested. Defaults to all results.
+           """
+        strategies = {node_name: strategy_class() for node_name, strategy_class in strategy_classes.items()}
+        self.engine.swap_strategies_for_nodes(strategies, params_dict, targets)
 
     def export_CLTF_NEMI(self, path):
         """
@@ -294,6 +410,8 @@ class CalculationController:
         """
 
         # Retrieve the results of the NEMI node if it exists
+        if self.is_data_ready:
+            self.compute(["CLTF_Filtered", "NEMI"])
         data = self.get_current_results()
         if data is None:
             raise "Error: No data available"
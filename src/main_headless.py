@@ -3,7 +3,7 @@ import json
 import numpy as np
 
 from controler.controller import CalculationController
-from scipy.optimize import minimize
+from scipy.optimize import differential_evolution, minimize
 
 def determine_resonance_freq(freq_vector, impedance_vector):
     """
@@ -18,15 +18,33 @@ def determine_resonance_freq(freq_vector, impedance_vector):
     return freq_vector[max]
 
 def objective_function(x):
-    params = parameters_dict.copy()
-    params['len_coil'] = x[0]
-    params['diam_wire'] = x[1]
-    params['nb_spire'] = int(x[2])
+    # Single generated function calculating the resonance frequency from the optimized parameters, the others
+    # keeping the values of the last update_parameters. Generated on the first call, then reused from the cache.
+    # The resonance frequency is a scalar feature node, no frequency-domain array is calculated.
+    fused_resonance = controller.compile_function(['resonance_frequency'], ['len_coil', 'diam_wire', 'nb_spire'])
+    current_resonance_freq = fused_resonance((x[0], x[1], int(x[2])))['resonance_frequency']
 
-    controller.update_parameters(params)
-    results = controller.get_current_results()
-    impedance = results['impedance']["data"]
-    current_resonance_freq = determine_resonance_freq(impedance[:,0], impedance[:,1])
+    target_resonance_freq = 1993
+    return (current_resonance_freq - target_resonance_freq)**2
+
+def batch_objective_function(population):
+    """
+    Vectorized version of objective_function, evaluating a whole population in one call to the engine.
+    Follows the convention of scipy.optimize.differential_evolution(..., vectorized=True).
+    :param population: array of shape (nb_params, K), one candidate per column
+    :return: array of shape (K,), the cost of each candidate
+    """
+    population = np.atleast_2d(population)
+    params_list = []
+    for x in population.T:
+        params = parameters_dict.copy()
+        params['len_coil'] = x[0]
+        params['diam_wire'] = x[1]
+        params['nb_spire'] = int(x[2])
+        params_list.append(params)
+
+    results = controller.update_parameters_batch(params_list, ['resonance_frequency'])
+    current_resonance_freq = results['resonance_frequency']["data"]
 
     target_resonance_freq = 1993
     return (current_resonance_freq - target_resonance_freq)**2
@@ -133,7 +151,14 @@ if __name__ == "__main__":
 
     ]
 
-    # Perform the optimization
+    # Global search of the coil parameters used by the objective: each generation of the population is
+    # evaluated in a single batched run of the engine
+    global_result = differential_evolution(batch_objective_function, bounds[:3], vectorized=True,
+                                           updating='deferred', maxiter=20, seed=0)
+    print("Global search resonance frequency error: ", np.sqrt(global_result.fun))
+    initial_guess[:3] = global_result.x
+
+    # Perform the optimization, refining the result of the global search
     result = minimize(objective_function, initial_guess, bounds=bounds, method='Nelder-Mead')
     optimized_params = result.x
 
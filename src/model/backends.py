@@ -0,0 +1,144 @@
+"""
+src/model/backends.py
+PLASMAG 2024 Software, LPP
+"""
+import functools
+import os
+
+# Numba reads its cache directory when it is imported, the default is set before trying to import it
+NUMBA_CACHE_DIR = os.environ.setdefault("NUMBA_CACHE_DIR",
+                                        os.path.join(os.path.expanduser("~"), ".cache", "plasmag", "numba"))
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+KERNELS = []
+
+
+class Kernel:
+    """
+    Element-wise kernel of a calculation strategy, e.g. the noise density of a single frequency point.
+
+    The kernel is written once with scalar arithmetic and NumPy functions. The NumPy backend calls it on whole
+    arrays, each operation allocating a temporary array. The Numba backend compiles it into a parallel ufunc:
+    a single fused loop over the broadcast inputs, without temporaries.
+
+    Kernels are declared with the `kernel` decorator in the strategy class body, and called as methods:
+    `self.calculate_psd(...)` runs the implementation of the backend assigned to the strategy by its engine.
+    They take no `self` argument.
+
+    Attributes:
+        function (callable): The NumPy implementation of the kernel.
+        nargs (int): The number of arguments of the kernel.
+    """
+
+    def __init__(self, function):
+        functools.update_wrapper(self, function)
+        self.function = function
+        self.nargs = function.__code__.co_argcount
+        self._compiled = None
+        KERNELS.append(self)
+
+    def compile(self):
+        """
+        Compiles the kernel into a parallel Numba ufunc, taking and returning float64 values.
+        The machine code is written to the NUMBA_CACHE_DIR directory, later processes load it from there.
+
+        Returns:
+            The compiled ufunc.
+        """
+        if self._compiled is None:
+            signature = numba.float64(*([numba.float64] * self.nargs))
+            self._compiled = numba.vectorize([signature], target="parallel", cache=True)(self.function)
+        return self._compiled
+
+    def __call__(self, *args):
+        return self.function(*args)
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return instance.backend.select(self)
+
+
+def kernel(function):
+    """
+    Decorator declaring an element-wise kernel in a strategy class, see `Kernel`.
+
+    Parameters:
+        function (callable): The kernel, using scalar arithmetic and NumPy functions only.
+
+    Returns:
+        Kernel: The kernel, dispatched to the backend of the strategy.
+    """
+    return Kernel(function)
+
+
+class NumpyBackend:
+    """
+    Default backend: the kernels are called on whole NumPy arrays.
+    """
+
+    name = "numpy"
+
+    def select(self, kernel: Kernel):
+        """
+        Returns the implementation of a kernel for this backend.
+        """
+        return kernel.function
+
+    def warm_up(self):
+        """
+        Nothing to prepare for NumPy.
+        """
+
+
+class NumbaBackend:
+    """
+    Backend calling the kernels compiled by Numba into parallel ufuncs.
+    Requires the optional numba package.
+    """
+
+    name = "numba"
+
+    def select(self, kernel: Kernel):
+        """
+        Returns the implementation of a kernel for this backend, compiling it on first use.
+        """
+        return kernel.compile()
+
+    def warm_up(self):
+        """
+        Compiles all the kernels declared so far, or loads them from the cache directory, so that the first
+        calculation does not pay the compilation time.
+        """
+        for declared_kernel in KERNELS:
+            declared_kernel.compile()
+
+
+NUMPY_BACKEND = NumpyBackend()
+
+
+def get_backend(name: str = "numpy"):
+    """
+    Returns the backend of the given name. The Numba backend falls back to NumPy when numba is not installed.
+
+    Parameters:
+        name (str): "numpy" or "numba".
+
+    Returns:
+        NumpyBackend | NumbaBackend: The backend.
+
+    Raises:
+        ValueError: If the backend name is unknown.
+    """
+    if name == "numpy":
+        return NUMPY_BACKEND
+    if name == "numba":
+        if numba is None:
+            print("Numba is not installed, falling back to the NumPy backend")
+            return NUMPY_BACKEND
+        return NumbaBackend()
+    raise ValueError(f"Unknown calculation backend: {name}")
@@ -0,0 +1,141 @@
+"""
+src/model/batch.py
+PLASMAG 2024 Software, LPP
+"""
+import numpy as np
+
+from src.model.input_parameters import InputParameters
+
+
+def make_batch_parameters(parameter_sets: list) -> tuple[InputParameters, set, int]:
+    """
+    Merges K parameter sets into a single set of batched parameters.
+
+    A parameter with the same value in every set keeps its plain value. A parameter varying across the sets
+    becomes a (K, 1) array, so that it broadcasts against the (N,) frequency vector into a (K, N) array.
+
+    Parameters:
+        parameter_sets (list): The K parameter sets, as dicts or InputParameters, all with the same names.
+
+    Returns:
+        tuple: The batched InputParameters, the set of the varying parameter names and the batch size K.
+
+    Raises:
+        ValueError: If the list is empty or the parameter sets do not have the same names.
+    """
+    rows = [params.data if isinstance(params, InputParameters) else params for params in parameter_sets]
+    if not rows:
+        raise ValueError("The batch must contain at least one parameter set")
+
+    batch_size = len(rows)
+    names = rows[0].keys()
+    data = {}
+    batched = set()
+    for row in rows:
+        if row.keys() != names:
+            raise ValueError("All the parameter sets of a batch must define the same parameters")
+
+    for name in names:
+        values = [row[name] for row in rows]
+        if all(np.array_equal(value, values[0]) for value in values[1:]):
+            data[name] = values[0]
+        else:
+            data[name] = np.asarray(values).reshape(batch_size, 1)
+            batched.add(name)
+
+    return InputParameters(data), batched, batch_size
+
+
+def select_row(value: any, index: int) -> any:
+    """
+    Returns the row of a batched value, i.e. the value it would have for a single parameter set.
+    A batched scalar, stored as a (K, 1) array, gives back a scalar.
+
+    Parameters:
+        value: The batched value, a parameter or a {"data", "labels", "units"} result record.
+        index (int): The row index in the batch.
+
+    Returns:
+        The value of the row.
+    """
+    if isinstance(value, dict):
+        return {key: select_row(item, index) if key == "data" else item for key, item in value.items()}
+    row = np.asarray(value)[index]
+    return row[0] if row.shape == (1,) else row
+
+
+def split_rows(values: dict) -> tuple[list, bool]:
+    """
+    Splits scalar values, some of which may be batched, into the values of each parameter set, e.g. for
+    strategies which loop over the rows of a batch themselves (SPICE simulations).
+    A batched scalar is an array with a leading batch axis, typically (K, 1), a plain scalar is shared by all rows.
+
+    Parameters:
+        values (dict): The scalar values, plain or batched, keyed by name.
+
+    Returns:
+        tuple: The list of the K rows, each a dict of plain values, and whether any value was batched.
+               Without batched values the list holds the single row of the values.
+
+    Raises:
+        ValueError: If the batched values do not have the same batch size.
+    """
+    sizes = {np.shape(value)[0] for value in values.values() if np.ndim(value) > 0}
+    if not sizes:
+        return [dict(values)], False
+    if len(sizes) > 1:
+        raise ValueError(f"The batched values have different batch sizes: {sorted(sizes)}")
+    batch_size = sizes.pop()
+    rows = [{name: select_row(value, index) if np.ndim(value) > 0 else value for name, value in values.items()}
+            for index in range(batch_size)]
+    return rows, True
+
+
+def stack_rows(rows: list) -> any:
+    """
+    Stacks the K results of a strategy calculated row by row into a single batched result.
+    Scalars are stacked into a (K, 1) array, arrays along a new leading axis.
+
+    Parameters:
+        rows (list): The results of the K rows, plain values or {"data", "labels", "units"} records.
+
+    Returns:
+        The batched result. The labels and units of a record are taken from the first row.
+
+    Raises:
+        ValueError: If the rows have different shapes, e.g. frequency vectors of different lengths.
+    """
+    first = rows[0]
+    if isinstance(first, dict):
+        return {key: stack_rows([row[key] for row in rows]) if key == "data" else item
+                for key, item in first.items()}
+    if np.ndim(first) == 0:
+        return np.asarray(rows).reshape(len(rows), 1)
+    try:
+        return np.stack(rows)
+    except ValueError as e:
+        raise ValueError(f"The rows of the batch cannot be stacked: {e}")
+
+
+def unbatch(value: any, batch_size: int, batched: bool) -> any:
+    """
+    Converts a result of a batched run to its output form, with the batch axis first:
+    scalars become (K,) arrays and arrays of shape S become (K, *S) arrays.
+    Results that do not depend on the varying parameters are broadcast to the batch without being copied.
+
+    Parameters:
+        value: The result, a plain value or a {"data", "labels", "units"} record.
+        batch_size (int): The batch size K.
+        batched (bool): Whether the result already carries the batch axis.
+
+    Returns:
+        The result with its leading batch axis.
+    """
+    if isinstance(value, dict):
+        return {key: unbatch(item, batch_size, batched) if key == "data" else item for key, item in value.items()}
+    array = np.asarray(value)
+    if not batched:
+        return np.broadcast_to(array, (batch_size,) + array.shape)
+    if array.shape == (batch_size, 1):
+        return array.reshape(batch_size)
+    return array
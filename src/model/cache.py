@@ -0,0 +1,254 @@
+"""
+ src/model/cache.py
+ PLASMAG 2024 Software, LPP
+"""
+import hashlib
+import os
+import tempfile
+import threading
+import zipfile
+from collections import OrderedDict
+
+import numpy as np
+
+from src.model.results import result_nbytes
+
+
+def fingerprint(value: any) -> str:
+    """
+    Returns a short content digest of an input parameter value. Arrays are hashed from their raw bytes,
+    other values from their exact repr.
+
+    Parameters:
+        value: The parameter value.
+
+    Returns:
+        str: The digest of the value.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(value, np.ndarray):
+        digest.update(f"ndarray:{value.dtype.str}:{value.shape}:".encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    else:
+        digest.update(f"{type(value).__name__}:{value!r}".encode())
+    return digest.hexdigest()
+
+
+def node_fingerprint(strategy, dependency_fingerprints) -> str:
+    """
+    Returns the content address of a node result: a digest of the strategy class, of the settings of the
+    strategy instance and of the fingerprints of all the node inputs (parameter values and upstream results
+    fingerprints).
+    Two nodes with the same fingerprint compute the same result.
+
+    Parameters:
+        strategy (CalculationStrategy): The strategy of the node. Its settings are given by its `cache_key`:
+                                        two instances of the same class with the same key compute the same
+                                        result.
+        dependency_fingerprints (iterable): The (name, fingerprint) pairs of the node dependencies.
+
+    Returns:
+        str: The fingerprint of the node result.
+    """
+    strategy_class = type(strategy)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{strategy_class.__module__}.{strategy_class.__qualname__}".encode())
+    digest.update(f"|{fingerprint(strategy.cache_key())}".encode())
+    for name, dependency_fingerprint in dependency_fingerprints:
+        digest.update(f"|{name}={dependency_fingerprint}".encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Memory-bounded, least recently used cache of node results, keyed by node fingerprint.
+
+    When the memory used by the cached arrays exceeds the budget, the least recently used results are evicted.
+    Cached results are the immutable records stored in `CalculationResults`, so they are shared, not copied.
+
+    Attributes:
+        max_bytes (int): The memory budget of the cache, in bytes.
+        current_bytes (int): The memory currently used by the cached results, in bytes.
+        hits (int): The number of successful lookups.
+        misses (int): The number of failed lookups.
+
+    Methods:
+        get: Looks up a result by fingerprint.
+        put: Stores a result, evicting old results if the budget is exceeded.
+        clear: Empties the cache and resets the counters.
+    """
+
+    ENTRY_OVERHEAD = 256  # Bytes accounted for each entry, so scalar results are not free
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: str):
+        """
+        Looks up a result and marks it as recently used.
+
+        Parameters:
+            key (str): The fingerprint of the node result.
+
+        Returns:
+            tuple: (True, result) if the result is cached, (False, None) otherwise.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def put(self, key: str, value: any):
+        """
+        Stores a result. Results larger than the whole budget are not cached.
+
+        Parameters:
+            key (str): The fingerprint of the node result.
+            value: The result to store.
+        """
+        size = result_nbytes(value) + self.ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+
+    def clear(self):
+        """
+        Empties the cache and resets the hit/miss counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+
+class DiskResultCache:
+    """
+    Size-bounded, least recently used cache of arrays on disk, shared by the processes and sessions of the
+    application, e.g. for the results of the SPICE simulations.
+
+    Each entry is a compressed .npz file named after its key. Its modification time is its last use: a hit
+    touches the file, and when the files exceed the size budget the least recently used are deleted.
+    Files are written to a temporary name first, so readers never see a partial entry, and an unreadable entry
+    is a miss.
+
+    Attributes:
+        directory (str): The directory of the cache files, created on the first write.
+        max_bytes (int): The size budget of the cache files, in bytes.
+        hits (int): The number of successful lookups in this process.
+        misses (int): The number of failed lookups in this process.
+
+    Methods:
+        get: Looks up the arrays of a key.
+        put: Stores arrays, evicting old entries if the budget is exceeded.
+        clear: Deletes all the entries.
+    """
+
+    SUFFIX = ".npz"
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.SUFFIX)
+
+    def get(self, key: str):
+        """
+        Looks up the arrays of a key and marks the entry as recently used.
+
+        Parameters:
+            key (str): The key, e.g. a fingerprint.
+
+        Returns:
+            tuple: (True, dict of arrays) if the entry exists, (False, None) otherwise.
+        """
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as archive:
+                arrays = {name: archive[name] for name in archive.files}
+            os.utime(path)
+        except (OSError, ValueError, zipfile.BadZipFile):
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        return True, arrays
+
+    def put(self, key: str, arrays: dict):
+        """
+        Stores arrays under a key. Entries larger than the whole budget are not kept, and evict nothing.
+
+        Parameters:
+            key (str): The key, e.g. a fingerprint.
+            arrays (dict): The arrays to store, keyed by name.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        handle, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as file:
+                np.savez_compressed(file, **arrays)
+            if os.path.getsize(temporary_path) > self.max_bytes:
+                # Keeping it would evict every other entry, then the entry itself
+                os.remove(temporary_path)
+                return
+            os.replace(temporary_path, self._path(key))
+        except OSError:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+        self._evict()
+
+    def _evict(self):
+        """
+        Deletes the least recently used entries until the files fit in the budget.
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(self.SUFFIX):
+                try:
+                    status = entry.stat()
+                except OSError:
+                    continue  # Evicted by another process
+                entries.append((status.st_mtime_ns, status.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        """
+        Deletes all the entries and resets the hit/miss counters.
+        """
+        if os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(self.SUFFIX):
+                    os.remove(entry.path)
+        self.hits = 0
+        self.misses = 0
@@ -1,9 +1,17 @@
 import json
-import copy
+import time
 
-from src.model.results import CalculationResults
+from src.model.results import CalculationResults, results_equal
 from src.model.input_parameters import InputParameters
 from src.model.node import CalculationNode
+from src.model.executors import SerialExecutor
+from src.model.cache import ResultCache, fingerprint, node_fingerprint
+from src.model.batch import make_batch_parameters, select_row, stack_rows, unbatch
+from src.model.stats import EngineStats, CALCULATED, CACHE_HIT, SKIPPED
+from src.model.tracing import tracer, traced
+from src.model.backends import get_backend
+from src.model.strategies.symbolic import ExpressionMemo
+from src.model.fusion import generate_fused_function
 
 
 class CalculationEngine:
@@ -20,28 +28,82 @@ class CalculationEngine:
         nodes (dict): A dictionary of calculation nodes, keyed by their unique names.
         old_output_data (CalculationResults, optional): The previous set of calculation results.
         current_output_data (CalculationResults): The current set of calculation results being populated.
+        execution_plan (list, optional): The flat, topologically sorted list of node names compiled from the graph.
+                                         Set to None whenever the structure of the graph changes.
+        executor (SerialExecutor | ParallelExecutor): Runs the steps of the execution plan.
+        direct_dependencies (dict): For each node with a strategy, the set of names it directly depends on.
+        direct_dependents (dict): For each node or parameter name, the set of nodes directly depending on it.
+        upstream_dependencies (dict): For each node with a strategy, the set of all its transitive dependencies.
+        inverse_dependencies (dict): For each node or parameter name, the set of all nodes transitively
+                                     depending on it.
+        cache (ResultCache, optional): The memoization cache of node results, None if disabled.
+        value_versions (dict): For each parameter or node name, a counter incremented every time its value changes.
+        input_versions (dict): For each calculated node, the versions of its dependencies it was calculated from.
+                               Used for early cutoff: a node whose inputs kept their version is not recalculated.
+        instrumentation (EngineStats): The per-node timing, call count and memory statistics, see `stats`.
+        backend (NumpyBackend | NumbaBackend): The backend running the element-wise kernels of the strategies.
+        expression_memo (ExpressionMemo): The subexpressions evaluated by the symbolic strategies during the current
+                                          run, shared between nodes. Cleared at the end of each run.
+        graph_version (int): Incremented every time the structure of the graph changes.
+        fused_functions (dict): The functions generated by `compile_function`, keyed by targets and parameters.
 
     Methods:
         get_or_create_node: Retrieves an existing calculation node or creates a new one if not present.
         add_or_update_node: Adds a new calculation node or updates an existing node's strategy.
+        add_or_update_nodes: Adds or updates a whole set of nodes with a single validation pass.
         update_parameters: Updates the calculation parameters and archives the current results.
+        compute: Brings the requested nodes up to date, leaving the rest of the graph stale.
+        stats: Returns the per-node timing, call count and memory statistics.
+        compile_execution_plan: Compiles the graph into a flat, topologically sorted execution plan.
         run_calculations: Executes the calculations across all nodes in the graph.
+        run_batch: Evaluates the graph over a whole batch of parameter sets in one pass.
+        compile_function: Generates a single function evaluating some targets for a vector of parameter values.
     """
 
-    def __init__(self, backups_count=3):
+    def __init__(self, backups_count=3, executor=None, cache_max_bytes=None, backend="numpy"):
         """
                Initializes the calculation engine, setting up internal storage for parameters, nodes,
                and calculation results.
+
+               Parameters:
+                   backups_count (int): The number of saved results slots.
+                   executor (optional): The executor running the execution plan. Defaults to a SerialExecutor.
+                                        Use a ParallelExecutor to calculate independent branches concurrently.
+                   cache_max_bytes (int, optional): Memory budget of the node results cache. When set, a node whose
+                                        inputs were already seen gets its result from the cache instead of being
+                                        recalculated. Defaults to None (no cache).
+                   backend (str): "numpy" (default) or "numba". With "numba", the strategy kernels are compiled
+                                        into parallel loops without temporary arrays, and compiled at once so
+                                        the first calculation does not pay for it. Falls back to "numpy" when
+                                        numba is not installed.
        """
         self.current_parameters = None
         self.old_parameters = None
         self.nodes = {}
         self.old_output_data = None
         self.current_output_data = CalculationResults()
+        self.direct_dependencies = {}
+        self.direct_dependents = {}
+        self.upstream_dependencies = {}
         self.inverse_dependencies = {}
         self.build_inverse_dependencies()
         self.first_run = True
 
+        self.execution_plan = None
+        self._plan_steps = []
+        self._plan_positions = {}
+        self.executor = executor if executor is not None else SerialExecutor()
+        self.cache = ResultCache(cache_max_bytes) if cache_max_bytes else None
+        self.result_fingerprints = {}
+        self.value_versions = {}
+        self.input_versions = {}
+        self.instrumentation = EngineStats()
+        self.backend = get_backend(backend)
+        self.backend.warm_up()
+        self.expression_memo = ExpressionMemo()
+        self.graph_version = 0
+        self.fused_functions = {}
+
         self.saved_data_results = [CalculationResults() for _ in range(backups_count)]
         print(len(self.saved_data_results))
         print("Calculation Engine Initialized")
@@ -49,8 +111,11 @@ class CalculationEngine:
     def save_calculation_results(self, index):
         """
         Saves the current calculation results to a specific index in the saved_data_results list.
+        The stale nodes are calculated first, so that every saved result matches the current parameters.
         """
-        self.saved_data_results[index] = copy.deepcopy(self.current_output_data)
+        if self.current_parameters is not None:
+            self.run_calculations()
+        self.saved_data_results[index] = self.current_output_data.snapshot()
         print("Results saved to index: ", index)
 
     def clear_calculation_results(self):
@@ -65,29 +130,118 @@ class CalculationEngine:
 
     def build_inverse_dependencies(self):
         """
-                Constructs a map of inverse dependencies for each node to efficiently update dependent nodes
-                when parameters change. This map is used for identifying which nodes need recalculating when
-                input parameters are updated.
+                Rebuilds the whole dependency index from scratch: direct dependencies and dependents, and their
+                transitive closures. The inverse dependencies map is used for identifying which nodes need
+                recalculating when input parameters are updated.
+
+                Single graph edits (add_or_update_node, delete_node) maintain the index incrementally with
+                `update_dependency_index`, this full rebuild is only needed after bulk modifications.
+
+                Raises:
+                    Exception: If a cyclic dependency is detected among the calculation nodes.
         """
+        self.direct_dependencies = {}
+        self.direct_dependents = {}
+        self.upstream_dependencies = {}
         self.inverse_dependencies = {}
 
-        def add_inverse_dependency(node_name, dependency):
-            """
-                        Helper function to recursively build inverse dependencies.
-            """
-            if dependency not in self.inverse_dependencies:
-                self.inverse_dependencies[dependency] = set()
-            self.inverse_dependencies[dependency].add(node_name)
-            if dependency in self.nodes:
-                node_strategy = self.nodes[dependency].get_strategy()
-                if node_strategy:  # Protection against None strategy
-                    for sub_dependency in node_strategy.get_dependencies():
-                        add_inverse_dependency(node_name, sub_dependency)
-
         for node_name, node in self.nodes.items():
-            if node.get_strategy():
-                for dependency in node.get_strategy().get_dependencies():
-                    add_inverse_dependency(node_name, dependency)
+            strategy = node.get_strategy()
+            if strategy:  # Protection against None strategy
+                dependencies = set(strategy.get_dependencies())
+                if dependencies:
+                    self.direct_dependencies[node_name] = dependencies
+                    for dependency in dependencies:
+                        self.direct_dependents.setdefault(dependency, set()).add(node_name)
+
+        for node_name in self._topological_order(self.direct_dependencies):
+            self._refresh_upstream_dependencies(node_name)
+
+    def update_dependency_index(self, node_name, strategy):
+        """
+        Updates the dependency index after the strategy of a single node changed (or the node was deleted),
+        touching only the affected region of the graph: the node itself and the nodes depending on it.
+        The index is left unchanged if the new strategy would create a cycle.
+
+        Parameters:
+            node_name (str): The name of the edited node.
+            strategy (CalculationStrategy, optional): The new strategy of the node, None for a leaf or deleted node.
+
+        Raises:
+            Exception: If the new strategy introduces a cyclic dependency.
+        """
+        new_dependencies = set(strategy.get_dependencies()) if strategy else set()
+        dependents = set(self.inverse_dependencies.get(node_name, ()))
+        if node_name in new_dependencies or not dependents.isdisjoint(new_dependencies):
+            raise Exception(f"Cyclic dependency detected involving {node_name}")
+
+        old_dependencies = self.direct_dependencies.pop(node_name, set())
+        for dependency in old_dependencies - new_dependencies:
+            self.direct_dependents[dependency].discard(node_name)
+            if not self.direct_dependents[dependency]:
+                del self.direct_dependents[dependency]
+        for dependency in new_dependencies - old_dependencies:
+            self.direct_dependents.setdefault(dependency, set()).add(node_name)
+        if new_dependencies:
+            self.direct_dependencies[node_name] = new_dependencies
+
+        # Only the closures of the node and of its dependents can change
+        for name in self._topological_order(dependents | {node_name}):
+            self._refresh_upstream_dependencies(name)
+
+    def _topological_order(self, node_names):
+        """
+        Sorts the given node names so that every node comes after its direct dependencies among them.
+
+        Raises:
+            Exception: If a cyclic dependency is detected among the given nodes.
+        """
+        node_names = set(node_names)
+        pending = {}
+        dependents = {name: [] for name in node_names}
+        for name in node_names:
+            dependencies = self.direct_dependencies.get(name, set()) & node_names
+            pending[name] = len(dependencies)
+            for dependency in dependencies:
+                dependents[dependency].append(name)
+
+        ready = [name for name, count in pending.items() if count == 0]
+        order = []
+        while ready:
+            name = ready.pop()
+            order.append(name)
+            for dependent in dependents[name]:
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    ready.append(dependent)
+
+        if len(order) != len(node_names):
+            blocked = [name for name, count in pending.items() if count > 0]
+            raise Exception(f"Cyclic dependency detected involving {blocked[0]}")
+        return order
+
+    def _refresh_upstream_dependencies(self, node_name):
+        """
+        Recomputes the transitive dependencies of a node from the closures of its direct dependencies, which must
+        be up to date, and patches the inverse dependencies map with the difference.
+        """
+        old_upstream = self.upstream_dependencies.get(node_name, set())
+        new_upstream = set()
+        for dependency in self.direct_dependencies.get(node_name, ()):
+            new_upstream.add(dependency)
+            new_upstream |= self.upstream_dependencies.get(dependency, set())
+
+        for dependency in new_upstream - old_upstream:
+            self.inverse_dependencies.setdefault(dependency, set()).add(node_name)
+        for dependency in old_upstream - new_upstream:
+            self.inverse_dependencies[dependency].discard(node_name)
+            if not self.inverse_dependencies[dependency]:
+                del self.inverse_dependencies[dependency]
+
+        if new_upstream:
+            self.upstream_dependencies[node_name] = new_upstream
+        else:
+            self.upstream_dependencies.pop(node_name, None)
 
     def export_inverse_dependencies_to_json(self, file_path):
         """
@@ -123,8 +277,108 @@ class CalculationEngine:
         """
         if node_name not in self.nodes:
             self.nodes[node_name] = CalculationNode(node_name, self)
+            self.invalidate_execution_plan()
         return self.nodes[node_name]
 
+    def invalidate_execution_plan(self):
+        """
+        Discards the compiled execution plan. It is compiled again on the next calculation run.
+        Must be called every time the structure of the graph changes (node added, removed or strategy swapped).
+        """
+        self.execution_plan = None
+        self.graph_version += 1
+
+    def compile_execution_plan(self):
+        """
+        Compiles the calculation graph into a flat execution plan, sorted in topological order
+        (every node appears after all of its dependencies).
+
+        Each step of the plan stores the node and the resolved list of its dependencies, so that
+        running the plan is a simple loop without recursion nor repeated `get_dependencies()` calls.
+        Dependencies that are not calculation nodes are input parameters, they are registered as leaf nodes.
+
+        Returns:
+            list[str]: The node names in execution order.
+
+        Raises:
+            Exception: If a cyclic dependency is detected among the calculation nodes.
+        """
+        dependencies = {}
+        for node_name, node in list(self.nodes.items()):
+            strategy = node.get_strategy()
+            if strategy:
+                dependencies[node_name] = list(dict.fromkeys(strategy.get_dependencies()))
+                for dep_name in dependencies[node_name]:
+                    self.get_or_create_node(dep_name)
+
+        # Kahn's algorithm, restricted to the nodes owning a strategy
+        pending = {node_name: sum(1 for dep in deps if dep in dependencies)
+                   for node_name, deps in dependencies.items()}
+        dependents = {node_name: [] for node_name in dependencies}
+        for node_name, deps in dependencies.items():
+            for dep_name in deps:
+                if dep_name in dependencies:
+                    dependents[dep_name].append(node_name)
+
+        ready = [node_name for node_name, count in pending.items() if count == 0]
+        order = []
+        while ready:
+            node_name = ready.pop(0)
+            order.append(node_name)
+            for dependent in dependents[node_name]:
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    ready.append(dependent)
+
+        if len(order) != len(dependencies):
+            blocked = [node_name for node_name, count in pending.items() if count > 0]
+            raise Exception(f"Cyclic dependency detected involving {blocked[0]}")
+
+        self._plan_steps = [
+            (node_name, self.nodes[node_name],
+             [(dep_name, dep_name in dependencies) for dep_name in dependencies[node_name]])
+            for node_name in order
+        ]
+        self._plan_positions = {node_name: index for index, node_name in enumerate(order)}
+        self.execution_plan = order
+        return order
+
+    def set_executor(self, executor):
+        """
+        Replaces the executor running the execution plan, releasing the resources of the previous one.
+
+        Parameters:
+            executor (SerialExecutor | ParallelExecutor): The new executor. None restores the SerialExecutor.
+        """
+        self.executor.shutdown()
+        self.executor = executor if executor is not None else SerialExecutor()
+
+    def set_backend(self, backend: str):
+        """
+        Replaces the backend running the strategy kernels, and binds it to the strategies of the graph.
+        The results are not invalidated: both backends compute the same values, up to rounding.
+
+        Parameters:
+            backend (str): "numpy" or "numba".
+        """
+        self.backend = get_backend(backend)
+        self.backend.warm_up()
+        for node in self.nodes.values():
+            strategy = node.get_strategy()
+            if strategy is not None:
+                strategy.bind(self)
+
+    def get_execution_plan(self):
+        """
+        Returns the compiled execution plan, compiling it first if the graph changed since the last compilation.
+
+        Returns:
+            list[str]: The node names in execution order.
+        """
+        if self.execution_plan is None:
+            self.compile_execution_plan()
+        return self.execution_plan
+
     def build_dependency_tree(self, path=None):
         """
         Builds a nested dictionary representing the dependency tree of the calculation graph.
@@ -222,8 +476,9 @@ class CalculationEngine:
             disconnected components within the graph.
 
         Note:
-            This method should be called every times the graph is modified (nodes added or updated).
-            Detecting cycles beforehand prevents runtime errors due to infinite recursion or deadlock situations.
+            Single graph edits are already checked incrementally by `update_dependency_index`, this full check
+            validates the whole graph. Detecting cycles beforehand prevents runtime errors due to infinite
+            recursion or deadlock situations.
             WARNING : DSF algorithm may take a long time to execute if the graph is very large. It should only be used
             when updating the graph.
         """
@@ -254,17 +509,50 @@ class CalculationEngine:
             node_name (str): The name of the node to add or update.
             strategy (CalculationStrategy, optional): The calculation strategy to assign to the node.
         """
+        # Update the dependency index first: it rejects strategies introducing a cycle, leaving the graph unchanged
+        self.update_dependency_index(node_name, strategy)
+
         node = self.get_or_create_node(node_name)
         node.set_strategy(strategy)
+        self.invalidate_execution_plan()
 
         # Switching calculation strategy requires re-calculating the node's value, it's equivalent to a change in the
         # parameters set
 
         # self.update_parameters(self.current_parameters)
 
-        # Check for cycles in the graph after adding or updating a node
-        self.check_for_cycles()
-        self.build_inverse_dependencies()
+    def add_or_update_nodes(self, strategies: dict):
+        """
+        Adds or updates several calculation nodes at once, e.g. a whole graph definition.
+
+        Unlike calling add_or_update_node for every node, the graph is validated (cycle detection), indexed and
+        compiled into its execution plan in a single O(V+E) pass once all the strategies are assigned.
+        If the new strategies introduce a cycle, the previous strategies are restored.
+
+        Parameters:
+            strategies (dict): The calculation strategies, keyed by node name.
+
+        Raises:
+            Exception: If a cyclic dependency is detected among the calculation nodes.
+        """
+        previous_strategies = {node_name: self.nodes[node_name].get_strategy()
+                               for node_name in strategies if node_name in self.nodes}
+
+        for node_name, strategy in strategies.items():
+            self.get_or_create_node(node_name).set_strategy(strategy)
+
+        try:
+            self.build_inverse_dependencies()
+            self.compile_execution_plan()
+        except Exception:
+            for node_name in strategies:
+                if node_name in previous_strategies:
+                    self.nodes[node_name].set_strategy(previous_strategies[node_name])
+                else:
+                    self.nodes.pop(node_name)
+            self.invalidate_execution_plan()
+            self.build_inverse_dependencies()
+            raise
 
     def delete_node(self, node_name):
         """
@@ -276,11 +564,13 @@ class CalculationEngine:
         if node_name in self.nodes:
             try :
                 self.nodes.pop(node_name)
-                self.build_inverse_dependencies()
-                self.check_for_cycles()
+                self.invalidate_execution_plan()
+                self.update_dependency_index(node_name, None)
 
                 # Delete from the current_output_data
-                self.current_output_data.results.pop(node_name)
+                self.current_output_data.results.pop(node_name, None)
+                self.result_fingerprints.pop(node_name, None)
+                self.input_versions.pop(node_name, None)
             except Exception as e:
                 print(f"Error while deleting node {node_name} : {e}")
         else:
@@ -320,31 +610,43 @@ class CalculationEngine:
         Returns:
             Set[str]: A set of node names affected by the strategy swap, including the node itself and all dependent nodes.
         """
-        affected_nodes = {node_name}
-        # Add all nodes that are indirectly affected through inverse dependencies
-        to_check = [node_name]
-        while to_check:
-            current_node = to_check.pop(0)
-            if current_node in self.inverse_dependencies:
-                downstream_nodes = self.inverse_dependencies[current_node]
-                affected_nodes.update(downstream_nodes)
-                to_check.extend(downstream_nodes)
-
-        print(f"Affected nodes : {affected_nodes}")
-        return affected_nodes
+        # The inverse dependencies map already holds the transitive closure of the dependents
+        return {node_name} | self.inverse_dependencies.get(node_name, set())
 
-    def update_parameters(self, new_parameters: InputParameters):
+    @traced("engine")
+    def update_parameters(self, new_parameters: InputParameters, targets=None):
         """
         Updates the parameters used for calculations and archives the current results.
 
+        All the nodes affected by the changed parameters are marked for recalculation, but only the targets
+        (and the part of the graph they depend on) are calculated. The other affected nodes are left stale
+        until they are requested, see `compute`.
+
         Parameters:
             new_parameters (InputParameters): The new set of parameters for subsequent calculations.
+            targets (iterable, optional): The names of the nodes to bring up to date. Defaults to all nodes.
         """
         if self.first_run:
             self.first_run = False
             self.current_parameters = new_parameters
-            self.run_calculations()
+            self.run_calculations(targets)
+
+        self._set_parameters(new_parameters)
+
+        # Only the stale nodes among the targets and their dependencies are calculated
+        self.run_calculations(targets)
+
+    def _set_parameters(self, new_parameters: InputParameters) -> set:
+        """
+        Replaces the current parameters, archives the current parameters and results, and marks the nodes affected
+        by the changed parameters for recalculation.
+
+        Parameters:
+            new_parameters (InputParameters): The new set of parameters.
 
+        Returns:
+            set: The names of the nodes affected by the changed parameters.
+        """
         changed_params = {}
 
         if self.current_parameters is not None:
@@ -352,33 +654,312 @@ class CalculationEngine:
                 old_value = self.current_parameters.data.get(param, None)
                 if new_value != old_value:
                     changed_params[param] = {'old': old_value, 'new': new_value}
+                    self.value_versions[param] = self.value_versions.get(param, 0) + 1
 
         self.old_parameters = self.current_parameters
         self.current_parameters = new_parameters
 
         if self.current_output_data.results:
-            self.old_output_data = copy.deepcopy(self.current_output_data)
+            self.old_output_data = self.current_output_data.snapshot()
 
+        affected_nodes = set()
         if changed_params:
             affected_nodes = self.get_affected_nodes(changed_params)
 
             for node_name in affected_nodes:
                 self.nodes[node_name].mark_for_recalculation()
-            self.run_calculations(affected_nodes)
+        return affected_nodes
+
+    @traced("engine")
+    def compute(self, targets) -> dict:
+        """
+        Brings the given nodes up to date with the current parameters, calculating only the stale nodes
+        among them and their dependencies, and returns their results.
+
+        Parameters:
+            targets (iterable): The names of the nodes to calculate.
+
+        Returns:
+            dict: The results of the targets, keyed by name.
+
+        Raises:
+            ValueError: If no parameters were set yet.
+        """
+        if self.current_parameters is None:
+            raise ValueError("No parameters available, update_parameters must be called first")
+        self.run_calculations(targets)
+        results = self.current_output_data.results
+        return {node_name: results.get(node_name) for node_name in targets}
+
+    def get_stale_nodes(self) -> set:
+        """
+        Returns the names of the nodes whose result is missing or outdated, i.e. not requested since
+        the parameters they depend on last changed.
+
+        Returns:
+            set: The names of the stale nodes.
+        """
+        self.get_execution_plan()
+        results = self.current_output_data.results
+        return {node_name for node_name, node, _ in self._plan_steps
+                if node.needs_recalculation or results.get(node_name) is None}
 
     def run_calculations(self, node_names=None):
         """
         Executes the calculations for all nodes in the calculation graph.
 
-        Iterates over each node, performing calculations based on their strategies
-        and the current set of parameters. Results are stored in `current_output_data`.
+        Selects the dirty suffix of the compiled execution plan and hands it to the executor. A node is calculated
+        if it is requested (or is a missing dependency of a requested node) and it is either marked for
+        recalculation or has no result yet. Results are stored in `current_output_data`.
+
+        Parameters:
+            node_names (iterable, optional): The names of the nodes to calculate. Defaults to all nodes.
 
         THIS METHOD shouldn't be called directly, it should be called by update_parameters method
         """
+        self.get_execution_plan()
+        results = self.current_output_data.results
+
         if node_names is None:
-            node_names = list(self.nodes.keys())
-        for name in node_names:
-            self.nodes[name].calculate()
+            requested = set(self._plan_positions)
+        else:
+            requested = {name for name in node_names if name in self._plan_positions}
+        if not requested:
+            return
+
+        # Backward pass: pull in the dependencies that must be (re)calculated before the requested nodes
+        start = min(self._plan_positions[name] for name in requested)
+        for node_name, node, dependencies in reversed(self._plan_steps):
+            if node_name in requested:
+                for dep_name, is_node in dependencies:
+                    if is_node and dep_name not in requested and \
+                            (self.nodes[dep_name].needs_recalculation or results.get(dep_name) is None):
+                        requested.add(dep_name)
+                        start = min(start, self._plan_positions[dep_name])
+
+        # Forward pass: select the dirty suffix of the plan and hand it to the executor
+        steps = [step for step in self._plan_steps[start:]
+                 if step[0] in requested and (step[1].needs_recalculation or results.get(step[0]) is None)]
+        if not steps:
+            return
+        self.instrumentation.record_run()
+        try:
+            with tracer.span("run_calculations", "engine", nodes=len(steps)):
+                self.executor.execute(self, steps)
+        finally:
+            self.expression_memo.clear()
+
+    def evaluate_step(self, node, dependencies, runner=None):
+        """
+        Resolves the dependencies of a plan step from the current results and parameters, then calculates the node,
+        or retrieves its result from the cache if the cache is enabled and the same inputs were already seen.
+        Called by the executors, the dependencies of the node must already be calculated.
+
+        Early cutoff: a node marked for recalculation keeps its result if none of its dependencies actually changed
+        value since it was calculated (e.g. an upstream node absorbed the parameter change). Its dependents are then
+        skipped the same way.
+
+        Parameters:
+            node (CalculationNode): The node to calculate.
+            dependencies (list): The (name, is_node) pairs of the node dependencies, as stored in the plan.
+            runner (callable, optional): Runs the strategy somewhere else than in the calling thread,
+                                         see `CalculationNode.evaluate`.
+
+        Returns:
+            The calculated value of the node.
+        """
+        start = time.perf_counter()
+        results = self.current_output_data.results
+        previous_value = results.get(node.name)
+        versions = tuple(self.value_versions.get(dep_name, 0) for dep_name, _ in dependencies)
+        if previous_value is not None and self.input_versions.get(node.name) == versions:
+            value = node.store_result(previous_value)
+            self._record_step(node.name, start, SKIPPED, value)
+            return value
+
+        parameters = self.current_parameters.data
+        resolved = {}
+        for dep_name, is_node in dependencies:
+            value = results.get(dep_name) if is_node else parameters.get(dep_name)
+            if value is None:
+                raise ValueError(f"Calculation for {dep_name} node returned None")
+            resolved[dep_name] = value
+
+        value, outcome = self._evaluate_resolved_step(node, dependencies, resolved, runner)
+
+        # Only a value that actually changed invalidates the results calculated from it
+        if previous_value is None or not results_equal(previous_value, value):
+            self.value_versions[node.name] = self.value_versions.get(node.name, 0) + 1
+        self.input_versions[node.name] = versions
+        self._record_step(node.name, start, outcome, value)
+        return value
+
+    def _record_step(self, node_name, start, outcome, value):
+        """
+        Records the run of a node in the engine statistics and, if tracing is enabled, in the timeline.
+        """
+        elapsed = time.perf_counter() - start
+        self.instrumentation.record(node_name, elapsed, outcome, value)
+        tracer.complete(node_name, "node", start, elapsed, outcome=outcome)
+
+    def _evaluate_resolved_step(self, node, dependencies, resolved, runner):
+        """
+        Calculates a node from its resolved dependencies, going through the cache if it is enabled.
+        Returns the value and whether it was calculated (CALCULATED) or retrieved from the cache (CACHE_HIT).
+        """
+        if self.cache is None:
+            return node.evaluate(resolved, runner), CALCULATED
+
+        key = self._get_cache_key(node, dependencies, resolved)
+        if key is not None:
+            found, value = self.cache.get(key)
+            if found:
+                self.result_fingerprints[node.name] = key
+                return node.store_result(value), CACHE_HIT
+
+        value = node.evaluate(resolved, runner)
+        self.result_fingerprints[node.name] = key
+        if key is not None:
+            self.cache.put(key, value)
+        return value, CALCULATED
+
+    def stats(self, sort_by="total_time") -> list[dict]:
+        """
+        Returns the per-node statistics recorded since the engine creation or the last `reset_stats` call:
+        wall time, number of calls and executions, cache hits, early cutoff skips and output memory.
+
+        Parameters:
+            sort_by (str): The column to sort the rows by, in decreasing order. Defaults to the total time.
+
+        Returns:
+            list[dict]: One row per node, see `EngineStats.table` for the columns.
+        """
+        return self.instrumentation.table(sort_by)
+
+    def reset_stats(self):
+        """
+        Clears the per-node statistics.
+        """
+        self.instrumentation.reset()
+
+    @traced("engine")
+    def run_batch(self, parameter_sets: list, node_names=None) -> dict:
+        """
+        Evaluates the graph over K parameter sets in one pass over the execution plan.
+
+        The parameters varying across the sets are given a leading batch axis (see `make_batch_parameters`).
+        Each node is then calculated once:
+            - nodes not depending on a varying parameter are calculated once, for the whole batch,
+            - nodes whose strategy supports batches calculate the K rows in a single vectorized call,
+            - the other nodes are calculated row by row and their results stacked: batching is opt-in, see
+              `CalculationStrategy.supports_batch`.
+
+        The batched run is independent of the current state of the engine: the current results, the parameters,
+        the results history and the cache are left untouched.
+
+        Parameters:
+            parameter_sets (list): The K parameter sets, as dicts or InputParameters, all with the same names.
+            node_names (iterable, optional): The nodes to return, only them and their dependencies are calculated.
+                                             Defaults to all nodes.
+
+        Returns:
+            dict: The results keyed by node name, each with a leading batch axis of size K:
+                  scalar results are (K,) arrays and frequency-domain results (K, N, C) arrays.
+
+        Raises:
+            KeyError: If a requested node does not exist in the graph.
+            ValueError: If the parameter sets are inconsistent or a dependency cannot be resolved.
+        """
+        parameters, batched, batch_size = make_batch_parameters(parameter_sets)
+        self.get_execution_plan()
+
+        if node_names is None:
+            node_names = list(self._plan_positions)
+        requested = set()
+        for node_name in node_names:
+            if node_name not in self._plan_positions:
+                raise KeyError(f"Node {node_name} not found in the calculation graph")
+            requested.add(node_name)
+            requested |= self.upstream_dependencies.get(node_name, set())
+
+        row_parameters = None
+        results = {}
+        try:
+            for node_name, node, dependencies in self._plan_steps:
+                if node_name not in requested:
+                    continue
+
+                resolved = {}
+                for dep_name, is_node in dependencies:
+                    value = results.get(dep_name) if is_node else parameters.data.get(dep_name)
+                    if value is None:
+                        raise ValueError(f"Calculation for {dep_name} node returned None")
+                    resolved[dep_name] = value
+
+                strategy = node.get_strategy()
+                is_batched = not batched.isdisjoint(resolved)
+                try:
+                    if not is_batched or strategy.supports_batch():
+                        value = strategy.calculate(resolved, parameters)
+                    else:
+                        if row_parameters is None:
+                            row_parameters = [InputParameters({name: select_row(value, index) if name in batched
+                                                               else value for name, value in parameters.data.items()})
+                                              for index in range(batch_size)]
+                        value = stack_rows([
+                            strategy.calculate({name: select_row(value, index) if name in batched else value
+                                                for name, value in resolved.items()}, row_parameters[index])
+                            for index in range(batch_size)])
+                except KeyError as e:
+                    raise KeyError(f"Error calculating {node_name}: missing dependency - {e}")
+                except Exception as e:
+                    raise Exception(f"Error calculating {node_name}: {e}")
+
+                if is_batched:
+                    batched.add(node_name)
+                results[node_name] = value
+        finally:
+            self.expression_memo.clear()
+
+        return {node_name: unbatch(results[node_name], batch_size, node_name in batched)
+                for node_name in node_names}
+
+    def _get_cache_key(self, node, dependencies, resolved):
+        """
+        Returns the fingerprint of the node result from its strategy and the fingerprints of its inputs,
+        or None if the fingerprint of an upstream result is unknown (calculated while the cache was disabled).
+        """
+        dependency_fingerprints = []
+        for dep_name, is_node in dependencies:
+            if is_node:
+                dependency_fingerprint = self.result_fingerprints.get(dep_name)
+                if dependency_fingerprint is None:
+                    return None
+            else:
+                dependency_fingerprint = fingerprint(resolved[dep_name])
+            dependency_fingerprints.append((dep_name, dependency_fingerprint))
+        return node_fingerprint(node.get_strategy(), dependency_fingerprints)
+
+    @property
+    def cache_hits(self):
+        """
+        The number of node results retrieved from the cache, 0 if the cache is disabled.
+        """
+        return self.cache.hits if self.cache is not None else 0
+
+    @property
+    def cache_misses(self):
+        """
+        The number of node results not found in the cache, 0 if the cache is disabled.
+        """
+        return self.cache.misses if self.cache is not None else 0
+
+    def clear_cache(self):
+        """
+        Empties the node results cache and resets its counters.
+        """
+        if self.cache is not None:
+            self.cache.clear()
 
     def __repr__(self):
         """
@@ -386,27 +967,95 @@ class CalculationEngine:
         """
         return f"CalculationEngine({self.nodes})"
 
-    def swap_strategy_for_node(self, node_name, strategy_instance, new_parameters):
-        current_node = self.get_or_create_node(node_name)
-        self.first_run = True
-        self.add_or_update_node(node_name, strategy_instance)
+    def swap_strategy_for_node(self, node_name, strategy_instance, new_parameters, targets=None):
+        self.swap_strategies_for_nodes({node_name: strategy_instance}, new_parameters, targets)
+
+    def swap_strategies_for_nodes(self, strategies: dict, new_parameters, targets=None):
+        """
+        Swaps the strategies of several nodes at once (e.g. when loading a SPICE circuit) and recalculates
+        the requested nodes in a single run.
+
+        The dependency index is updated incrementally, node by node (see `update_dependency_index`). The swapped
+        nodes and their dependents, along with the nodes affected by the parameters that changed since the last
+        run, are marked stale, and only the stale nodes among the targets and their dependencies are calculated.
+        The other stale nodes are calculated when requested, see `compute`. A dependent whose inputs end up
+        unchanged is skipped by the early cutoff.
+
+        Parameters:
+            strategies (dict): The new calculation strategies, keyed by node name.
+            new_parameters (dict): The parameters to use for the calculations.
+            targets (iterable, optional): The names of the nodes to bring up to date, e.g. the plotted ones.
+                                          Defaults to all nodes.
 
-        self.current_output_data.set_result(node_name, None)  # Invalidate existing results
+        Raises:
+            Exception: If a new strategy introduces a cyclic dependency. The previous strategies are restored.
+        """
+        swapped = []
+        try:
+            for node_name, strategy in strategies.items():
+                previous = self.nodes[node_name].get_strategy() if node_name in self.nodes else None
+                existed = node_name in self.nodes
+                self.add_or_update_node(node_name, strategy)
+                swapped.append((node_name, existed, previous))
+        except Exception:
+            for node_name, existed, previous in reversed(swapped):
+                if existed:
+                    self.add_or_update_node(node_name, previous)
+                else:
+                    self.delete_node(node_name)
+            raise
+
+        if self.first_run:
+            # Nothing was calculated yet, the graph is calculated with the new strategies
+            self.update_parameters(InputParameters(new_parameters), targets)
+            return
 
-        affected_nodes = self.get_nodes_affected_by_strategy_swap(node_name)
+        affected_nodes = self._set_parameters(InputParameters(new_parameters))
+        for node_name in strategies:
+            affected_nodes |= self.get_nodes_affected_by_strategy_swap(node_name)
 
         for affected_node in affected_nodes:
             self.nodes[affected_node].mark_for_recalculation()
 
-        self.old_parameters = self.current_parameters
-        self.current_parameters = InputParameters(new_parameters)
-
-        if self.current_output_data.results:
-            self.old_output_data = copy.deepcopy(self.current_output_data)
+        self.run_calculations(targets)
 
-        self.current_output_data = CalculationResults()
+    @traced("engine")
+    def compile_function(self, targets, parameter_names):
+        """
+        Returns a single generated function evaluating the given targets for a vector of values of the given
+        parameters, the other parameters keeping their current values. See `generate_fused_function`.
 
-        self.run_calculations(affected_nodes)
+        The function skips the bookkeeping of the engine and does not store its results: it is meant for the
+        tight loops of optimizers. It is cached, and generated again only when the graph changes or when one of
+        the other parameters the targets depend on changes.
 
+        Parameters:
+            targets (iterable): The names of the nodes to evaluate.
+            parameter_names (iterable): The names of the varying parameters, in the order of the vector values.
 
+        Returns:
+            callable: The function, called as function(values) and returning the data of the targets by name.
 
+        Raises:
+            ValueError: If no parameters were set yet.
+        """
+        if self.current_parameters is None:
+            raise ValueError("No parameters available, update_parameters must be called first")
+        targets = tuple(targets)
+        parameter_names = tuple(parameter_names)
+        self.get_execution_plan()
+
+        # The function embeds the current values of the other parameters the targets depend on
+        constants = set()
+        for node_name in targets:
+            constants |= self.upstream_dependencies.get(node_name, set())
+        constants = sorted(name for name in constants - set(parameter_names) if name not in self._plan_positions)
+        version = (self.graph_version, tuple(self.value_versions.get(name, 0) for name in constants))
+
+        key = (targets, parameter_names)
+        cached = self.fused_functions.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        function = generate_fused_function(self, targets, parameter_names)
+        self.fused_functions[key] = (version, function)
+        return function
@@ -0,0 +1,236 @@
+"""
+ src/model/executors.py
+ PLASMAG 2024 Software, LPP
+"""
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+
+class _SharedArray:
+    """
+    Picklable descriptor of a NumPy array copied into a shared memory block.
+    """
+
+    def __init__(self, name, shape, dtype):
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+
+
+def _share_value(value, blocks):
+    """
+    Copies the NumPy arrays found in a (nested) dependency value into shared memory blocks and replaces them
+    by their descriptors. The created blocks are appended to `blocks`, the caller must release them.
+    """
+    if isinstance(value, np.ndarray) and value.nbytes > 0 and not value.dtype.hasobject:
+        block = SharedMemory(create=True, size=value.nbytes)
+        blocks.append(block)
+        np.ndarray(value.shape, dtype=value.dtype, buffer=block.buf)[...] = value
+        return _SharedArray(block.name, value.shape, value.dtype.str)
+    if isinstance(value, dict):
+        return {key: _share_value(item, blocks) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_share_value(item, blocks) for item in value)
+    return value
+
+
+def _attach_value(value, blocks):
+    """
+    Inverse of `_share_value`, in the worker process: replaces the descriptors by read-only array views
+    on the shared memory blocks, without copying the data.
+    """
+    if isinstance(value, _SharedArray):
+        block = SharedMemory(name=value.name)
+        blocks.append(block)
+        array = np.ndarray(value.shape, dtype=np.dtype(value.dtype), buffer=block.buf)
+        array.flags.writeable = False
+        return array
+    if isinstance(value, dict):
+        return {key: _attach_value(item, blocks) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_attach_value(item, blocks) for item in value)
+    return value
+
+
+def _detach_value(value):
+    """
+    Copies the arrays of a result that may be views on shared memory, so the blocks can be closed.
+    """
+    if isinstance(value, np.ndarray) and value.base is not None:
+        return value.copy()
+    if isinstance(value, dict):
+        return {key: _detach_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_detach_value(item) for item in value)
+    return value
+
+
+def _calculate_in_process(strategy, shared_dependencies, parameters):
+    """
+    Entry point of the worker processes: attaches the shared dependencies and runs the strategy.
+    """
+    blocks = []
+    dependencies = _attach_value(shared_dependencies, blocks)
+    try:
+        return _detach_value(strategy.calculate(dependencies, parameters))
+    finally:
+        del dependencies
+        for block in blocks:
+            block.close()
+
+
+class SerialExecutor:
+    """
+    Runs the steps of an execution plan one after another, in plan order, in the engine process.
+    This is the default executor of the calculation engine: the "process" execution hint of the strategies is
+    ignored, use a ParallelExecutor to honour it.
+
+    Methods:
+        execute: Calculates the given plan steps.
+        shutdown: Releases the resources held by the executor (nothing to release here).
+    """
+
+    def execute(self, engine, steps):
+        """
+        Calculates the given plan steps in order.
+
+        Parameters:
+            engine (CalculationEngine): The engine owning the nodes and the results.
+            steps (list): The plan steps to calculate, in topological order.
+        """
+        for node_name, node, dependencies in steps:
+            engine.evaluate_step(node, dependencies)
+
+    def shutdown(self):
+        """
+        Nothing to release for the serial executor.
+        """
+
+
+class ParallelExecutor:
+    """
+    Runs the steps of an execution plan on a thread pool. A node is submitted as soon as all the nodes it
+    depends on (within the steps to run) are calculated, so independent branches of the graph
+    (e.g. the PSD nodes, the OLTF/CLTF chain and the TF_ASIC stages) are calculated concurrently.
+    NumPy releases the GIL in its array kernels, so frequency-domain nodes benefit from multiple cores.
+
+    The results are the same as the ones of the SerialExecutor, only the calculation order of independent
+    nodes changes.
+
+    Nodes whose strategy execution hint is "process" (see `CalculationStrategy.get_execution_hint`) are
+    calculated in a process pool, so heavy or GIL-bound strategies (SPICE simulations) do not block the rest
+    of the graph. Their array dependencies are shipped through shared memory instead of being pickled.
+
+    Attributes:
+        max_workers (int, optional): The number of worker threads. Defaults to the ThreadPoolExecutor default.
+        max_processes (int, optional): The number of worker processes. Defaults to the ProcessPoolExecutor default.
+
+    Methods:
+        execute: Calculates the given plan steps.
+        run_in_process: Calculates a strategy in the process pool.
+        shutdown: Stops the worker threads and processes.
+    """
+
+    def __init__(self, max_workers=None, max_processes=None):
+        self.max_workers = max_workers
+        self.max_processes = max_processes
+        self._pool = None
+        self._process_pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="plasmag-node")
+        return self._pool
+
+    def _get_process_pool(self):
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(max_workers=self.max_processes)
+        return self._process_pool
+
+    def run_in_process(self, strategy, dependencies, parameters):
+        """
+        Calculates a strategy in the process pool. Blocks the calling worker thread (not the GIL)
+        until the result is available.
+
+        Parameters:
+            strategy (CalculationStrategy): The strategy to run, must be picklable.
+            dependencies (dict): The resolved dependencies, their arrays are shipped through shared memory.
+            parameters (InputParameters): The current input parameters.
+
+        Returns:
+            The result of the strategy calculation.
+        """
+        blocks = []
+        try:
+            shared_dependencies = _share_value(dependencies, blocks)
+            future = self._get_process_pool().submit(_calculate_in_process, strategy, shared_dependencies,
+                                                     parameters)
+            return future.result()
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+    def execute(self, engine, steps):
+        """
+        Calculates the given plan steps, scheduling every step whose dependencies are ready on the thread pool.
+
+        Parameters:
+            engine (CalculationEngine): The engine owning the nodes and the results.
+            steps (list): The plan steps to calculate, in topological order.
+
+        Raises:
+            Exception: The first error raised by a node calculation. Steps not yet started are cancelled.
+        """
+        if not steps:
+            return
+
+        steps_by_name = {step[0]: step for step in steps}
+        pending = {}
+        dependents = {node_name: [] for node_name in steps_by_name}
+        for node_name, node, dependencies in steps:
+            scheduled_deps = [dep_name for dep_name, is_node in dependencies if is_node and dep_name in steps_by_name]
+            pending[node_name] = len(scheduled_deps)
+            for dep_name in scheduled_deps:
+                dependents[dep_name].append(node_name)
+
+        pool = self._get_pool()
+
+        def submit(name):
+            _, node, dependencies = steps_by_name[name]
+            runner = self.run_in_process if node.get_strategy().get_execution_hint() == "process" else None
+            future = pool.submit(engine.evaluate_step, node, dependencies, runner)
+            running[future] = name
+
+        running = {}
+        for node_name, count in pending.items():
+            if count == 0:
+                submit(node_name)
+
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                node_name = running.pop(future)
+                error = future.exception()
+                if error is not None:
+                    for other in running:
+                        other.cancel()
+                    wait(running)
+                    raise error
+                for dependent in dependents[node_name]:
+                    pending[dependent] -= 1
+                    if pending[dependent] == 0:
+                        submit(dependent)
+
+    def shutdown(self):
+        """
+        Stops the worker threads and processes. The pools are created again if the executor is used afterwards.
+        """
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=True)
+            self._process_pool = None
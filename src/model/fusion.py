@@ -0,0 +1,246 @@
+"""
+src/model/fusion.py
+PLASMAG 2024 Software, LPP
+"""
+import numpy as np
+
+from src.model.input_parameters import InputParameters
+from src.model.strategies import stack_columns
+from src.model.strategies.symbolic import SymbolicStrategy
+
+# Python code of the symbolic operations, the NumPy semantics are the same as in `symbolic.OPERATIONS`
+OPERATION_TEMPLATES = {
+    "add": "{} + {}",
+    "sub": "{} - {}",
+    "mul": "{} * {}",
+    "truediv": "{} / {}",
+    "pow": "{} ** {}",
+    "neg": "-{}",
+    "sqrt": "_np.sqrt({})",
+    "log10": "_np.log10({})",
+    "exp": "_np.exp({})",
+}
+
+
+def _read(value, column):
+    """
+    Returns the data of a dependency, or one of its columns.
+    """
+    if isinstance(value, dict):
+        value = value["data"]
+    return value if column is None else value[..., column]
+
+
+class _FusedFunctionBuilder:
+    """
+    Generates the source of a fused function, see `generate_fused_function`.
+    """
+
+    def __init__(self, engine, targets, parameter_names):
+        self.engine = engine
+        self.targets = list(targets)
+        self.parameter_names = list(parameter_names)
+        self.lines = []
+        self.namespace = {"_np": np, "_read": _read, "_stack_columns": stack_columns}
+        self.counter = 0
+
+        self.parameter_vars = {name: f"p{index}" for index, name in enumerate(self.parameter_names)}
+        self.node_vars = {}         # Node name -> variable holding its full result dict
+        self.data_vars = {}         # Node name -> variable holding its data
+        self.column_vars = {}       # (node name, column) -> variable holding the column
+        self.expression_vars = {}   # Expr -> variable holding its value
+        self.symbolic_columns = {}  # Symbolic node name -> {column: Expr or variable}
+        self.uses_parameters = False
+
+    def new_var(self, prefix="t"):
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def constant(self, value, prefix="k"):
+        name = self.new_var(prefix)
+        self.namespace[name] = value
+        return name
+
+    def emit(self, line):
+        self.lines.append("    " + line)
+
+    def build(self):
+        engine = self.engine
+        engine.get_execution_plan()
+        for name in self.targets:
+            if name not in engine._plan_positions:
+                raise KeyError(f"Node {name} not found in the calculation graph")
+        for name in self.parameter_names:
+            if name in engine.nodes and engine.nodes[name].get_strategy() is not None:
+                raise ValueError(f"{name} is a calculated node, not a parameter")
+
+        required = set(self.targets)
+        for name in self.targets:
+            required |= engine.upstream_dependencies.get(name, set())
+        varying = set(self.parameter_names)
+        steps = [step for step in engine._plan_steps if step[0] in required]
+
+        # The nodes not depending on the varying parameters are calculated once, with the current parameters
+        hoisted = [node_name for node_name, _, _ in steps
+                   if varying.isdisjoint(engine.upstream_dependencies.get(node_name, ()))]
+        self.hoisted_results = engine.compute(hoisted) if hoisted else {}
+        for node_name, result in self.hoisted_results.items():
+            self.node_vars[node_name] = self.constant(result, "n")
+
+        for node_name, node, dependencies in steps:
+            if node_name in self.hoisted_results:
+                continue
+            strategy = node.get_strategy()
+            if isinstance(strategy, SymbolicStrategy):
+                self.emit_symbolic_node(node_name, strategy)
+            else:
+                self.emit_node(node_name, strategy, dependencies)
+
+        results = ", ".join(f"{name!r}: {self.data_var(name)}" for name in self.targets)
+        header = ["def fused(values):"]
+        if self.parameter_vars:
+            header.append(f"    {', '.join(self.parameter_vars.values())}, = values")
+        if self.uses_parameters:
+            header.append("    parameters = _parameters(" + ", ".join(self.parameter_vars.values()) + ")")
+        source = "\n".join(header + self.lines + [f"    return {{{results}}}", ""])
+
+        base = dict(engine.current_parameters.data)
+        names = self.parameter_names
+
+        def make_parameters(*values):
+            data = dict(base)
+            data.update(zip(names, values))
+            return InputParameters(data)
+
+        self.namespace["_parameters"] = make_parameters
+        return source
+
+    def value(self, name):
+        """
+        Code of the value given to a strategy for one of its dependencies.
+        """
+        if name in self.engine._plan_positions:
+            return self.node_var(name)
+        return self.symbol(name, None)
+
+    def node_var(self, name):
+        """
+        Variable holding the full result of a node, assembled from its columns for a symbolic node.
+        """
+        if name not in self.node_vars:
+            strategy = self.engine.nodes[name].get_strategy()
+            var = self.new_var("r")
+            self.emit(f"{var} = {{'data': {self.data_var(name)}, 'labels': {list(strategy.labels)!r}, "
+                      f"'units': {list(strategy.units)!r}}}")
+            self.node_vars[name] = var
+        return self.node_vars[name]
+
+    def data_var(self, name):
+        """
+        Variable holding the data of a node.
+        """
+        if name not in self.data_vars:
+            var = self.new_var("d")
+            if name in self.symbolic_columns:
+                columns = self.symbolic_columns[name]
+                if list(columns) == [None]:
+                    self.emit(f"{var} = {columns[None]}")
+                else:
+                    stacked = ", ".join(columns[index] for index in sorted(columns))
+                    self.emit(f"{var} = _stack_columns(({stacked},))")
+            else:
+                self.emit(f"{var} = _read({self.node_vars[name]}, None)")
+            self.data_vars[name] = var
+        return self.data_vars[name]
+
+    def symbol(self, name, column):
+        """
+        Variable holding the value of a symbol of a symbolic strategy.
+        """
+        if name in self.parameter_vars:
+            return self.parameter_vars[name]
+        if name in self.symbolic_columns and column in self.symbolic_columns[name]:
+            return self.symbolic_columns[name][column]
+        if (name, column) not in self.column_vars:
+            if name in self.hoisted_results:
+                var = self.constant(_read(self.hoisted_results[name], column))
+            elif name in self.engine._plan_positions:
+                var = self.new_var("c")
+                self.emit(f"{var} = _read({self.node_var(name)}, {column!r})")
+            else:
+                var = self.constant(self.engine.current_parameters.data.get(name))
+            self.column_vars[(name, column)] = var
+        return self.column_vars[(name, column)]
+
+    def emit_symbolic_node(self, node_name, strategy):
+        """
+        Inlines the expressions of a symbolic strategy. Subexpressions already emitted for another node are reused.
+        """
+        for expr in strategy.program.steps:
+            if expr in self.expression_vars:
+                continue
+            if expr.op == "symbol":
+                var = self.symbol(*expr.args)
+            elif expr.op == "constant":
+                var = self.constant(expr.args[0])
+            else:
+                var = self.new_var()
+                operands = [self.expression_vars[arg] for arg in expr.args]
+                self.emit(f"{var} = {OPERATION_TEMPLATES[expr.op].format(*operands)}")
+            self.expression_vars[expr] = var
+
+        values = [self.expression_vars[expr] for expr in strategy.expressions]
+        if strategy.frequency_column:
+            columns = [self.symbol('frequency_vector', None)] + values
+            self.symbolic_columns[node_name] = dict(enumerate(columns))
+        elif len(values) == 1:
+            self.symbolic_columns[node_name] = {None: values[0]}
+        else:
+            self.symbolic_columns[node_name] = dict(enumerate(values))
+
+    def emit_node(self, node_name, strategy, dependencies):
+        """
+        Emits the call of a strategy.
+        """
+        self.uses_parameters = True
+        strategy_var = self.constant(strategy, "s")
+        arguments = ", ".join(f"{dep_name!r}: {self.value(dep_name)}" for dep_name, _ in dependencies)
+        var = self.new_var("r")
+        self.emit(f"{var} = {strategy_var}.calculate({{{arguments}}}, parameters)")
+        self.node_vars[node_name] = var
+
+
+def generate_fused_function(engine, targets, parameter_names):
+    """
+    Generates a single Python function evaluating the given targets of an engine graph, for a vector of parameter
+    values, e.g. to be called in the tight loop of an optimizer.
+
+    The nodes not depending on the varying parameters are calculated once, with the current parameters of
+    the engine, and embedded as constants. The other nodes are evaluated in the order of the execution plan,
+    without the bookkeeping of the engine (results storage, cache, statistics, early cutoff):
+        - the expressions of the symbolic strategies are inlined as NumPy code, their common subexpressions
+          evaluated once, and their columns used directly, without stacking them into results;
+        - the other strategies are called with their dependencies.
+
+    Parameters:
+        engine (CalculationEngine): The engine, with its current parameters set.
+        targets (iterable): The names of the nodes to evaluate.
+        parameter_names (iterable): The names of the varying parameters, in the order of the function arguments.
+
+    Returns:
+        callable: The function, called with the sequence of the values of the varying parameters, and returning
+                  the data of the targets, keyed by name. Its generated source is available as its `source`
+                  attribute.
+
+    Raises:
+        KeyError: If a target is not a node of the graph.
+        ValueError: If a varying parameter is a calculated node.
+    """
+    builder = _FusedFunctionBuilder(engine, targets, parameter_names)
+    source = builder.build()
+    exec(compile(source, "<fused>", "exec"), builder.namespace)
+    function = builder.namespace["fused"]
+    function.source = source
+    function.targets = builder.targets
+    function.parameter_names = builder.parameter_names
+    return function
@@ -24,8 +24,10 @@ class CalculationNode:
                                                        for leaf nodes that use direct parameters.
 
         Methods:
-            resolve_dependencies: Dynamically resolves (= get the value of) the dependencies required by the strategy.
-            calculate: Performs the calculation based on the strategy and updates the results.
+            resolve_dependencies: Resolves (= get the value of) the dependencies required by the strategy.
+            calculate: Returns the value of the node, calculating it through the engine if needed.
+            evaluate: Performs the calculation based on the strategy and resolved dependencies, and updates the results.
+            store_result: Stores a value as the result of the node.
             set_strategy: Assigns a new calculation strategy to the node.
         """
 
@@ -41,6 +43,8 @@ class CalculationNode:
         self.name = name
         self.engine = engine
         self._strategy = strategy
+        if strategy is not None:
+            strategy.bind(engine)
         self.needs_recalculation = False
 
     def get_strategy(self):
@@ -60,7 +64,7 @@ class CalculationNode:
         self.needs_recalculation = True
     def resolve_dependencies(self) -> dict:
         """
-        Dynamically resolves and calculates the dependencies required by this node's strategy.
+        Resolves and calculates the dependencies required by this node's strategy.
 
         This method iterates over the dependencies required by the strategy and get their values. It doesn't
         calculate the value of the dependencies if they have already been calculated and stored in the
@@ -82,45 +86,74 @@ class CalculationNode:
 
     def calculate(self) -> any:
         """
-        Checks if this node's result is already calculated and if recalculation is not needed
+        Returns the value of this node, calculating it (and its missing dependencies) through the engine
+        execution plan if it is not already calculated or if recalculation is needed.
         :return: The calculated value of this node. Can be a scalar or a tensor.
         """
-        existing_value = self.engine.current_output_data.get_result(self.name)
-        if existing_value is not None and not self.needs_recalculation:
-            return existing_value
+        if self._strategy:
+            self.engine.run_calculations([self.name])
+            return self.engine.current_output_data.get_result(self.name)
+
+        # For leaf nodes, directly use the parameter value if no strategy is provided
+        calculated_value = self.engine.current_parameters.data.get(self.name)
+        if calculated_value is None:
+            raise ValueError(f"Calculation for {self.name} node returned None")
+        # Even for leaf nodes, we may need to mark them as recalculated if they depend on input parameters
+        self.needs_recalculation = False
+        return calculated_value
 
-        # Resolve dependencies required for the calculation
-        dependencies = self.resolve_dependencies()
+    def evaluate(self, dependencies: dict, runner=None) -> any:
+        """
+        Performs the calculation with the strategy, using already resolved dependencies, and stores the result.
+        Called by the engine while running its execution plan.
 
-        # Perform the calculation using the strategy, if available
-        if self._strategy:
-            try:
+        Parameters:
+            dependencies (dict): The values of the dependencies required by the strategy, keyed by name.
+            runner (callable, optional): Called as runner(strategy, dependencies, parameters) instead of
+                                         the strategy `calculate` method, e.g. to run it in another process.
+
+        Returns:
+            The calculated value of this node. Can be a scalar or a tensor.
+        """
+        try:
+            if runner is None:
                 calculated_value = self._strategy.calculate(dependencies, self.engine.current_parameters)
-            except KeyError as e:
-                raise KeyError(f"Error calculating {self.name}: missing dependency - {e}")
-            except Exception as e:
-                raise Exception(f"Error calculating {self.name}: {e}")
-
-            # Store the calculated value and mark this node as not needing recalculation
-            self.engine.current_output_data.set_result(self.name, calculated_value)
-            self.needs_recalculation = False
-            return calculated_value
-        else:
-            # For leaf nodes, directly use the parameter value if no strategy is provided
-            calculated_value = self.engine.current_parameters.data.get(self.name)
-            if calculated_value is None:
-                raise ValueError(f"Calculation for {self.name} node returned None")
-            # Even for leaf nodes, we may need to mark them as recalculated if they depend on input parameters
-            self.needs_recalculation = False
-            return calculated_value
+            else:
+                calculated_value = runner(self._strategy, dependencies, self.engine.current_parameters)
+        except KeyError as e:
+            raise KeyError(f"Error calculating {self.name}: missing dependency - {e}")
+        except Exception as e:
+            raise Exception(f"Error calculating {self.name}: {e}")
+
+        return self.store_result(calculated_value)
+
+    def store_result(self, value: any) -> any:
+        """
+        Stores the value of this node in the engine results and marks it as not needing recalculation.
+
+        Parameters:
+            value: The value of this node, calculated or retrieved from the engine cache.
+
+        Returns:
+            The stored value.
+        """
+        self.engine.current_output_data.set_result(self.name, value)
+        self.needs_recalculation = False
+        return value
 
     def set_strategy(self, strategy):
         """
         Assigns a new calculation strategy to this node and invalidates any previously calculated value,
         forcing a recalculation (to avoid corrupted results) with the new strategy on the next calculate call.
+        The strategy is bound to the engine, see `CalculationStrategy.bind`.
 
         Parameters:
             strategy (CalculationStrategy): The new strategy to use for calculations.
         """
         self._strategy = strategy
+        if strategy is not None:
+            strategy.bind(self.engine)
         self.mark_for_recalculation()
+        self.engine.invalidate_execution_plan()
+        # The previous result was calculated by another strategy, it cannot be kept by early cutoff
+        self.engine.input_versions.pop(self.name, None)
@@ -2,6 +2,75 @@
  src/engine/results.py
  PLASMAG 2024 Software, LPP
 """
+import numpy as np
+
+
+def freeze(value: any) -> any:
+    """
+    Makes the NumPy arrays of a calculation result read-only, in place, including the arrays nested
+    in a {"data", "labels", "units"} record.
+
+    Parameters:
+        value: The calculation result.
+
+    Returns:
+        The same value, with its arrays flagged as non-writeable.
+    """
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, dict):
+        for item in value.values():
+            freeze(item)
+    return value
+
+
+def result_nbytes(value: any) -> int:
+    """
+    Returns the memory used by the NumPy arrays of a calculation result, including the arrays nested
+    in a {"data", "labels", "units"} record. Scalars and metadata are not counted.
+
+    Parameters:
+        value: The calculation result.
+
+    Returns:
+        int: The number of bytes of the result arrays.
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(result_nbytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(result_nbytes(item) for item in value)
+    return 0
+
+
+def results_equal(first: any, second: any) -> bool:
+    """
+    Tells whether two calculation results are identical, comparing the NumPy arrays element-wise,
+    including the arrays nested in a {"data", "labels", "units"} record.
+
+    The comparison is exact: results differing by a rounding error are considered different.
+
+    Parameters:
+        first: The first calculation result.
+        second: The second calculation result.
+
+    Returns:
+        bool: True if the results are identical.
+    """
+    if first is second:
+        return True
+    if isinstance(first, dict) or isinstance(second, dict):
+        return isinstance(first, dict) and isinstance(second, dict) and first.keys() == second.keys() \
+            and all(results_equal(first[key], second[key]) for key in first)
+    if isinstance(first, np.ndarray) or isinstance(second, np.ndarray):
+        return np.shape(first) == np.shape(second) and bool(np.array_equal(first, second))
+    try:
+        return bool(first == second)
+    except (TypeError, ValueError):
+        return False
+
+
 class CalculationResults:
     """
     This class acts as a centralized repository for storing the outcomes of various
@@ -17,10 +86,14 @@ class CalculationResults:
     Methods:
         set_result: Stores or updates a calculation result in the repository.
         get_result: Retrieves a calculation result by its name.
+        snapshot: Returns a cheap, independent copy of the repository sharing the stored results.
 
     Note:
         If a result for the given key does not exist, `get_result` returns None.
         This behavior allows checking the existence of results without raising exceptions.
+
+        Stored results are immutable records: their arrays are made read-only and a new calculation replaces
+        the record instead of modifying it. Snapshots can therefore share the unchanged arrays at no cost.
     """
 
     def __init__(self):
@@ -32,9 +105,9 @@ class CalculationResults:
 
         Parameters:
             key (str): The name of the calculation result to store or update.
-            value: The outcome of the calculation to be stored.
+            value: The outcome of the calculation to be stored. Its arrays are made read-only.
         """
-        self.results[key] = value
+        self.results[key] = freeze(value)
 
     def get_result(self, key: str) -> any:
         """
@@ -48,3 +121,15 @@ class CalculationResults:
             no result is found for the specified key.
         """
         return self.results.get(key, None)
+
+    def snapshot(self) -> 'CalculationResults':
+        """
+        Returns a copy of this repository referencing the same (immutable) results. Replacing a result in either
+        repository afterwards does not affect the other one.
+
+        Returns:
+            CalculationResults: The snapshot.
+        """
+        snapshot = CalculationResults()
+        snapshot.results = dict(self.results)
+        return snapshot
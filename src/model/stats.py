@@ -0,0 +1,143 @@
+"""
+src/model/stats.py
+PLASMAG 2024 Software, LPP
+"""
+import threading
+
+from src.model.results import result_nbytes
+
+CALCULATED = "calculated"
+CACHE_HIT = "cache_hit"
+SKIPPED = "skipped"
+
+
+class NodeStats:
+    """
+    The counters of a single calculation node.
+
+    Attributes:
+        calls (int): The number of times the node went through the engine, whatever the outcome.
+        executions (int): The number of times the strategy was actually calculated.
+        cache_hits (int): The number of times the result was retrieved from the cache.
+        skipped (int): The number of times the calculation was skipped by early cutoff.
+        total_time (float): The cumulated wall time spent on the node, in seconds.
+        last_time (float): The wall time of the last run of the node, in seconds.
+        last_outcome (str): The outcome of the last run: "calculated", "cache_hit" or "skipped".
+        nbytes (int): The memory used by the arrays of the last result of the node.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.executions = 0
+        self.cache_hits = 0
+        self.skipped = 0
+        self.total_time = 0.0
+        self.last_time = 0.0
+        self.last_outcome = None
+        self.nbytes = 0
+
+
+class EngineStats:
+    """
+    Collects the per-node instrumentation of a calculation engine: wall time, executions, cache hits,
+    early cutoff skips and output memory. Recording a node costs a dictionary lookup and a few additions,
+    so the statistics are always on.
+
+    The recording is thread-safe, nodes can be recorded concurrently by the ParallelExecutor.
+
+    Attributes:
+        nodes (dict): The NodeStats of each recorded node, keyed by node name.
+        runs (int): The number of engine runs recorded.
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self.runs = 0
+        self._lock = threading.Lock()
+
+    def record_run(self):
+        """
+        Counts a run of the engine, i.e. one execution of (a part of) the execution plan.
+        """
+        with self._lock:
+            self.runs += 1
+
+    def record(self, node_name: str, elapsed: float, outcome: str, value: any):
+        """
+        Records a run of a node.
+
+        Parameters:
+            node_name (str): The name of the node.
+            elapsed (float): The wall time spent on the node, in seconds.
+            outcome (str): CALCULATED, CACHE_HIT or SKIPPED.
+            value: The result of the node.
+        """
+        nbytes = result_nbytes(value)
+        with self._lock:
+            stats = self.nodes.get(node_name)
+            if stats is None:
+                stats = self.nodes[node_name] = NodeStats()
+            stats.calls += 1
+            if outcome == CALCULATED:
+                stats.executions += 1
+            elif outcome == CACHE_HIT:
+                stats.cache_hits += 1
+            else:
+                stats.skipped += 1
+            stats.total_time += elapsed
+            stats.last_time = elapsed
+            stats.last_outcome = outcome
+            stats.nbytes = nbytes
+
+    def reset(self):
+        """
+        Clears all the counters.
+        """
+        with self._lock:
+            self.nodes = {}
+            self.runs = 0
+
+    def table(self, sort_by="total_time") -> list[dict]:
+        """
+        Returns the statistics as a table, one row per node.
+
+        Parameters:
+            sort_by (str): The column to sort the rows by, in decreasing order. Defaults to the total time.
+
+        Returns:
+            list[dict]: The rows, with the columns "node", "calls", "executions", "cache_hits", "skipped",
+                        "total_time", "mean_time", "last_time", "last_outcome" and "nbytes".
+                        The list can be given as is to pandas.DataFrame.
+        """
+        with self._lock:
+            rows = [{
+                "node": node_name,
+                "calls": stats.calls,
+                "executions": stats.executions,
+                "cache_hits": stats.cache_hits,
+                "skipped": stats.skipped,
+                "total_time": stats.total_time,
+                "mean_time": stats.total_time / stats.calls if stats.calls else 0.0,
+                "last_time": stats.last_time,
+                "last_outcome": stats.last_outcome,
+                "nbytes": stats.nbytes,
+            } for node_name, stats in self.nodes.items()]
+        return sorted(rows, key=lambda row: row[sort_by], reverse=True)
+
+    def format_table(self, sort_by="total_time") -> str:
+        """
+        Returns the statistics table as aligned text, e.g. to be printed.
+
+        Parameters:
+            sort_by (str): The column to sort the rows by, in decreasing order. Defaults to the total time.
+
+        Returns:
+            str: The formatted table.
+        """
+        lines = [f"{'node':<28}{'calls':>7}{'exec':>7}{'cache':>7}{'skip':>7}"
+                 f"{'total (ms)':>12}{'mean (ms)':>11}{'nbytes':>10}"]
+        for row in self.table(sort_by):
+            lines.append(f"{row['node']:<28}{row['calls']:>7}{row['executions']:>7}{row['cache_hits']:>7}"
+                         f"{row['skipped']:>7}{row['total_time'] * 1e3:>12.3f}{row['mean_time'] * 1e3:>11.3f}"
+                         f"{row['nbytes']:>10}")
+        return "\n".join(lines)
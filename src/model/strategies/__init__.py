@@ -1,2 +1,4 @@
 # src/model/strategies/__init__.py
-from .generic_strategy import CalculationStrategy
\ No newline at end of file
+from .generic_strategy import CalculationStrategy
+from .tensor import stack_columns, apply_stage_gain, remove_stage_gain, resample_loglog
+from .symbolic import SymbolicStrategy, Symbol
@@ -4,6 +4,8 @@ PLASMAG 2024 Software, LPP
 """
 from abc import ABC, abstractmethod
 
+from src.model.backends import NUMPY_BACKEND
+
 
 class CalculationStrategy(ABC):
     """
@@ -20,6 +22,15 @@ class CalculationStrategy(ABC):
     Methods:
         calculate: Performs the calculation based on given dependencies and parameters.
         get_dependencies: Returns a list of names of other calculations this strategy depends on.
+        get_execution_hint: Tells the parallel executor where this strategy should run ("thread" or "process").
+        supports_batch: Tells the engine whether `calculate` accepts inputs with a leading batch axis.
+        cache_key: Returns the settings of the instance which change its results, for the result cache.
+        bind: Binds the strategy to the engine running it.
+
+    Attributes:
+        backend (NumpyBackend | NumbaBackend): The backend running the kernels declared with the `kernel`
+                                               decorator (see src/model/backends.py). Assigned by `bind`,
+                                               from the backend of the engine.
 
     Example:
         Subclass this `CalculationStrategy` to implement a custom calculation method.
@@ -44,6 +55,8 @@ class CalculationStrategy(ABC):
           To know all existing dependencies, they are all listed in the CalculationResults readme file.
     """
 
+    backend = NUMPY_BACKEND
+
     @abstractmethod
     def calculate(self, dependencies: dict, parameters):
         """
@@ -73,3 +86,73 @@ class CalculationStrategy(ABC):
             list[str]: A list of dependency names.
         """
         return []
+
+    @staticmethod
+    def get_execution_hint() -> str:
+        """
+        Tells the ParallelExecutor where the calculation of this strategy should run.
+
+        - "thread" (default): the calculation runs in the engine process, on the executor thread pool.
+          Suited to NumPy-based strategies, which release the GIL.
+        - "process": the calculation runs in a separate process. Suited to heavy or GIL-bound strategies
+          (SPICE simulations, pure-Python loops). The strategy instance must be picklable.
+
+        The hint is only honoured by the ParallelExecutor. The SerialExecutor, which is the default of the engine,
+        the controller and the GUI, calculates every strategy in the engine process. Use the `max_workers` option
+        of the CalculationController, or `CalculationEngine.set_executor(ParallelExecutor(...))`, to run the
+        "process" strategies in a process pool.
+        The strategy is pickled with its attributes, including the backend bound by `bind`: the backends are
+        stateless and are rebuilt in the worker process, whose kernels are compiled (or loaded from the Numba
+        cache) there.
+
+        Returns:
+            str: "thread" or "process".
+        """
+        return "thread"
+
+    @staticmethod
+    def supports_batch() -> bool:
+        """
+        Tells the engine whether `calculate` can evaluate a whole batch of parameter sets in one call
+        (see `CalculationEngine.run_batch`).
+
+        During a batched run, the scalar inputs that vary across the K parameter sets are (K, 1) arrays
+        and the results depending on them carry a leading batch axis: scalar results are (K, 1) arrays and
+        frequency-domain results are (K, N, C) arrays. Plain NumPy arithmetic broadcasts these shapes
+        against the shared (N,) frequency vector, so a strategy supports batches as long as it reads the
+        result columns with `data[..., i]`, stacks them with `stack_columns` and avoids Python scalar
+        conversions such as `int()`.
+
+        Batching is opt-in: by default the engine calls the strategy once per parameter set and stacks its
+        results, as for the strategies that cannot batch (strategies building the frequency axis, or reducing
+        over their data such as `np.max` or `np.interp` on a result column). A strategy returns True once its
+        `calculate` has been checked against batched inputs.
+
+        Returns:
+            bool: True if the strategy is batch-aware. Defaults to False.
+        """
+        return False
+
+    def cache_key(self) -> tuple:
+        """
+        Returns the settings of this instance which change its results, e.g. the arguments of its constructor.
+        The result cache of the engine identifies a node result by the strategy class, its cache key and the
+        inputs of the node (see `node_fingerprint`): two instances of the same class with the same key must
+        compute the same results from the same inputs.
+
+        Strategies configured at construction must override it. The default suits stateless strategies.
+
+        Returns:
+            tuple: The settings, made of values with an exact repr (numbers, strings, tuples).
+        """
+        return ()
+
+    def bind(self, engine):
+        """
+        Binds the strategy to the engine running it, called by the node every time the strategy is assigned
+        and by the engine when its backend changes. Subclasses extending it must call the parent method.
+
+        Parameters:
+            engine (CalculationEngine): The engine.
+        """
+        self.backend = engine.backend
@@ -1,6 +1,7 @@
 import numpy as np
 from src.model.input_parameters import InputParameters
-from src.model.strategies import CalculationStrategy
+from src.model.backends import kernel
+from src.model.strategies import CalculationStrategy, stack_columns, apply_stage_gain
 from scipy.constants import mu_0
 
 
@@ -12,7 +13,7 @@ class CLTF_Strategy_Non_Filtered(CalculationStrategy):
         ray_spire = parameters.data['ray_spire']
         mu_app = dependencies['mu_app']
         frequency_vector = dependencies['frequency_vector']
-        TF_ASIC_Stage_1_linear = dependencies['TF_ASIC_Stage_1'][:,1]
+        TF_ASIC_Stage_1_linear = dependencies['TF_ASIC_Stage_1'][..., 1]
 
         inductance = dependencies['inductance']
         capacitance = dependencies['capacitance']
@@ -21,10 +22,9 @@ class CLTF_Strategy_Non_Filtered(CalculationStrategy):
         mutual_inductance = parameters.data['mutual_inductance']
         feedback_resistance = parameters.data['feedback_resistance']
 
-        vectorized_oltf = np.vectorize(self.calculate_cltf)
-        oltf_values = vectorized_oltf(nb_spire, ray_spire, mu_app, frequency_vector, TF_ASIC_Stage_1_linear, inductance, capacitance, resistance, mutual_inductance, feedback_resistance)
+        oltf_values = self.calculate_cltf(nb_spire, ray_spire, mu_app, frequency_vector, TF_ASIC_Stage_1_linear, inductance, capacitance, resistance, mutual_inductance, feedback_resistance)
 
-        frequency_oltf_tensor = np.column_stack((frequency_vector, oltf_values))
+        frequency_oltf_tensor = stack_columns((frequency_vector, oltf_values))
         return {
             "data": frequency_oltf_tensor,
             "labels": ["Frequency", "Gain"],
@@ -49,27 +49,27 @@ class CLTF_Strategy_Non_Filtered(CalculationStrategy):
     def get_dependencies():
         return ['nb_spire', 'ray_spire', 'mu_app', 'frequency_vector', 'TF_ASIC_Stage_1', 'inductance', 'capacitance', 'resistance', 'mutual_inductance', 'feedback_resistance']
 
+    @staticmethod
+    def supports_batch():
+        return True
+
 class CLTF_Strategy_Non_Filtered_legacy(CalculationStrategy):
 
     def calculate(self, dependencies: dict, parameters: InputParameters):
         nb_spire = parameters.data['nb_spire']
         ray_spire = parameters.data['ray_spire']
-        mutual_inductance = parameters.data['mutual_inductance']
-        feedback_resistance = parameters.data['feedback_resistance']
 
         mu_app = dependencies['mu_app']['data']
         frequency_vector = dependencies['frequency_vector']['data']
-        TF_ASIC_Stage_1_linear = dependencies['TF_ASIC_Stage_1']['data'][:,1]
-        inductance = dependencies['inductance']['data']
-        capacitance = dependencies['capacitance']['data']
-        resistance = dependencies['resistance']['data']
+        TF_ASIC_Stage_1_linear = dependencies['TF_ASIC_Stage_1']['data'][..., 1]
+        omega = dependencies['omega']['data']
+        closed_loop_denominator = dependencies['RLC_denominator_closed_loop']['data']
 
 
 
-        vectorized_oltf = np.vectorize(self.calculate_cltf)
-        oltf_values = vectorized_oltf(nb_spire, ray_spire, mu_app, frequency_vector, TF_ASIC_Stage_1_linear, inductance, capacitance, resistance, mutual_inductance, feedback_resistance)
+        oltf_values = self.calculate_cltf(nb_spire, ray_spire, mu_app, omega, TF_ASIC_Stage_1_linear, closed_loop_denominator)
 
-        frequency_oltf_tensor = np.column_stack((frequency_vector, oltf_values))
+        frequency_oltf_tensor = stack_columns((frequency_vector, oltf_values))
         values = frequency_oltf_tensor
 
         return {
@@ -78,14 +78,13 @@ class CLTF_Strategy_Non_Filtered_legacy(CalculationStrategy):
             "units": ["Hz", ""]
         }
 
-    def calculate_cltf(self,
-                       nb_spire,
+    @kernel
+    def calculate_cltf(nb_spire,
                        ray_spire,
                        mu_app,
-                       f,
-                       TF_ASIC_Stage_1_point, L, C, R,
-                       mutual_inductance, feedback_resistance):
-        result = (nb_spire * (np.pi * (ray_spire)**2) * mu_app * 4 * np.pi * 10**-7 * (2* np.pi * f)* TF_ASIC_Stage_1_point)  / ((1- L * C * (2*np.pi*f)**2)**2 + (((2*np.pi*f)*R*C + (2*np.pi*f)*mutual_inductance * TF_ASIC_Stage_1_point/feedback_resistance)**2))**0.5
+                       omega,
+                       TF_ASIC_Stage_1_point, closed_loop_denominator):
+        result = (nb_spire * (np.pi * (ray_spire)**2) * mu_app * 4 * np.pi * 10**-7 * omega * TF_ASIC_Stage_1_point)  / closed_loop_denominator**0.5
         return result
 
 
@@ -94,19 +93,22 @@ class CLTF_Strategy_Non_Filtered_legacy(CalculationStrategy):
 
     @staticmethod
     def get_dependencies():
-        return ['nb_spire', 'ray_spire', 'mu_app', 'frequency_vector', 'TF_ASIC_Stage_1', 'inductance', 'capacitance', 'resistance', 'mutual_inductance', 'feedback_resistance']
+        return ['nb_spire', 'ray_spire', 'mu_app', 'frequency_vector', 'TF_ASIC_Stage_1', 'omega', 'RLC_denominator_closed_loop']
+
+    @staticmethod
+    def supports_batch():
+        return True
 
 
 
 class CLTF_Strategy_Filtered(CalculationStrategy):
 
     def calculate(self, dependencies: dict, parameters: InputParameters):
-        OLTF_Non_filtered = 20*np.log10(dependencies['CLTF_Non_filtered']["data"][:,1]) # linear
-        TF_ASIC_Stage_2 = 20*np.log10(dependencies['TF_ASIC_Stage_2']["data"][:,1]) # linear
+        OLTF_Non_filtered = dependencies['CLTF_Non_filtered']["data"][..., 1] # linear
+        TF_ASIC_Stage_2 = dependencies['TF_ASIC_Stage_2']["data"][..., 1] # linear
 
-        result = OLTF_Non_filtered + TF_ASIC_Stage_2
-        result = 10**(result/20)
-        result = np.column_stack((dependencies['CLTF_Non_filtered']["data"][:,0], result))
+        result = apply_stage_gain(OLTF_Non_filtered, TF_ASIC_Stage_2)
+        result = stack_columns((dependencies['CLTF_Non_filtered']["data"][..., 0], result))
         return {
             "data": result,
             "labels": ["Frequency", "Gain"],
@@ -117,6 +119,10 @@ class CLTF_Strategy_Filtered(CalculationStrategy):
     def get_dependencies():
         return ['CLTF_Non_filtered', 'TF_ASIC_Stage_2']
 
+    @staticmethod
+    def supports_batch():
+        return True
+
 
 class Display_CLTF_OLTF(CalculationStrategy):
 
@@ -124,7 +130,7 @@ class Display_CLTF_OLTF(CalculationStrategy):
         CLTF = dependencies['CLTF_Filtered']["data"]
         OLTF = dependencies['OLTF_Filtered']["data"]
 
-        result = np.column_stack((CLTF[:,0], CLTF[:,1], OLTF[:,1]))
+        result = stack_columns((CLTF[..., 0], CLTF[..., 1], OLTF[..., 1]))
         return {
             "data": result,
             "labels": ["Frequency", "CLTF", "OLTF"],
@@ -135,3 +141,7 @@ class Display_CLTF_OLTF(CalculationStrategy):
     def get_dependencies():
         return ['CLTF_Filtered', 'OLTF_Filtered']
 
+    @staticmethod
+    def supports_batch():
+        return True
+
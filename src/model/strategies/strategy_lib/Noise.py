@@ -1,6 +1,8 @@
 import numpy as np
 from src.model.input_parameters import InputParameters
-from src.model.strategies import CalculationStrategy
+from src.model.backends import kernel
+from src.model.strategies import CalculationStrategy, stack_columns, apply_stage_gain, remove_stage_gain, \
+    SymbolicStrategy, Symbol
 from scipy.constants import k
 
 class PSD_R_cr(CalculationStrategy):
@@ -12,9 +14,9 @@ class PSD_R_cr(CalculationStrategy):
         frequency_vector = dependencies['frequency_vector']["data"]
         result = self.calculate_psd(temperature, feedback_resistance)
 
-        ones = np.ones(len(frequency_vector))
+        ones = np.ones(np.shape(frequency_vector))
         result = result * ones
-        results = np.column_stack((frequency_vector, result))
+        results = stack_columns((frequency_vector, result))
 
         return {
             "data": results,
@@ -31,6 +33,10 @@ class PSD_R_cr(CalculationStrategy):
     def get_dependencies():
         return ['temperature', "feedback_resistance", "frequency_vector"]
 
+    @staticmethod
+    def supports_batch():
+        return True
+
 class PSD_R_cr_V2(CalculationStrategy):
 
     def calculate(self, dependencies: dict, parameters: InputParameters):
@@ -42,9 +48,9 @@ class PSD_R_cr_V2(CalculationStrategy):
 
         result = result**2
 
-        ones = np.ones(len(frequency_vector))
+        ones = np.ones(np.shape(frequency_vector))
         result = result * ones
-        results = np.column_stack((frequency_vector, result))
+        results = stack_columns((frequency_vector, result))
 
         return {
             "data": results,
@@ -60,15 +66,18 @@ class PSD_R_cr_V2(CalculationStrategy):
     def get_dependencies():
         return ['temperature', "feedback_resistance", "frequency_vector"]
 
+    @staticmethod
+    def supports_batch():
+        return True
+
 class PSD_R_cr_filtered(CalculationStrategy):
 
     def calculate(self, dependencies: dict, parameters: InputParameters):
-        PSD_R_cr_non_filtered = 20*np.log10(dependencies['PSD_R_cr']["data"][:,1])
-        TF_ASIC_Stage_2 = 20*np.log10(dependencies['TF_ASIC_Stage_2']["data"][:,1])
+        PSD_R_cr_non_filtered = dependencies['PSD_R_cr']["data"][..., 1]
+        TF_ASIC_Stage_2 = dependencies['TF_ASIC_Stage_2']["data"][..., 1]
 
-        result = (PSD_R_cr_non_filtered + TF_ASIC_Stage_2)
-        result = 10**(result/20)
-        results = np.column_stack((dependencies['PSD_R_cr']["data"][:,0], result))
+        result = apply_stage_gain(PSD_R_cr_non_filtered, TF_ASIC_Stage_2)
+        results = stack_columns((dependencies['PSD_R_cr']["data"][..., 0], result))
 
         return {
             "data": results,
@@ -81,16 +90,18 @@ class PSD_R_cr_filtered(CalculationStrategy):
     def get_dependencies():
         return ['TF_ASIC_Stage_2', "PSD_R_cr",]
 
+    @staticmethod
+    def supports_batch():
+        return True
+
 class PSD_R_cr_filtered_V2(CalculationStrategy):
 
     def calculate(self, dependencies: dict, parameters: InputParameters):
-        PSD_R_cr_non_filtered = 20*np.log10(dependencies['PSD_R_cr']["data"][:,1])
-        TF_ASIC_Stage_2 = 20*np.log10(dependencies['TF_ASIC_Stage_2']["data"][:,1])
+        PSD_R_cr_non_filtered = dependencies['PSD_R_cr']["data"][..., 1]
+        TF_ASIC_Stage_2 = dependencies['TF_ASIC_Stage_2']["data"][..., 1]
 
-        result = (PSD_R_cr_non_filtered + TF_ASIC_Stage_2)
-        result = 10**(result/20)
-        result = result**2
-        results = np.column_stack((dependencies['PSD_R_cr']["data"][:,0], result))
+        result = apply_stage_gain(PSD_R_cr_non_filtered, TF_ASIC_Stage_2, power=2)
+        results = stack_columns((dependencies['PSD_R_cr']["data"][..., 0], result))
 
         return {
             "data": results,
@@ -103,56 +114,52 @@ class PSD_R_cr_filtered_V2(CalculationStrategy):
     def get_dependencies():
         return ['TF_ASIC_Stage_2', "PSD_R_cr",]
 
+    @staticmethod
+    def supports_batch():
+        return True
+
 class PSD_R_Coil(CalculationStrategy):
 
     def calculate(self, dependencies: dict, parameters: InputParameters):
         temperature = parameters.data['temperature']
-        mutual_inductance = parameters.data['mutual_inductance']
-        feedback_resistance = parameters.data['feedback_resistance']
-        
+
         resistance = dependencies['resistance']["data"]
         frequency_vector = dependencies['frequency_vector']["data"]
-        TF_ASIC_Stage_1 = dependencies['TF_ASIC_Stage_1']["data"][:,1]
-        inductance = dependencies['inductance']["data"]
-        capacitance = dependencies['capacitance']["data"]
-        
-
+        TF_ASIC_Stage_1 = dependencies['TF_ASIC_Stage_1']["data"][..., 1]
+        closed_loop_denominator = dependencies['RLC_denominator_closed_loop']["data"]
 
-        vectorized_psd_r_coil = np.vectorize(self.calculate_psd)
-        psd_r_coil_values = vectorized_psd_r_coil(temperature, resistance, k, frequency_vector, TF_ASIC_Stage_1, inductance, capacitance, mutual_inductance, feedback_resistance)
-        frequency_psd_r_coil_tensor = np.column_stack((frequency_vector, psd_r_coil_values))
+        psd_r_coil_values = self.calculate_psd(temperature, resistance, k, TF_ASIC_Stage_1, closed_loop_denominator)
+        frequency_psd_r_coil_tensor = stack_columns((frequency_vector, psd_r_coil_values))
         results = frequency_psd_r_coil_tensor
-        
+
         return {
             "data": results,
             "labels": ["Frequency", "PSD_R_Coil"],
             "units": ["Hz", "V/sqrt(Hz)"]
         }
 
-    def calculate_psd(self, temperature, resistance, k, f, TF_ASIC_Stage_1_point, inductance, capacitance, mutual_inductance, feedback_resistance):
-
+    @kernel
+    def calculate_psd(temperature, resistance, k, TF_ASIC_Stage_1_point, closed_loop_denominator):
         psd_r_coil_num = (4 * k * temperature * resistance) * TF_ASIC_Stage_1_point**2
-        psd_r_coil_den = (
-        (1 - inductance * capacitance * (2 * np.pi * f)**2)**2
-        + ((resistance * capacitance * 2 * np.pi * f) + ((TF_ASIC_Stage_1_point * mutual_inductance * 2 * np.pi * f) / feedback_resistance))**2
-    )
-
-        result = (psd_r_coil_num / psd_r_coil_den)**0.5
+        result = (psd_r_coil_num / closed_loop_denominator)**0.5
         return result
 
     @staticmethod
     def get_dependencies():
-        return ['temperature', "feedback_resistance", "frequency_vector", "TF_ASIC_Stage_1", "inductance", "capacitance", "resistance", "mutual_inductance", "feedback_resistance", "frequency_vector"]
+        return ['temperature', "frequency_vector", "TF_ASIC_Stage_1", "resistance", "RLC_denominator_closed_loop"]
+
+    @staticmethod
+    def supports_batch():
+        return True
 
 class PSD_R_Coil_filtered(CalculationStrategy):
 
     def calculate(self, dependencies: dict, parameters: InputParameters):
-        PSD_R_Coil_non_filtered = 20*np.log10(dependencies['PSD_R_Coil']["data"][:,1])
-        TF_ASIC_Stage_2 = 20*np.log10(dependencies['TF_ASIC_Stage_2']["data"][:,1])
+        PSD_R_Coil_non_filtered = dependencies['PSD_R_Coil']["data"][..., 1]
+        TF_ASIC_Stage_2 = dependencies['TF_ASIC_Stage_2']["data"][..., 1]
 
-        result = (PSD_R_Coil_non_filtered + TF_ASIC_Stage_2)
-        result = 10**(result/20)
-        values = np.column_stack((dependencies['PSD_R_Coil']["data"][:,0], result))
+        result = apply_stage_gain(PSD_R_Coil_non_filtered, TF_ASIC_Stage_2)
+        values = stack_columns((dependencies['PSD_R_Coil']["data"][..., 0], result))
 
         return {
             "data": values,
@@ -164,25 +171,24 @@ class PSD_R_Coil_filtered(CalculationStrategy):
     def get_dependencies():
         return ['TF_ASIC_Stage_2', "PSD_R_Coil"]
 
+    @staticmethod
+    def supports_batch():
+        return True
+
 
 class PSD_R_Coil_V2(CalculationStrategy):
 
     def calculate(self, dependencies: dict, parameters: InputParameters):
         temperature = parameters.data['temperature']
-        mutual_inductance = parameters.data['mutual_inductance']
-        feedback_resistance = parameters.data['feedback_resistance']
 
         resistance = dependencies['resistance']["data"]
         frequency_vector = dependencies['frequency_vector']["data"]
-        TF_ASIC_Stage_1 = dependencies['TF_ASIC_Stage_1']["data"][:, 1]
-        inductance = dependencies['inductance']["data"]
-        capacitance = dependencies['capacitance']["data"]
-
-        vectorized_psd_r_coil = np.vectorize(self.calculate_psd)
-        psd_r_coil_values = vectorized_psd_r_coil(temperature, resistance, k, frequency_vector, TF_ASIC_Stage_1,
-                                                  inductance, capacitance, mutual_inductance, feedback_resistance)
-        psd_r_coil_values = psd_r_coil_values ** 2
-        frequency_psd_r_coil_tensor = np.column_stack((frequency_vector, psd_r_coil_values))
+        TF_ASIC_Stage_1 = dependencies['TF_ASIC_Stage_1']["data"][..., 1]
+        closed_loop_denominator = dependencies['RLC_denominator_closed_loop']["data"]
+
+        psd_r_coil_values = self.calculate_psd(temperature, resistance, k, TF_ASIC_Stage_1, closed_loop_denominator)
+        psd_r_coil_values = psd_r_coil_values**2
+        frequency_psd_r_coil_tensor = stack_columns((frequency_vector, psd_r_coil_values))
         results = frequency_psd_r_coil_tensor
 
         return {
@@ -191,34 +197,29 @@ class PSD_R_Coil_V2(CalculationStrategy):
             "units": ["Hz", "V²/Hz"]
         }
 
-    def calculate_psd(self, temperature, resistance, k, f, TF_ASIC_Stage_1_point, inductance, capacitance,
-                      mutual_inductance, feedback_resistance):
-        psd_r_coil_num = (4 * k * temperature * resistance) * TF_ASIC_Stage_1_point ** 2
-        psd_r_coil_den = (
-                (1 - inductance * capacitance * (2 * np.pi * f) ** 2) ** 2
-                + ((resistance * capacitance * 2 * np.pi * f) + (
-                    (TF_ASIC_Stage_1_point * mutual_inductance * 2 * np.pi * f) / feedback_resistance)) ** 2
-        )
-
-        result = (psd_r_coil_num / psd_r_coil_den) ** 0.5
+    @kernel
+    def calculate_psd(temperature, resistance, k, TF_ASIC_Stage_1_point, closed_loop_denominator):
+        psd_r_coil_num = (4 * k * temperature * resistance) * TF_ASIC_Stage_1_point**2
+        result = (psd_r_coil_num / closed_loop_denominator)**0.5
         return result
 
     @staticmethod
     def get_dependencies():
-        return ['temperature', "feedback_resistance", "frequency_vector", "TF_ASIC_Stage_1", "inductance",
-                "capacitance", "resistance", "mutual_inductance", "feedback_resistance", "frequency_vector"]
+        return ['temperature', "frequency_vector", "TF_ASIC_Stage_1", "resistance", "RLC_denominator_closed_loop"]
+
+    @staticmethod
+    def supports_batch():
+        return True
 
 
 class PSD_R_Coil_filtered_V2(CalculationStrategy):
 
     def calculate(self, dependencies: dict, parameters: InputParameters):
-        PSD_R_Coil_non_filtered = 20 * np.log10(dependencies['PSD_R_Coil']["data"][:, 1])
-        TF_ASIC_Stage_2 = 20 * np.log10(dependencies['TF_ASIC_Stage_2']["data"][:, 1])
+        PSD_R_Coil_non_filtered = dependencies['PSD_R_Coil']["data"][..., 1]
+        TF_ASIC_Stage_2 = dependencies['TF_ASIC_Stage_2']["data"][..., 1]
 
-        result = (PSD_R_Coil_non_filtered + TF_ASIC_Stage_2)
-        result = 10 ** (result / 20)
-        result = result ** 2
-        values = np.column_stack((dependencies['PSD_R_Coil']["data"][:, 0], result))
+        result = apply_stage_gain(PSD_R_Coil_non_filtered, TF_ASIC_Stage_2, power=2)
+        values = stack_columns((dependencies['PSD_R_Coil']["data"][..., 0], result))
 
         return {
             "data": values,
@@ -230,6 +231,10 @@ class PSD_R_Coil_filtered_V2(CalculationStrategy):
     def get_dependencies():
         return ['TF_ASIC_Stage_2', "PSD_R_Coil"]
 
+    @staticmethod
+    def supports_batch():
+        return True
+
 
 class PSD_Flicker(CalculationStrategy):
 
@@ -240,9 +245,8 @@ class PSD_Flicker(CalculationStrategy):
         e_en = parameters.data['e_en']
         frequency_vector = dependencies['frequency_vector']["data"]
 
-        vectorized_psd_flicker = np.vectorize(self.calculate_psd_flicker)
-        psd_flicker_values = vectorized_psd_flicker(Para_A, Para_B, Alpha, e_en, frequency_vector)
-        frequency_psd_flicker_tensor = np.column_stack((frequency_vector, psd_flicker_values))
+        psd_flicker_values = self.calculate_psd_flicker(Para_A, Para_B, Alpha, e_en, frequency_vector)
+        frequency_psd_flicker_tensor = stack_columns((frequency_vector, psd_flicker_values))
         values = frequency_psd_flicker_tensor
 
         return {
@@ -255,9 +259,14 @@ class PSD_Flicker(CalculationStrategy):
     def get_dependencies():
         return ['frequency_vector', "Para_A", "Para_B", "Alpha", "e_en"]
 
-    def calculate_psd_flicker(self, Para_A, Para_B, Alpha, e_en, f):
+    @kernel
+    def calculate_psd_flicker(Para_A, Para_B, Alpha, e_en, f):
         return Para_A * (1 / (Para_B * 10**(9) *  (f ** (Alpha/10)))) + (e_en * 10 ** (-9))
 
+    @staticmethod
+    def supports_batch():
+        return True
+
 class PSD_Flicker_V2(CalculationStrategy):
 
     def calculate(self, dependencies: dict, parameters: InputParameters):
@@ -267,10 +276,9 @@ class PSD_Flicker_V2(CalculationStrategy):
         e_en = parameters.data['e_en']
         frequency_vector = dependencies['frequency_vector']["data"]
 
-        vectorized_psd_flicker = np.vectorize(self.calculate_psd_flicker)
-        psd_flicker_values = vectorized_psd_flicker(Para_A, Para_B, Alpha, e_en, frequency_vector)
+        psd_flicker_values = self.calculate_psd_flicker(Para_A, Para_B, Alpha, e_en, frequency_vector)
         psd_flicker_values = psd_flicker_values**2
-        frequency_psd_flicker_tensor = np.column_stack((frequency_vector, psd_flicker_values))
+        frequency_psd_flicker_tensor = stack_columns((frequency_vector, psd_flicker_values))
         values = frequency_psd_flicker_tensor
 
         return {
@@ -283,27 +291,26 @@ class PSD_Flicker_V2(CalculationStrategy):
     def get_dependencies():
         return ['frequency_vector', "Para_A", "Para_B", "Alpha", "e_en"]
 
-    def calculate_psd_flicker(self, Para_A, Para_B, Alpha, e_en, f):
+    @kernel
+    def calculate_psd_flicker(Para_A, Para_B, Alpha, e_en, f):
         return Para_A * (1 / (Para_B * 10**(9) *  (f ** (Alpha/10)))) + (e_en * 10 ** (-9))
 
+    @staticmethod
+    def supports_batch():
+        return True
+
 
 class PSD_e_en(CalculationStrategy):
 
     def calculate(self, dependencies: dict, parameters: InputParameters):
-        PSD_Flicker = dependencies['PSD_Flicker']["data"][:,1]
-        TF_ASIC_Stage_1 = dependencies['TF_ASIC_Stage_1']["data"][:,1]
-
-        inductance = dependencies['inductance']["data"]
-        capacitance = dependencies['capacitance']["data"]
+        PSD_Flicker = dependencies['PSD_Flicker']["data"][..., 1]
+        TF_ASIC_Stage_1 = dependencies['TF_ASIC_Stage_1']["data"][..., 1]
         frequency_vector = dependencies['frequency_vector']["data"]
-        resistance = dependencies['resistance']["data"]
+        open_loop_denominator = dependencies['RLC_denominator_open_loop']["data"]
+        closed_loop_denominator = dependencies['RLC_denominator_closed_loop']["data"]
 
-        feedback_resistance = parameters.data['feedback_resistance']
-        mutual_inductance = parameters.data['mutual_inductance']
-
-        vectorized_psd_e_en = np.vectorize(self.calculate_psd_e_en)
-        psd_e_en_values = vectorized_psd_e_en(PSD_Flicker, TF_ASIC_Stage_1, inductance, capacitance, frequency_vector, resistance, feedback_resistance, mutual_inductance)
-        frequency_psd_e_en_tensor = np.column_stack((frequency_vector, psd_e_en_values))
+        psd_e_en_values = self.calculate_psd_e_en(PSD_Flicker, TF_ASIC_Stage_1, open_loop_denominator, closed_loop_denominator)
+        frequency_psd_e_en_tensor = stack_columns((frequency_vector, psd_e_en_values))
         values = frequency_psd_e_en_tensor
 
         return {
@@ -312,34 +319,27 @@ class PSD_e_en(CalculationStrategy):
             "units": ["Hz", "V/sqrt(Hz)"]
         }
 
-    def calculate_psd_e_en(self, PSD_Flicker_point, TF_ASIC_Stage_1_point, L, C, f, R, feedback_resistance, mutual_inductance):
-        PSD_e_en_Num = (
-                (PSD_Flicker_point ** 2 * TF_ASIC_Stage_1_point ** 2)
-                * ((1 - L * C * (2 * np.pi * f) ** 2) ** 2 + (
-                    R * C * 2 * np.pi * f) ** 2)
-        )
-
-        PSD_e_en_Den = (
-                (1 - L * C * (2 * np.pi * f) ** 2) ** 2
-                + ((R * C * 2 * np.pi * f) + (
-                    (TF_ASIC_Stage_1_point * mutual_inductance * 2 * np.pi * f) / feedback_resistance)) ** 2
-        )
-
-        return (PSD_e_en_Num / PSD_e_en_Den) ** 0.5
+    @kernel
+    def calculate_psd_e_en(PSD_Flicker_point, TF_ASIC_Stage_1_point, open_loop_denominator, closed_loop_denominator):
+        PSD_e_en_Num = (PSD_Flicker_point ** 2 * TF_ASIC_Stage_1_point ** 2) * open_loop_denominator
+        return (PSD_e_en_Num / closed_loop_denominator) ** 0.5
 
     @staticmethod
     def get_dependencies():
-        return ['PSD_Flicker', 'TF_ASIC_Stage_1', 'inductance', 'capacitance', 'frequency_vector', 'resistance', 'feedback_resistance', 'mutual_inductance']
+        return ['PSD_Flicker', 'TF_ASIC_Stage_1', 'frequency_vector', 'RLC_denominator_open_loop', 'RLC_denominator_closed_loop']
+
+    @staticmethod
+    def supports_batch():
+        return True
 
 class PSD_e_en_filtered(CalculationStrategy):
 
         def calculate(self, dependencies: dict, parameters: InputParameters):
-            PSD_e_en = 20*np.log10(dependencies['PSD_e_en']["data"][:,1])
-            TF_ASIC_Stage_2 = 20*np.log10(dependencies['TF_ASIC_Stage_2']["data"][:,1])
+            PSD_e_en = dependencies['PSD_e_en']["data"][..., 1]
+            TF_ASIC_Stage_2 = dependencies['TF_ASIC_Stage_2']["data"][..., 1]
 
-            result = (PSD_e_en + TF_ASIC_Stage_2)
-            result = 10**(result/20)
-            values = np.column_stack((dependencies['PSD_e_en']["data"][:,0], result))
+            result = apply_stage_gain(PSD_e_en, TF_ASIC_Stage_2)
+            values = stack_columns((dependencies['PSD_e_en']["data"][..., 0], result))
 
             return {
                 "data": values,
@@ -351,25 +351,23 @@ class PSD_e_en_filtered(CalculationStrategy):
         def get_dependencies():
             return ['TF_ASIC_Stage_2', "PSD_e_en"]
 
+        @staticmethod
+        def supports_batch():
+            return True
+
 
 class PSD_e_en_V2(CalculationStrategy):
 
     def calculate(self, dependencies: dict, parameters: InputParameters):
-        PSD_Flicker = dependencies['PSD_Flicker']["data"][:,1]
-        TF_ASIC_Stage_1 = dependencies['TF_ASIC_Stage_1']["data"][:,1]
-
-        inductance = dependencies['inductance']["data"]
-        capacitance = dependencies['capacitance']["data"]
+        PSD_Flicker = dependencies['PSD_Flicker']["data"][..., 1]
+        TF_ASIC_Stage_1 = dependencies['TF_ASIC_Stage_1']["data"][..., 1]
         frequency_vector = dependencies['frequency_vector']["data"]
-        resistance = dependencies['resistance']["data"]
+        open_loop_denominator = dependencies['RLC_denominator_open_loop']["data"]
+        closed_loop_denominator = dependencies['RLC_denominator_closed_loop']["data"]
 
-        feedback_resistance = parameters.data['feedback_resistance']
-        mutual_inductance = parameters.data['mutual_inductance']
-
-        vectorized_psd_e_en = np.vectorize(self.calculate_psd_e_en)
-        psd_e_en_values = vectorized_psd_e_en(PSD_Flicker, TF_ASIC_Stage_1, inductance, capacitance, frequency_vector, resistance, feedback_resistance, mutual_inductance)
+        psd_e_en_values = self.calculate_psd_e_en(PSD_Flicker, TF_ASIC_Stage_1, open_loop_denominator, closed_loop_denominator)
         psd_e_en_values = psd_e_en_values**2
-        frequency_psd_e_en_tensor = np.column_stack((frequency_vector, psd_e_en_values))
+        frequency_psd_e_en_tensor = stack_columns((frequency_vector, psd_e_en_values))
         values = frequency_psd_e_en_tensor
 
         return {
@@ -378,35 +376,27 @@ class PSD_e_en_V2(CalculationStrategy):
             "units": ["Hz", "V²/Hz"]
         }
 
-    def calculate_psd_e_en(self, PSD_Flicker_point, TF_ASIC_Stage_1_point, L, C, f, R, feedback_resistance, mutual_inductance):
-        PSD_e_en_Num = (
-                (PSD_Flicker_point ** 2 * TF_ASIC_Stage_1_point ** 2)
-                * ((1 - L * C * (2 * np.pi * f) ** 2) ** 2 + (
-                    R * C * 2 * np.pi * f) ** 2)
-        )
-
-        PSD_e_en_Den = (
-                (1 - L * C * (2 * np.pi * f) ** 2) ** 2
-                + ((R * C * 2 * np.pi * f) + (
-                    (TF_ASIC_Stage_1_point * mutual_inductance * 2 * np.pi * f) / feedback_resistance)) ** 2
-        )
-
-        return (PSD_e_en_Num / PSD_e_en_Den) ** 0.5
+    @kernel
+    def calculate_psd_e_en(PSD_Flicker_point, TF_ASIC_Stage_1_point, open_loop_denominator, closed_loop_denominator):
+        PSD_e_en_Num = (PSD_Flicker_point ** 2 * TF_ASIC_Stage_1_point ** 2) * open_loop_denominator
+        return (PSD_e_en_Num / closed_loop_denominator) ** 0.5
 
     @staticmethod
     def get_dependencies():
-        return ['PSD_Flicker', 'TF_ASIC_Stage_1', 'inductance', 'capacitance', 'frequency_vector', 'resistance', 'feedback_resistance', 'mutual_inductance']
+        return ['PSD_Flicker', 'TF_ASIC_Stage_1', 'frequency_vector', 'RLC_denominator_open_loop', 'RLC_denominator_closed_loop']
+
+    @staticmethod
+    def supports_batch():
+        return True
 
 class PSD_e_en_filtered_V2(CalculationStrategy):
 
         def calculate(self, dependencies: dict, parameters: InputParameters):
-            PSD_e_en = 20*np.log10(dependencies['PSD_e_en']["data"][:,1])
-            TF_ASIC_Stage_2 = 20*np.log10(dependencies['TF_ASIC_Stage_2']["data"][:,1])
+            PSD_e_en = dependencies['PSD_e_en']["data"][..., 1]
+            TF_ASIC_Stage_2 = dependencies['TF_ASIC_Stage_2']["data"][..., 1]
 
-            result = (PSD_e_en + TF_ASIC_Stage_2)
-            result = 10**(result/20)
-            result = result**2
-            values = np.column_stack((dependencies['PSD_e_en']["data"][:,0], result))
+            result = apply_stage_gain(PSD_e_en, TF_ASIC_Stage_2, power=2)
+            values = stack_columns((dependencies['PSD_e_en']["data"][..., 0], result))
 
             return {
                 "data": values,
@@ -418,26 +408,26 @@ class PSD_e_en_filtered_V2(CalculationStrategy):
         def get_dependencies():
             return ['TF_ASIC_Stage_2', "PSD_e_en"]
 
+        @staticmethod
+        def supports_batch():
+            return True
+
 
 
 
 class PSD_e_in(CalculationStrategy):
+
     def calculate(self, dependencies: dict, parameters: InputParameters):
         e_in = parameters.data['e_in']
-        feedback_resistance = parameters.data['feedback_resistance']
-        mutual_inductance = parameters.data['mutual_inductance']
 
-        impedance = dependencies['impedance']["data"][:,1]
+        impedance = dependencies['impedance']["data"][..., 1]
         frequency_vector = dependencies['frequency_vector']["data"]
-        TF_ASIC_Stage_1 = dependencies['TF_ASIC_Stage_1']["data"][:,1]
-        capacitance = dependencies['capacitance']["data"]
-        resistance = dependencies['resistance']["data"]
-        inductance = dependencies['inductance']["data"]
+        TF_ASIC_Stage_1 = dependencies['TF_ASIC_Stage_1']["data"][..., 1]
+        open_loop_denominator = dependencies['RLC_denominator_open_loop']["data"]
+        closed_loop_denominator = dependencies['RLC_denominator_closed_loop']["data"]
 
-
-        vectorized_psd_e_in = np.vectorize(self.calculate_psd_e_in)
-        psd_e_in_values = vectorized_psd_e_in(impedance, e_in, frequency_vector, TF_ASIC_Stage_1, inductance, capacitance, resistance, feedback_resistance, mutual_inductance)
-        frequency_psd_e_in_tensor = np.column_stack((frequency_vector, psd_e_in_values))
+        psd_e_in_values = self.calculate_psd_e_in(impedance, e_in, TF_ASIC_Stage_1, open_loop_denominator, closed_loop_denominator)
+        frequency_psd_e_in_tensor = stack_columns((frequency_vector, psd_e_in_values))
         values = frequency_psd_e_in_tensor
 
         return {
@@ -446,33 +436,27 @@ class PSD_e_in(CalculationStrategy):
             "units": ["Hz", "V/sqrt(Hz)"]
         }
 
-    def calculate_psd_e_in(self, impedance_point, e_in, f, TF_ASIC_Stage_1_point, L, C, R, feedback_resistance, mutual_inductance):
-        PSD_e_in_Num = impedance_point ** 2 * (e_in * 1e-15) ** 2 * TF_ASIC_Stage_1_point ** 2 * (
-                (1 - L * C * (2 * np.pi * f) ** 2) ** 2 + (
-                    R * C * 2 * np.pi * f) ** 2
-        )
-
-        PSD_e_in_Den = (
-                (1 - L * C * (2 * np.pi * f) ** 2) ** 2
-                + ((R * C * 2 * np.pi * f) + (
-                    (TF_ASIC_Stage_1_point * mutual_inductance * 2 * np.pi * f) / feedback_resistance)) ** 2
-        )
-
-        return (PSD_e_in_Num / PSD_e_in_Den) ** 0.5
+    @kernel
+    def calculate_psd_e_in(impedance_point, e_in, TF_ASIC_Stage_1_point, open_loop_denominator, closed_loop_denominator):
+        PSD_e_in_Num = impedance_point ** 2 * (e_in * 1e-15) ** 2 * TF_ASIC_Stage_1_point ** 2 * open_loop_denominator
+        return (PSD_e_in_Num / closed_loop_denominator) ** 0.5
 
     @staticmethod
     def get_dependencies():
-        return ['impedance', 'e_in', 'frequency_vector', 'TF_ASIC_Stage_1', 'inductance', 'capacitance', 'resistance', 'feedback_resistance', 'mutual_inductance']
+        return ['impedance', 'e_in', 'frequency_vector', 'TF_ASIC_Stage_1', 'RLC_denominator_open_loop', 'RLC_denominator_closed_loop']
+
+    @staticmethod
+    def supports_batch():
+        return True
 
 class PSD_e_in_filtered(CalculationStrategy):
 
         def calculate(self, dependencies: dict, parameters: InputParameters):
-            PSD_e_in = 20*np.log10(dependencies['PSD_e_in']["data"][:,1])
-            TF_ASIC_Stage_2 = 20*np.log10(dependencies['TF_ASIC_Stage_2']["data"][:,1])
+            PSD_e_in = dependencies['PSD_e_in']["data"][..., 1]
+            TF_ASIC_Stage_2 = dependencies['TF_ASIC_Stage_2']["data"][..., 1]
 
-            result = (PSD_e_in + TF_ASIC_Stage_2)
-            result = 10**(result/20)
-            values = np.column_stack((dependencies['PSD_e_in']["data"][:,0], result))
+            result = apply_stage_gain(PSD_e_in, TF_ASIC_Stage_2)
+            values = stack_columns((dependencies['PSD_e_in']["data"][..., 0], result))
 
             return {
                 "data": values,
@@ -485,24 +469,24 @@ class PSD_e_in_filtered(CalculationStrategy):
         def get_dependencies():
             return ['TF_ASIC_Stage_2', "PSD_e_in"]
 
+        @staticmethod
+        def supports_batch():
+            return True
+
 class PSD_e_in_V2(CalculationStrategy):
+
     def calculate(self, dependencies: dict, parameters: InputParameters):
         e_in = parameters.data['e_in']
-        feedback_resistance = parameters.data['feedback_resistance']
-        mutual_inductance = parameters.data['mutual_inductance']
 
-        impedance = dependencies['impedance']["data"][:,1]
+        impedance = dependencies['impedance']["data"][..., 1]
         frequency_vector = dependencies['frequency_vector']["data"]
-        TF_ASIC_Stage_1 = dependencies['TF_ASIC_Stage_1']["data"][:,1]
-        capacitance = dependencies['capacitance']["data"]
-        resistance = dependencies['resistance']["data"]
-        inductance = dependencies['inductance']["data"]
-
+        TF_ASIC_Stage_1 = dependencies['TF_ASIC_Stage_1']["data"][..., 1]
+        open_loop_denominator = dependencies['RLC_denominator_open_loop']["data"]
+        closed_loop_denominator = dependencies['RLC_denominator_closed_loop']["data"]
 
-        vectorized_psd_e_in = np.vectorize(self.calculate_psd_e_in)
-        psd_e_in_values = vectorized_psd_e_in(impedance, e_in, frequency_vector, TF_ASIC_Stage_1, inductance, capacitance, resistance, feedback_resistance, mutual_inductance)
+        psd_e_in_values = self.calculate_psd_e_in(impedance, e_in, TF_ASIC_Stage_1, open_loop_denominator, closed_loop_denominator)
         psd_e_in_values = psd_e_in_values**2
-        frequency_psd_e_in_tensor = np.column_stack((frequency_vector, psd_e_in_values))
+        frequency_psd_e_in_tensor = stack_columns((frequency_vector, psd_e_in_values))
         values = frequency_psd_e_in_tensor
 
         return {
@@ -511,34 +495,27 @@ class PSD_e_in_V2(CalculationStrategy):
             "units": ["Hz", "V²/Hz"]
         }
 
-    def calculate_psd_e_in(self, impedance_point, e_in, f, TF_ASIC_Stage_1_point, L, C, R, feedback_resistance, mutual_inductance):
-        PSD_e_in_Num = impedance_point ** 2 * (e_in * 1e-15) ** 2 * TF_ASIC_Stage_1_point ** 2 * (
-                (1 - L * C * (2 * np.pi * f) ** 2) ** 2 + (
-                    R * C * 2 * np.pi * f) ** 2
-        )
-
-        PSD_e_in_Den = (
-                (1 - L * C * (2 * np.pi * f) ** 2) ** 2
-                + ((R * C * 2 * np.pi * f) + (
-                    (TF_ASIC_Stage_1_point * mutual_inductance * 2 * np.pi * f) / feedback_resistance)) ** 2
-        )
-
-        return (PSD_e_in_Num / PSD_e_in_Den) ** 0.5
+    @kernel
+    def calculate_psd_e_in(impedance_point, e_in, TF_ASIC_Stage_1_point, open_loop_denominator, closed_loop_denominator):
+        PSD_e_in_Num = impedance_point ** 2 * (e_in * 1e-15) ** 2 * TF_ASIC_Stage_1_point ** 2 * open_loop_denominator
+        return (PSD_e_in_Num / closed_loop_denominator) ** 0.5
 
     @staticmethod
     def get_dependencies():
-        return ['impedance', 'e_in', 'frequency_vector', 'TF_ASIC_Stage_1', 'inductance', 'capacitance', 'resistance', 'feedback_resistance', 'mutual_inductance']
+        return ['impedance', 'e_in', 'frequency_vector', 'TF_ASIC_Stage_1', 'RLC_denominator_open_loop', 'RLC_denominator_closed_loop']
+
+    @staticmethod
+    def supports_batch():
+        return True
 
 class PSD_e_in_filtered_V2(CalculationStrategy):
 
         def calculate(self, dependencies: dict, parameters: InputParameters):
-            PSD_e_in = 20*np.log10(dependencies['PSD_e_in']["data"][:,1])
-            TF_ASIC_Stage_2 = 20*np.log10(dependencies['TF_ASIC_Stage_2']["data"][:,1])
+            PSD_e_in = dependencies['PSD_e_in']["data"][..., 1]
+            TF_ASIC_Stage_2 = dependencies['TF_ASIC_Stage_2']["data"][..., 1]
 
-            result = (PSD_e_in + TF_ASIC_Stage_2)
-            result = 10**(result/20)
-            result = result**2
-            values = np.column_stack((dependencies['PSD_e_in']["data"][:,0], result))
+            result = apply_stage_gain(PSD_e_in, TF_ASIC_Stage_2, power=2)
+            values = stack_columns((dependencies['PSD_e_in']["data"][..., 0], result))
 
             return {
                 "data": values,
@@ -552,36 +529,29 @@ class PSD_e_in_filtered_V2(CalculationStrategy):
             return ['TF_ASIC_Stage_2', "PSD_e_in"]
 
 
-class PSD_Total(CalculationStrategy):
-    def calculate(self, dependencies: dict, parameters: InputParameters):
-        PSD_e_in = dependencies['PSD_e_in']["data"][:,1]
-        PSD_e_en = dependencies['PSD_e_en']["data"][:,1]
-        PSD_R_Coil = dependencies['PSD_R_Coil']["data"][:,1]
-        PSD_R_cr = dependencies['PSD_R_cr']["data"][:,1]
-        frequency_vector = dependencies['frequency_vector']["data"]
+# Quadratic sum of the noise sources, shared by PSD_Total and PSD_Total_V2
 
-        result = (PSD_e_in**2 + PSD_e_en**2 + PSD_R_Coil**2 + PSD_R_cr**2)**0.5
-        values = np.column_stack((frequency_vector, result))
+        @staticmethod
+        def supports_batch():
+            return True
+PSD_TOTAL = (Symbol('PSD_e_in', 1) ** 2 + Symbol('PSD_e_en', 1) ** 2 + Symbol('PSD_R_Coil', 1) ** 2
+             + Symbol('PSD_R_cr', 1) ** 2) ** 0.5
 
-        return {
-            "data": values,
-            "labels": ["Frequency", "PSD_Total"],
-            "units": ["Hz", "V/sqrt(Hz)"]
-        }
 
-    @staticmethod
-    def get_dependencies():
-        return ['PSD_e_in', 'PSD_e_en', 'PSD_R_Coil', 'PSD_R_cr', 'frequency_vector']
+class PSD_Total(SymbolicStrategy):
+    expressions = [PSD_TOTAL]
+    frequency_column = True
+    labels = ["Frequency", "PSD_Total"]
+    units = ["Hz", "V/sqrt(Hz)"]
 
 class PSD_Total_filtered(CalculationStrategy):
 
     def calculate(self, dependencies: dict, parameters: InputParameters):
-        PSD_Total = 20 * np.log10(dependencies['PSD_Total']["data"][:, 1])
-        TF_ASIC_Stage_2 = 20 * np.log10(dependencies['TF_ASIC_Stage_2']["data"][:, 1])
+        PSD_Total = dependencies['PSD_Total']["data"][..., 1]
+        TF_ASIC_Stage_2 = dependencies['TF_ASIC_Stage_2']["data"][..., 1]
 
-        result = (PSD_Total + TF_ASIC_Stage_2)
-        result = 10 ** (result / 20)
-        values = np.column_stack((dependencies['PSD_Total']["data"][:, 0], result))
+        result = apply_stage_gain(PSD_Total, TF_ASIC_Stage_2)
+        values = stack_columns((dependencies['PSD_Total']["data"][..., 0], result))
 
         return {
             "data": values,
@@ -593,18 +563,22 @@ class PSD_Total_filtered(CalculationStrategy):
     def get_dependencies():
         return ['TF_ASIC_Stage_2', "PSD_Total"]
 
+    @staticmethod
+    def supports_batch():
+        return True
+
 
 class Display_all_PSD(CalculationStrategy):
 
     def calculate(self, dependencies: dict, parameters: InputParameters):
-        PSD_e_in = dependencies['PSD_e_in']["data"][:,1]
-        PSD_e_en = dependencies['PSD_e_en']["data"][:,1]
-        PSD_R_Coil = dependencies['PSD_R_Coil']["data"][:,1]
-        PSD_R_cr = dependencies['PSD_R_cr']["data"][:,1]
-        PSD_Total = dependencies['PSD_Total']["data"][:,1]
+        PSD_e_in = dependencies['PSD_e_in']["data"][..., 1]
+        PSD_e_en = dependencies['PSD_e_en']["data"][..., 1]
+        PSD_R_Coil = dependencies['PSD_R_Coil']["data"][..., 1]
+        PSD_R_cr = dependencies['PSD_R_cr']["data"][..., 1]
+        PSD_Total = dependencies['PSD_Total']["data"][..., 1]
         frequency_vector = dependencies['frequency_vector']["data"]
 
-        values = np.column_stack((frequency_vector, PSD_R_cr, PSD_R_Coil, PSD_e_en, PSD_e_in, PSD_Total))
+        values = stack_columns((frequency_vector, PSD_R_cr, PSD_R_Coil, PSD_e_en, PSD_e_in, PSD_Total))
 
         return {
             "data": values,
@@ -616,17 +590,21 @@ class Display_all_PSD(CalculationStrategy):
     def get_dependencies():
         return ['PSD_e_in', 'PSD_e_en', 'PSD_R_Coil', 'PSD_R_cr', 'frequency_vector', "PSD_Total"]
 
+    @staticmethod
+    def supports_batch():
+        return True
+
 class Display_all_PSD_filtered(CalculationStrategy):
 
     def calculate(self, dependencies: dict, parameters: InputParameters):
-        PSD_e_in_filtered = dependencies['PSD_e_in_filtered']["data"][:,1]
-        PSD_e_en_filtered = dependencies['PSD_e_en_filtered']["data"][:,1]
-        PSD_R_Coil_filtered = dependencies['PSD_R_Coil_filtered']["data"][:,1]
-        PSD_R_cr_filtered = dependencies['PSD_R_cr_filtered']["data"][:,1]
-        PSD_Total_filtered = dependencies['PSD_Total_filtered']["data"][:,1]
+        PSD_e_in_filtered = dependencies['PSD_e_in_filtered']["data"][..., 1]
+        PSD_e_en_filtered = dependencies['PSD_e_en_filtered']["data"][..., 1]
+        PSD_R_Coil_filtered = dependencies['PSD_R_Coil_filtered']["data"][..., 1]
+        PSD_R_cr_filtered = dependencies['PSD_R_cr_filtered']["data"][..., 1]
+        PSD_Total_filtered = dependencies['PSD_Total_filtered']["data"][..., 1]
         frequency_vector = dependencies['frequency_vector']["data"]
 
-        values = np.column_stack((frequency_vector, PSD_R_cr_filtered, PSD_R_Coil_filtered, PSD_e_en_filtered, PSD_e_in_filtered, PSD_Total_filtered))
+        values = stack_columns((frequency_vector, PSD_R_cr_filtered, PSD_R_Coil_filtered, PSD_e_en_filtered, PSD_e_in_filtered, PSD_Total_filtered))
 
         return {
             "data": values,
@@ -638,38 +616,24 @@ class Display_all_PSD_filtered(CalculationStrategy):
     def get_dependencies():
         return ['PSD_e_in_filtered', 'PSD_e_en_filtered', 'PSD_R_Coil_filtered', 'PSD_R_cr_filtered', 'frequency_vector', "PSD_Total_filtered"]
 
-class PSD_Total_V2(CalculationStrategy):
-    def calculate(self, dependencies: dict, parameters: InputParameters):
-        PSD_e_in = dependencies['PSD_e_in']["data"][:,1]
-        PSD_e_en = dependencies['PSD_e_en']["data"][:,1]
-        PSD_R_Coil = dependencies['PSD_R_Coil']["data"][:,1]
-        PSD_R_cr = dependencies['PSD_R_cr']["data"][:,1]
-        frequency_vector = dependencies['frequency_vector']["data"]
-
-        result = (PSD_e_in**2 + PSD_e_en**2 + PSD_R_Coil**2 + PSD_R_cr**2)**0.5
-        result = result**2
-        values = np.column_stack((frequency_vector, result))
-
-        return {
-            "data": values,
-            "labels": ["Frequency", "PSD_Total"],
-            "units": ["Hz", "V²/Hz"]
-        }
-
     @staticmethod
-    def get_dependencies():
-        return ['PSD_e_in', 'PSD_e_en', 'PSD_R_Coil', 'PSD_R_cr', 'frequency_vector']
+    def supports_batch():
+        return True
+
+class PSD_Total_V2(SymbolicStrategy):
+    expressions = [PSD_TOTAL ** 2]
+    frequency_column = True
+    labels = ["Frequency", "PSD_Total"]
+    units = ["Hz", "V²/Hz"]
 
 class PSD_Total_filtered_V2(CalculationStrategy):
 
     def calculate(self, dependencies: dict, parameters: InputParameters):
-        PSD_Total = 20 * np.log10(dependencies['PSD_Total']["data"][:, 1])
-        TF_ASIC_Stage_2 = 20 * np.log10(dependencies['TF_ASIC_Stage_2']["data"][:, 1])
+        PSD_Total = dependencies['PSD_Total']["data"][..., 1]
+        TF_ASIC_Stage_2 = dependencies['TF_ASIC_Stage_2']["data"][..., 1]
 
-        result = (PSD_Total + TF_ASIC_Stage_2)
-        result = 10 ** (result / 20)
-        result = result ** 2
-        values = np.column_stack((dependencies['PSD_Total']["data"][:, 0], result))
+        result = apply_stage_gain(PSD_Total, TF_ASIC_Stage_2, power=2)
+        values = stack_columns((dependencies['PSD_Total']["data"][..., 0], result))
 
         return {
             "data": values,
@@ -681,21 +645,20 @@ class PSD_Total_filtered_V2(CalculationStrategy):
     def get_dependencies():
         return ['TF_ASIC_Stage_2', "PSD_Total"]
 
+    @staticmethod
+    def supports_batch():
+        return True
+
 class NEMI(CalculationStrategy):
 
     def calculate(self, dependencies: dict, parameters: InputParameters):
-        PSD_Total = dependencies['PSD_Total']["data"][:,1]
-        CLTF_Non_filtered = dependencies['CLTF_Non_filtered']["data"][:,1]
+        PSD_Total = dependencies['PSD_Total']["data"][..., 1]
+        CLTF_Non_filtered = dependencies['CLTF_Non_filtered']["data"][..., 1]
         frequency_vector = dependencies['frequency_vector']["data"]
 
-        PSD_Total = 20*np.log10(PSD_Total)
-        CLTF_Non_filtered = 20*np.log10(CLTF_Non_filtered)
-
-        result = (PSD_Total - CLTF_Non_filtered)
-
-        result = 10**(result/20)
+        result = remove_stage_gain(PSD_Total, CLTF_Non_filtered)
 
-        values = np.column_stack((frequency_vector, result))
+        values = stack_columns((frequency_vector, result))
 
         return {
             "data": values,
@@ -707,22 +670,21 @@ class NEMI(CalculationStrategy):
     def get_dependencies():
         return ['PSD_Total', 'CLTF_Non_filtered', 'frequency_vector']
 
+    @staticmethod
+    def supports_batch():
+        return True
+
 
 class NEMI_FIltered(CalculationStrategy):
 
     def calculate(self, dependencies: dict, parameters: InputParameters):
-        PSD_Total_filtered = dependencies['PSD_Total_filtered']["data"][:,1]
-        CLTF_Filtered = dependencies['CLTF_Filtered']["data"][:,1]
+        PSD_Total_filtered = dependencies['PSD_Total_filtered']["data"][..., 1]
+        CLTF_Filtered = dependencies['CLTF_Filtered']["data"][..., 1]
         frequency_vector = dependencies['frequency_vector']["data"]
 
-        PSD_Total_filtered = 20*np.log10(PSD_Total_filtered)
-        CLTF_Filtered = 20*np.log10(CLTF_Filtered)
-
-        result = (PSD_Total_filtered - CLTF_Filtered)
-
-        result = 10**(result/20)
+        result = remove_stage_gain(PSD_Total_filtered, CLTF_Filtered)
 
-        values = np.column_stack((frequency_vector, result))
+        values = stack_columns((frequency_vector, result))
 
         return {
             "data": values,
@@ -734,22 +696,21 @@ class NEMI_FIltered(CalculationStrategy):
     def get_dependencies():
         return ['PSD_Total_filtered', 'CLTF_Filtered', 'frequency_vector']
 
+    @staticmethod
+    def supports_batch():
+        return True
+
 
 class NEMI_FIlteredv2(CalculationStrategy):
 
     def calculate(self, dependencies: dict, parameters: InputParameters):
-        PSD_Total_filtered = dependencies['PSD_Total_filtered']["data"][:,1]
-        CLTF_Filtered = dependencies['CLTF_Filtered']["data"][:,1]
+        PSD_Total_filtered = dependencies['PSD_Total_filtered']["data"][..., 1]
+        CLTF_Filtered = dependencies['CLTF_Filtered']["data"][..., 1]
         frequency_vector = dependencies['frequency_vector']["data"]
 
-        PSD_Total_filtered = 20*np.log10(PSD_Total_filtered)
-        CLTF_Filtered = 20*np.log10(CLTF_Filtered)
-
-        result = (PSD_Total_filtered - CLTF_Filtered)
+        result = remove_stage_gain(PSD_Total_filtered, CLTF_Filtered, power=0.1)
 
-        result = 10**(result/200)
-
-        values = np.column_stack((frequency_vector, result))
+        values = stack_columns((frequency_vector, result))
 
         return {
             "data": values,
@@ -761,21 +722,20 @@ class NEMI_FIlteredv2(CalculationStrategy):
     def get_dependencies():
         return ['PSD_Total_filtered', 'CLTF_Filtered', 'frequency_vector']
 
+    @staticmethod
+    def supports_batch():
+        return True
+
 class NEMI_FIlteredv3(CalculationStrategy):
 
     def calculate(self, dependencies: dict, parameters: InputParameters):
-        PSD_Total_filtered = dependencies['PSD_Total_filtered']["data"][:,1]
-        CLTF_Filtered = dependencies['CLTF_Filtered']["data"][:,1]
+        PSD_Total_filtered = dependencies['PSD_Total_filtered']["data"][..., 1]
+        CLTF_Filtered = dependencies['CLTF_Filtered']["data"][..., 1]
         frequency_vector = dependencies['frequency_vector']["data"]
 
-        PSD_Total_filtered = 20*np.log10(PSD_Total_filtered)
-        CLTF_Filtered = 20*np.log10(CLTF_Filtered)
-
-        result = (PSD_Total_filtered - CLTF_Filtered)
+        result = remove_stage_gain(PSD_Total_filtered, CLTF_Filtered, power=2)
 
-        result = 100**(result/20)
-
-        values = np.column_stack((frequency_vector, result))
+        values = stack_columns((frequency_vector, result))
 
         return {
             "data": values,
@@ -786,3 +746,7 @@ class NEMI_FIlteredv3(CalculationStrategy):
     @staticmethod
     def get_dependencies():
         return ['PSD_Total_filtered', 'CLTF_Filtered', 'frequency_vector']
+
+    @staticmethod
+    def supports_batch():
+        return True
@@ -19,4 +19,8 @@ class AnalyticalNzStrategy(CalculationStrategy):
 
     @staticmethod
     def get_dependencies():
-        return ['diam_core', 'len_core']
\ No newline at end of file
+        return ['diam_core', 'len_core']
+
+    @staticmethod
+    def supports_batch():
+        return True
\ No newline at end of file
@@ -1,6 +1,6 @@
 import numpy as np
 from src.model.input_parameters import InputParameters
-from src.model.strategies import CalculationStrategy
+from src.model.strategies import CalculationStrategy, stack_columns, apply_stage_gain
 from scipy.constants import mu_0
 
 
@@ -13,15 +13,13 @@ class OLTF_Strategy_Non_Filtered(CalculationStrategy):
 
         mu_app = dependencies['mu_app']['data']
         frequency_vector = dependencies['frequency_vector']['data']
-        linear_TF_ASIC_Stage_1 = dependencies['TF_ASIC_Stage_1']['data'][:,1]
-        inductance = dependencies['inductance']['data']
-        capacitance = dependencies['capacitance']['data']
-        resistance = dependencies['resistance']['data']
+        linear_TF_ASIC_Stage_1 = dependencies['TF_ASIC_Stage_1']['data'][..., 1]
+        omega = dependencies['omega']['data']
+        open_loop_denominator = dependencies['RLC_denominator_open_loop']['data']
 
-        vectorized_oltf = np.vectorize(self.calculate_oltf)
-        oltf_values = vectorized_oltf(nb_spire, ray_spire, mu_app, frequency_vector, linear_TF_ASIC_Stage_1, inductance, capacitance, resistance)
+        oltf_values = self.calculate_oltf(nb_spire, ray_spire, mu_app, omega, linear_TF_ASIC_Stage_1, open_loop_denominator)
 
-        frequency_oltf_tensor = np.column_stack((frequency_vector, oltf_values))
+        frequency_oltf_tensor = stack_columns((frequency_vector, oltf_values))
         value =  frequency_oltf_tensor
 
         return {
@@ -34,31 +32,33 @@ class OLTF_Strategy_Non_Filtered(CalculationStrategy):
                        nb_spire,
                        ray_spire,
                        mu_app,
-                       f,
-                       TF_ASIC_Stage_1_point, L, C, R):
+                       omega,
+                       TF_ASIC_Stage_1_point, open_loop_denominator):
 
-        result = (nb_spire * (np.pi * (ray_spire)**2) * mu_app * 4 * np.pi * 10**-7 * TF_ASIC_Stage_1_point * (2* np.pi * f)) / ((1- L * C * (2*np.pi*f)**2)**2 + ((R * C * (2*np.pi*f))**2))**0.5
+        result = (nb_spire * (np.pi * (ray_spire)**2) * mu_app * 4 * np.pi * 10**-7 * TF_ASIC_Stage_1_point * omega) / open_loop_denominator**0.5
         return result
 
 
 
     @staticmethod
     def get_dependencies():
-        return ['nb_spire', 'ray_spire', 'mu_app', 'frequency_vector', 'TF_ASIC_Stage_1', 'inductance', 'capacitance', 'resistance']
+        return ['nb_spire', 'ray_spire', 'mu_app', 'frequency_vector', 'TF_ASIC_Stage_1', 'omega', 'RLC_denominator_open_loop']
+
+    @staticmethod
+    def supports_batch():
+        return True
 
 
 
 class OLTF_Strategy_Filtered(CalculationStrategy):
 
     def calculate(self, dependencies: dict, parameters: InputParameters):
-        OLTF_Non_filtered = 20*np.log10(dependencies['OLTF_Non_filtered']['data'][:,1]) # linear
-        TF_ASIC_Stage_2 = 20*np.log10(dependencies['TF_ASIC_Stage_2']['data'][:,1]) # linear
-
-        result = (OLTF_Non_filtered + TF_ASIC_Stage_2)
+        OLTF_Non_filtered = dependencies['OLTF_Non_filtered']['data'][..., 1] # linear
+        TF_ASIC_Stage_2 = dependencies['TF_ASIC_Stage_2']['data'][..., 1] # linear
 
-        result = 10**(result/20)
+        result = apply_stage_gain(OLTF_Non_filtered, TF_ASIC_Stage_2)
 
-        result = np.column_stack((dependencies['OLTF_Non_filtered']['data'][:,0], result))
+        result = stack_columns((dependencies['OLTF_Non_filtered']['data'][..., 0], result))
 
         return {
             "data": result,
@@ -70,3 +70,7 @@ class OLTF_Strategy_Filtered(CalculationStrategy):
     def get_dependencies():
         return ['OLTF_Non_filtered', 'TF_ASIC_Stage_2']
 
+    @staticmethod
+    def supports_batch():
+        return True
+
@@ -0,0 +1,65 @@
+import numpy as np
+from src.model.strategies import SymbolicStrategy, Symbol
+
+frequency_vector = Symbol('frequency_vector')
+omega = Symbol('omega')
+omega_squared = Symbol('omega_squared')
+R = Symbol('resistance')
+L = Symbol('inductance')
+C = Symbol('capacitance')
+TF_ASIC_Stage_1 = Symbol('TF_ASIC_Stage_1', 1)
+mutual_inductance = Symbol('mutual_inductance')
+feedback_resistance = Symbol('feedback_resistance')
+
+# Terms shared by the open and closed loop denominators, evaluated once per run
+RESONANCE_TERM = (1 - L * C * omega_squared) ** 2
+DAMPING_TERM = R * C * omega
+
+OPEN_LOOP_DENOMINATOR = RESONANCE_TERM + DAMPING_TERM ** 2
+CLOSED_LOOP_DENOMINATOR = RESONANCE_TERM \
+    + (DAMPING_TERM + (TF_ASIC_Stage_1 * mutual_inductance * omega) / feedback_resistance) ** 2
+
+
+class OmegaStrategy(SymbolicStrategy):
+    """
+    Angular frequency of the frequency vector, w = 2*pi*f.
+    Shared by the transfer function and noise strategies.
+    """
+
+    expressions = [2 * np.pi * frequency_vector]
+    labels = ["Omega"]
+    units = ["rad/s"]
+
+
+class OmegaSquaredStrategy(SymbolicStrategy):
+    """
+    Square of the angular frequency, w^2.
+    """
+
+    expressions = [omega ** 2]
+    labels = ["Omega squared"]
+    units = ["rad²/s²"]
+
+
+class RLC_Denominator_Open_Loop(SymbolicStrategy):
+    """
+    Squared modulus of the RLC resonance term of the coil, without feedback:
+    (1 - L*C*w^2)^2 + (R*C*w)^2
+    Denominator of the impedance and of the open loop transfer function.
+    """
+
+    expressions = [OPEN_LOOP_DENOMINATOR]
+    labels = ["RLC denominator (open loop)"]
+    units = [""]
+
+
+class RLC_Denominator_Closed_Loop(SymbolicStrategy):
+    """
+    Squared modulus of the RLC resonance term of the coil, with the flux feedback:
+    (1 - L*C*w^2)^2 + (R*C*w + TF_ASIC_Stage_1*M*w/R_feedback)^2
+    Denominator of the closed loop transfer function and of the noise densities.
+    """
+
+    expressions = [CLOSED_LOOP_DENOMINATOR]
+    labels = ["RLC denominator (closed loop)"]
+    units = [""]
@@ -9,128 +9,215 @@ from PySpice.Spice.Netlist import Circuit, SubCircuit
 from PySpice.Unit import *
 from matplotlib import pyplot as plt
 
+from src.model.batch import split_rows
+from src.model.strategies import resample_loglog, stack_columns
+from src.model.strategies.strategy_lib.spice_session import SpiceCircuitTemplate, ac_command, aligned_sweep, \
+    noise_command, simulate, simulate_batch, transient_command
 
-class SPICE_test(CalculationStrategy):
-    def calculate(self, dependencies: dict, parameters: InputParameters):
-        temperature = parameters.data['temperature']
-        f_start = parameters.data['f_start']
-        f_stop = parameters.data['f_stop']
-        spice_resistance_test = parameters.data['spice_resistance_test']
+OP_AMP_LIBRARY = 'src/model/strategies/strategy_lib/spice_lib/uA741.lib'
 
-        frequency_vector = dependencies['frequency_vector']['data']
-        logger = Logging.setup_logging()
 
-        # convert temperature to degrees Celsius
-        temperature = temperature - 273.15
+def build_test_circuit(values):
+    """
+    RC low-pass filter followed by a diode and its load.
+    """
+    circuit = Circuit('AC analysis Circuit')
 
-        circuit = Circuit('AC analysis Circuit')
+    circuit.model("CustomDiode", 'D', IS=4.352 @ u_nA, RS=0.6459 @ u_Ohm, BV=110 @ u_V, IBV=0.0001 @ u_V, N=1.906)
 
-        circuit.model("CustomDiode", 'D', IS=4.352 @ u_nA, RS=0.6459 @ u_Ohm, BV=110 @ u_V, IBV=0.0001 @ u_V, N=1.906)
+    # circuit.V('input', 'n1', circuit.gnd, 10@u_V) # DC input voltage
+    circuit.SinusoidalVoltageSource("input", 'n1', circuit.gnd, amplitude=1 @ u_V,
+                                    frequency=100 @ u_Hz)  # AC input voltage
+    circuit.R(1, 'n1', 'n2', values['spice_resistance_test'] @ u_Ohm)
+    circuit.C(1, 'n2', circuit.gnd, 1 @ u_uF)
+    circuit.Diode(1, 'n2', 'n3', model='CustomDiode')
+    circuit.R(2, 'n3', circuit.gnd, 1 @ u_kOhm)
+    return circuit
 
-        # circuit.V('input', 'n1', circuit.gnd, 10@u_V) # DC input voltage
-        Vac = circuit.SinusoidalVoltageSource("input", 'n1', circuit.gnd, amplitude=1@ u_V,
-                                              frequency=100@u_Hz)  # AC input voltage
-        R = circuit.R(1, 'n1', 'n2', spice_resistance_test@u_Ohm)
-        C = circuit.C(1, 'n2', circuit.gnd, 1@ u_uF)
-        circuit.Diode(1, 'n2', 'n3', model='CustomDiode')
-        circuit.R(2, 'n3', circuit.gnd, 1 @u_kOhm)
 
-        simulator = circuit.simulator(temperature=temperature, nominal_temperature=25)
+def build_op_amp_gain_circuit(values):
+    """
+    Non-inverting uA741 amplifier.
+    """
+    circuit = Circuit('Op-amp circuits - Example 1 Non-inverting op-amp Amplifier')
+    circuit.include(OP_AMP_LIBRARY)
 
-        analysis = simulator.ac(start_frequency=f_start@ u_Hz, stop_frequency=f_stop@u_Hz, number_of_points=10,
-                                variation='dec')  # 1 to 1MHz, 10 points per decade
+    # Define amplitude and frequency of input sinusoid
+    amp = 0.1 @ u_V
+    freq = 1 @ u_kHz
 
-        gain_node_1 = np.absolute(analysis.n1)
-        gain_node_2 = np.absolute(analysis.n2)
-        gain_node_3 = np.absolute(analysis.n3)
+    circuit.SinusoidalVoltageSource(1, 'input', circuit.gnd, amplitude=amp, frequency=freq)
+    circuit.V(2, '+Vcc', circuit.gnd, 15 @ u_V)
+    circuit.V(3, '-Vcc', circuit.gnd, -15 @ u_V)
 
-        analysis_freq = np.array(analysis.frequency)
+    circuit.X(1, 'uA741', 'input', 'v-', '+Vcc', '-Vcc', 'out')
 
-        interpolated_gain_1 = np.interp(frequency_vector, analysis_freq, gain_node_1)
-        interpolated_gain_2 = np.interp(frequency_vector, analysis_freq, gain_node_2)
-        interpolated_gain_3 = np.interp(frequency_vector, analysis_freq, gain_node_3)
+    circuit.R(1, 'v-', circuit.gnd, values['R1'] @ u_Ω)
+    circuit.R(2, 'v-', 'x', values['R2'] @ u_Ω)
+    circuit.R(3, 'x', 'out', values['R3'] @ u_Ω)
+    circuit.R(4, 'x', circuit.gnd, values['R4'] @ u_Ω)
+    circuit.R('L', 'out', circuit.gnd, values['R5'] @ u_Ω)
+    return circuit
 
-        result = np.column_stack((frequency_vector, interpolated_gain_1, interpolated_gain_2, interpolated_gain_3))
 
-        #
+def build_impedance_circuit(values):
+    """
+    RLC model of the coil, the current is probed through R2.
+    """
+    circuit = Circuit(' Imp JUICE')
 
-        return {
-            "data": result,
-            "labels": ["Frequency", "Gain Node 1", "Gain Node 2", "Gain Node 3"],
-            "units": ["Hz", "V/V", "V/V", "V/V"]
-        }
+    circuit.SinusoidalVoltageSource('V1', 'N1', circuit.gnd, amplitude=1 @ u_V, frequency=1 @ u_kHz)
+    circuit.R('1', 'N001', 'N1', values['resistance'] @ u_Ω)
+    circuit.C('1', 'N2', 'N1', values['capacitance'] @ u_F)
+    circuit.L('1', 'N2', 'N001', values['inductance'] @ u_H)
+    circuit.R('2', 'N2', circuit.gnd, 1 @ u_kΩ)
 
+    circuit.R2.plus.add_current_probe(circuit)
+    return circuit
+
+
+SPICE_TEST_TEMPLATE = SpiceCircuitTemplate('spice_test', build_test_circuit, {
+    'spice_resistance_test': ('R1', 'resistance'),
+})
+
+OP_AMP_GAIN_TEMPLATE = SpiceCircuitTemplate('op_amp_gain', build_op_amp_gain_circuit, {
+    'R1': ('R1', 'resistance'),
+    'R2': ('R2', 'resistance'),
+    'R3': ('R3', 'resistance'),
+    'R4': ('R4', 'resistance'),
+    'R5': ('RL', 'resistance'),
+})
+
+IMPEDANCE_TEMPLATE = SpiceCircuitTemplate('impedance', build_impedance_circuit, {
+    'resistance': ('R1', 'resistance'),
+    'capacitance': ('C1', 'capacitance'),
+    'inductance': ('L1', 'inductance'),
+})
+
+
+def frequency_rows(frequency_vector, batch_size: int) -> list:
+    """
+    Returns the frequency vector of each row of a batch: the rows of a (K, N) batched vector, or the shared (N,)
+    vector repeated.
+    """
+    return list(frequency_vector) if np.ndim(frequency_vector) > 1 else [frequency_vector] * batch_size
+
+
+def ac_sweep_command(frequency_vector) -> str:
+    """
+    Returns the command of an AC analysis whose log-spaced sweep is aligned to a frequency vector, see
+    `aligned_sweep`.
+    """
+    return ac_command('dec', *aligned_sweep(frequency_vector))
+
+
+def simulate_rows(template: SpiceCircuitTemplate, settings: dict, frequency_vector, temperature_of,
+                  vectors, command_of=ac_sweep_command) -> tuple[list, bool]:
+    """
+    Simulates the designs of the settings of a strategy: a single design, or one per row during a batched
+    engine run, where the settings varying across the batch carry a leading batch axis (see `split_rows`).
+    The designs of a batch are run one after the other in the same ngspice session, by altering the component
+    values, see `simulate_batch`.
+
+    Each design is run with the analysis command built from its frequency vector, by default an AC analysis
+    whose log-spaced sweep is aligned to the vector, see `aligned_sweep`.
+
+    Parameters:
+        template (SpiceCircuitTemplate): The circuit template.
+        settings (dict): The component values of the template, keyed by value name, and the other scalar
+                         settings of the analysis, plain or batched.
+        frequency_vector (np.ndarray): The (N,) frequency vector, or (K, N) during a batched run.
+        temperature_of (callable): Called with the settings of a row, returns its temperature in degrees Celsius.
+        vectors (iterable): The names of the vectors to return, see `simulate`.
+        command_of (callable, optional): Called with the frequency vector of a row, returns its analysis command.
+                                         Defaults to `ac_sweep_command`.
+
+    Returns:
+        tuple: The list of the simulated vectors of each row, see `simulate`, and whether the settings were batched.
+    """
+    rows, batched = split_rows(settings)
+    runs = [({name: row[name] for name in template.devices}, temperature_of(row), command_of(frequency))
+            for row, frequency in zip(rows, frequency_rows(frequency_vector, len(rows)))]
+    return simulate_batch(template, runs, vectors), batched
+
+
+def resample_rows(frequency_vector, analyses: list, curve, batched: bool) -> np.ndarray:
+    """
+    Resamples a curve of simulated analyses onto the frequency vector of the engine, see `resample_loglog`.
+
+    Parameters:
+        frequency_vector (np.ndarray): The (N,) frequency vector, or (K, N) during a batched run.
+        analyses (list): The simulated vectors of each row, see `simulate_rows`.
+        curve (callable): Called with the vectors of a row, returns its curve on the simulated frequencies.
+        batched (bool): Whether the analyses are the rows of a batch.
+
+    Returns:
+        np.ndarray: The (N,) curve, or the (K, N) curves of a batch.
+    """
+    curves = [resample_loglog(analysis['frequency'], curve(analysis), frequency)
+              for frequency, analysis in zip(frequency_rows(frequency_vector, len(analyses)), analyses)]
+    return np.stack(curves) if batched else curves[0]
 
 
-    @staticmethod
-    def get_dependencies():
-        return ['frequency_vector', "f_start", "f_stop", "spice_resistance_test", "temperature"]
-
-class SPICE_op_Amp_gain(CalculationStrategy):
+class SPICE_test(CalculationStrategy):
     def calculate(self, dependencies: dict, parameters: InputParameters):
-        temperature = parameters.data['temperature']
-        f_start = parameters.data['f_start']
-        f_stop = parameters.data['f_stop']
-
-        R1 = parameters.data['R1']
-        R2 = parameters.data['R2']
-        R3 = parameters.data['R3']
-        R4 = parameters.data['R4']
-        R5 = parameters.data['R5']
-
         frequency_vector = dependencies['frequency_vector']['data']
-        logger = Logging.setup_logging()
+
+        settings = {'spice_resistance_test': parameters.data['spice_resistance_test'],
+                    'temperature': parameters.data['temperature']}
 
         # convert temperature to degrees Celsius
-        temperature = temperature - 273.15
+        analyses, batched = simulate_rows(SPICE_TEST_TEMPLATE, settings, frequency_vector,
+                                          lambda row: row['temperature'] - 273.15, ['n1', 'n2', 'n3'])
 
+        interpolated_gain_1 = resample_rows(frequency_vector, analyses,
+                                            lambda analysis: np.absolute(analysis['n1']), batched)
+        interpolated_gain_2 = resample_rows(frequency_vector, analyses,
+                                            lambda analysis: np.absolute(analysis['n2']), batched)
+        interpolated_gain_3 = resample_rows(frequency_vector, analyses,
+                                            lambda analysis: np.absolute(analysis['n3']), batched)
 
-        opAMP = 'src/model/strategies/strategy_lib/spice_lib/uA741.lib'
+        result = stack_columns((frequency_vector, interpolated_gain_1, interpolated_gain_2, interpolated_gain_3))
 
-        ##*********************************************
-        ## Circuit Netlist
-        circuit = Circuit('Op-amp circuits - Example 1 Non-inverting op-amp Amplifier')
-        circuit.include(opAMP)
+        return {
+            "data": result,
+            "labels": ["Frequency", "Gain Node 1", "Gain Node 2", "Gain Node 3"],
+            "units": ["Hz", "V/V", "V/V", "V/V"]
+        }
 
-        # Define amplitude and frequency of input sinusoid
-        amp = 0.1 @ u_V
-        freq = 1 @ u_kHz
+    @staticmethod
+    def get_dependencies():
+        return ['frequency_vector', "f_start", "f_stop", "spice_resistance_test", "temperature"]
 
-        # Define transient simulation step time and stop time
-        steptime = 1 @ u_us
-        finaltime = 5 * (1 / freq)
+    @staticmethod
+    def get_execution_hint():
+        return "process"
 
-        source = circuit.SinusoidalVoltageSource(1, 'input', circuit.gnd, amplitude=amp, frequency=freq)
-        circuit.V(2, '+Vcc', circuit.gnd, 15 @ u_V)
-        circuit.V(3, '-Vcc', circuit.gnd, -15 @ u_V)
+    @staticmethod
+    def supports_batch():
+        # The designs of a batch are simulated in a single session, see `simulate_rows`
+        return True
 
-        circuit.X(1, 'uA741', 'input', 'v-', '+Vcc', '-Vcc', 'out')
+class SPICE_op_Amp_gain(CalculationStrategy):
+    def calculate(self, dependencies: dict, parameters: InputParameters):
+        frequency_vector = dependencies['frequency_vector']['data']
 
-        circuit.R(1, 'v-', circuit.gnd, R1@ u_Ω)
-        circuit.R(2, 'v-', 'x', R2@ u_Ω)
-        circuit.R(3, 'x', 'out', R3@ u_Ω)
-        circuit.R(4, 'x', circuit.gnd, R4@ u_Ω)
-        circuit.R('L', 'out', circuit.gnd, R5@ u_Ω)
+        settings = {name: parameters.data[name] for name in OP_AMP_GAIN_TEMPLATE.devices}
+        settings['temperature'] = parameters.data['temperature']
 
         ##*********************************************
-        ## Simulation: Transient Analysis
-        simulator = circuit.simulator(temperature=temperature, nominal_temperature=25)
-        analysis = simulator.transient(step_time=steptime, end_time=finaltime)
-        analysis = simulator.ac(start_frequency=f_start @ u_Hz, stop_frequency=f_stop @ u_Hz, number_of_points=10,
-                                variation='dec')  # 1 to 1MHz, 10 points per decade
-
-        #print all nodes in the analysis
-
-        input = np.absolute(analysis['input'])
-        output = np.absolute(analysis['out'])
-
-        simulation_freq = np.array(analysis.frequency)
-
+        ## Simulation: AC Analysis on the frequency grid, in the persistent session of the circuit or from the
+        ## disk cache
+        # convert temperature to degrees Celsius
+        analyses, batched = simulate_rows(OP_AMP_GAIN_TEMPLATE, settings, frequency_vector,
+                                          lambda row: row['temperature'] - 273.15, ['input', 'out'])
 
-        interpolated_input = np.interp(frequency_vector, simulation_freq, input)
-        interpolated_output = np.interp(frequency_vector, simulation_freq, output)
+        interpolated_input = resample_rows(frequency_vector, analyses,
+                                           lambda analysis: np.absolute(analysis['input']), batched)
+        interpolated_output = resample_rows(frequency_vector, analyses,
+                                            lambda analysis: np.absolute(analysis['out']), batched)
 
-        result = np.column_stack((frequency_vector, interpolated_input, interpolated_output))
+        result = stack_columns((frequency_vector, interpolated_input, interpolated_output))
 
         return {
                 "data": result,
@@ -142,59 +229,38 @@ class SPICE_op_Amp_gain(CalculationStrategy):
     def get_dependencies():
         return ['frequency_vector', "f_start", "f_stop", "spice_resistance_test", "temperature", "R1", "R2", "R3", "R4", "R5"]
 
-class SPICE_op_Amp_noise(CalculationStrategy):
-    def calculate(self, dependencies: dict, parameters: InputParameters):
-        temperature = parameters.data['temperature']
-        f_start = parameters.data['f_start']
-        f_stop = parameters.data['f_stop']
+    @staticmethod
+    def get_execution_hint():
+        return "process"
 
-        R1 = parameters.data['R1']
-        R2 = parameters.data['R2']
-        R3 = parameters.data['R3']
-        R4 = parameters.data['R4']
-        R5 = parameters.data['R5']
+    @staticmethod
+    def supports_batch():
+        # The designs of a batch are simulated in a single session, see `simulate_rows`
+        return True
 
+class SPICE_op_Amp_noise(CalculationStrategy):
+    def calculate(self, dependencies: dict, parameters: InputParameters):
         frequency_vector = dependencies['frequency_vector']['data']
-        logger = Logging.setup_logging()
 
-        # Convert temperature to degrees Celsius
-        temperature = temperature - 273.15
-
-        opAMP = 'src/model/strategies/strategy_lib/spice_lib/uA741.lib'
-
-        ##*********************************************
-        ## Circuit Netlist
-        circuit = Circuit('Op-amp circuits - Noise Analysis for Non-inverting Amplifier')
-        circuit.include(opAMP)
-
-        circuit.V(2, '+Vcc', circuit.gnd, 15 @ u_V)
-        circuit.V(3, '-Vcc', circuit.gnd, -15 @ u_V)
-
-        circuit.X(1, 'uA741', 'input', 'v-', '+Vcc', '-Vcc', 'out')
-
-        circuit.R(1, 'v-', circuit.gnd, R1@ u_Ω)
-        circuit.R(2, 'v-', 'x', R2@ u_Ω)
-        circuit.R(3, 'x', 'out', R3@ u_Ω)
-        circuit.R(4, 'x', circuit.gnd, R4@ u_Ω)
-        circuit.R('L', 'out', circuit.gnd, R5@ u_Ω)
+        settings = {name: parameters.data[name] for name in OP_AMP_GAIN_TEMPLATE.devices}
+        settings['temperature'] = parameters.data['temperature']
 
         ##*********************************************
-        ## Simulation: Noise Analysis
-        simulator = circuit.simulator(temperature=temperature, nominal_temperature=25)
-        analysis = simulator.noise(output_node='out', input_node='input', start_frequency=f_start @ u_Hz,
-                                   stop_frequency=f_stop @ u_Hz, number_of_points=len(frequency_vector),
-                                   variation='lin')
+        ## Simulation: Noise Analysis at the output, referred to the input source V1, log-spaced sweep aligned to
+        ## the frequency grid
+        def command_of(frequency):
+            return noise_command('out', None, 'V1', 'dec', *aligned_sweep(frequency))
 
+        # convert temperature to degrees Celsius
+        analyses, batched = simulate_rows(OP_AMP_GAIN_TEMPLATE, settings, frequency_vector,
+                                          lambda row: row['temperature'] - 273.15, ['onoise_spectrum'],
+                                          command_of)
 
+        # Resample the results onto the frequency vector
+        interpolated_noise = resample_rows(frequency_vector, analyses,
+                                           lambda analysis: np.absolute(analysis['onoise_spectrum']), batched)
 
-        # Retrieve noise data for each frequency
-        frequency = np.array(analysis.frequency)
-        output_noise_voltage = np.array(analysis.noise_output_voltage_density)
-
-        # Interpolate the results onto the frequency vector if necessary
-        interpolated_noise = np.interp(frequency_vector, frequency, output_noise_voltage)
-
-        result = np.column_stack((frequency_vector, interpolated_noise))
+        result = stack_columns((frequency_vector, interpolated_noise))
 
         return {
             "data": result,
@@ -206,67 +272,34 @@ class SPICE_op_Amp_noise(CalculationStrategy):
     def get_dependencies():
         return ['frequency_vector', "f_start", "f_stop", "temperature", "R1", "R2", "R3", "R4", "R5"]
 
+    @staticmethod
+    def get_execution_hint():
+        return "process"
 
-class SPICE_op_Amp_transcient(CalculationStrategy):
-    def calculate(self, dependencies: dict, parameters: InputParameters):
-        temperature = parameters.data['temperature']
-        f_start = parameters.data['f_start']
-        f_stop = parameters.data['f_stop']
-
-        R1 = parameters.data['R1']
-        R2 = parameters.data['R2']
-        R3 = parameters.data['R3']
-        R4 = parameters.data['R4']
-        R5 = parameters.data['R5']
+    @staticmethod
+    def supports_batch():
+        # The designs of a batch are simulated in a single session, see `simulate_rows`
+        return True
 
-        resistance = dependencies['resistance']['data']
 
-        frequency_vector = dependencies['frequency_vector']['data']
-        logger = Logging.setup_logging()
+class SPICE_op_Amp_transcient(CalculationStrategy):
+    def calculate(self, dependencies: dict, parameters: InputParameters):
+        values = {name: parameters.data[name] for name in OP_AMP_GAIN_TEMPLATE.devices}
+        values['R1'] = dependencies['resistance']['data']
 
         # convert temperature to degrees Celsius
-        temperature = temperature - 273.15
+        temperature = parameters.data['temperature'] - 273.15
 
-        opAMP = 'src/model/strategies/strategy_lib/spice_lib/uA741.lib'
-
-        ##*********************************************
-        ## Circuit Netlist
-        circuit = Circuit('Op-amp circuits - Example 1 Non-inverting op-amp Amplifier')
-        circuit.include(opAMP)
-
-        # Define amplitude and frequency of input sinusoid
-        amp = 0.1 @ u_V
-        freq = 1 @ u_kHz
-
-        # Define transient simulation step time and stop time
-        steptime = 1 @ u_us
-        finaltime = 5 * (1 / freq)
-
-        source = circuit.SinusoidalVoltageSource(1, 'input', circuit.gnd, amplitude=amp, frequency=freq)
-        circuit.V(2, '+Vcc', circuit.gnd, 15 @ u_V)
-        circuit.V(3, '-Vcc', circuit.gnd, -15 @ u_V)
-
-        circuit.X(1, 'uA741', 'input', 'v-', '+Vcc', '-Vcc', 'out')
-
-        circuit.R(1, 'v-', circuit.gnd, resistance @ u_Ω)
-        circuit.R(2, 'v-', 'x', R2 @ u_Ω)
-        circuit.R(3, 'x', 'out', R3 @ u_Ω)
-        circuit.R(4, 'x', circuit.gnd, R4 @ u_Ω)
-        circuit.R('L', 'out', circuit.gnd, R5 @ u_Ω)
+        # Define transient simulation step time and stop time: five periods of the 1 kHz input sinusoid
+        step_time = 1e-6
+        final_time = 5 * (1 / 1e3)
 
         ##*********************************************
         ## Simulation: Transient Analysis
-        simulator = circuit.simulator(temperature=temperature, nominal_temperature=25)
-        analysis = simulator.transient(step_time=steptime, end_time=finaltime)
-
-        # print all nodes in the analysis
-
-        input = analysis['input']
-        output = analysis['out']
+        analysis = simulate(OP_AMP_GAIN_TEMPLATE, values, temperature, transient_command(step_time, final_time),
+                            ['input', 'out'])
 
-        time = np.array(analysis.time)
-
-        result = np.column_stack((time, input, output))
+        result = np.column_stack((analysis['time'], np.real(analysis['input']), np.real(analysis['out'])))
 
         return {
             "data": result,
@@ -279,51 +312,33 @@ class SPICE_op_Amp_transcient(CalculationStrategy):
         return ['frequency_vector', "f_start", "f_stop", "spice_resistance_test", "temperature", "R1", "R2", "R3", "resistance",
                 "R4", "R5"]
 
+    @staticmethod
+    def get_execution_hint():
+        return "process"
 
-class SPICE_impedance(CalculationStrategy):
-    def calculate(self, dependencies: dict, parameters: InputParameters):
-        temperature = parameters.data['temperature']
-        f_start = parameters.data['f_start']
-        f_stop = parameters.data['f_stop']
-
+    @staticmethod
+    def supports_batch():
+        return False
 
-        resistance = dependencies['resistance']['data']
-        capacitance = dependencies['capacitance']['data']
-        inductance = dependencies['inductance']['data']
 
+class SPICE_impedance(CalculationStrategy):
+    def calculate(self, dependencies: dict, parameters: InputParameters):
         frequency_vector = dependencies['frequency_vector']['data']
 
-        nb_points_per_decade = parameters.data['nb_points_per_decade']
-
-        logger = Logging.setup_logging()
+        settings = {name: dependencies[name]['data'] for name in IMPEDANCE_TEMPLATE.devices}
+        settings['temperature'] = parameters.data['temperature']
 
         # convert temperature to degrees Celsius
-        temperature = temperature - 273.15
-
-        circuit = Circuit(' Imp JUICE')
-
-        circuit.SinusoidalVoltageSource('V1', 'N1', circuit.gnd, amplitude=1 @ u_V, frequency=1 @ u_kHz)
-        circuit.R('1', 'N001', 'N1', resistance @ u_Ω)
-        circuit.C('1', 'N2', 'N1', capacitance @ u_F)
-        circuit.L('1', 'N2', 'N001', inductance @ u_H)
-        circuit.R('2', 'N2', circuit.gnd, 1 @ u_kΩ)
-
-        circuit.R2.plus.add_current_probe(circuit)
-
-        simulator = circuit.simulator(temperature=temperature, nominal_temperature=25)
-        analysis = simulator.ac(start_frequency=f_start @ u_Hz, stop_frequency=f_stop @ u_Hz, number_of_points=nb_points_per_decade,
-                                variation='dec')  # 1 to 1MHz, 10 points per decade
-
-        frequency = analysis.frequency
-        voltage_N1 = np.absolute(analysis['N001'])
-        current_R2 = np.absolute(analysis['vr2_plus'])
+        analyses, batched = simulate_rows(IMPEDANCE_TEMPLATE, settings, frequency_vector,
+                                          lambda row: row['temperature'] - 273.15, ['N001', 'vr2_plus'])
 
-        Z = voltage_N1 / current_R2
+        def impedance(analysis):
+            voltage_N1 = np.absolute(analysis['N001'])
+            current_R2 = np.absolute(analysis['vr2_plus'])
+            return voltage_N1 / current_R2
 
-
-        simulation_freq = np.array(analysis.frequency)
-        interpolated_Z = np.interp(frequency_vector, simulation_freq, Z)
-        result = np.column_stack((frequency_vector, interpolated_Z))
+        interpolated_Z = resample_rows(frequency_vector, analyses, impedance, batched)
+        result = stack_columns((frequency_vector, interpolated_Z))
 
         return {
             "data": result,
@@ -336,6 +351,15 @@ class SPICE_impedance(CalculationStrategy):
         return ['frequency_vector', "f_start", "f_stop", "temperature", "capacitance",
                 "inductance", "resistance"]
 
+    @staticmethod
+    def get_execution_hint():
+        return "process"
+
+    @staticmethod
+    def supports_batch():
+        # The designs of a batch are simulated in a single session, see `simulate_rows`
+        return True
+
 
 if __name__ == "__main__" :
     ##*********************************************
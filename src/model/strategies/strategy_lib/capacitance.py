@@ -20,8 +20,8 @@ class AnalyticalCapacitanceStrategy(CalculationStrategy):
 
         mu_app = dependencies['mu_app']['data']
 
-        nb_spire_per_layer = int(len_coil / (diam_wire * coeff_expansion))
-        nb_layer = int(nb_spire / nb_spire_per_layer) + 1
+        nb_spire_per_layer = np.floor(len_coil / (diam_wire * coeff_expansion))
+        nb_layer = np.floor(nb_spire / nb_spire_per_layer) + 1
 
         result = (
                 (np.pi * (mu_0 * 4 * np.pi * 10**-7) * mu_insulator * len_coil) /
@@ -41,3 +41,7 @@ class AnalyticalCapacitanceStrategy(CalculationStrategy):
     def get_dependencies():
         return ['mu_insulator', 'len_coil', 'kapthon_thick', 'insulator_thick', 'diam_out_mandrel',
                 'diam_wire', 'capa_tuning', 'capa_triwire', 'coeff_expansion', 'nb_spire', 'mu_app']
+
+    @staticmethod
+    def supports_batch():
+        return True
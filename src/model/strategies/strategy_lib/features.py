@@ -0,0 +1,288 @@
+import numpy as np
+from scipy.constants import k
+from scipy.optimize import brentq, minimize_scalar
+
+from src.model.input_parameters import InputParameters
+from src.model.strategies import CalculationStrategy
+from src.model.strategies.symbolic import Program
+from src.model.strategies.strategy_lib.CLTF import CLTF_Strategy_Non_Filtered_legacy
+from src.model.strategies.strategy_lib.Noise import PSD_R_cr, PSD_R_Coil, PSD_Flicker, PSD_e_en, PSD_e_in
+from src.model.strategies.strategy_lib.RLC import OPEN_LOOP_DENOMINATOR, CLOSED_LOOP_DENOMINATOR
+from src.model.strategies.strategy_lib.impedance import AnalyticalImpedanceStrategy
+
+# Density of the log grid bracketing the extrema before they are refined
+BRACKET_POINTS_PER_DECADE = 20
+
+# -3 dB, as the log10 of an amplitude ratio
+MINUS_3_DB = np.log10(np.sqrt(0.5))
+
+_DENOMINATORS = Program([OPEN_LOOP_DENOMINATOR, CLOSED_LOOP_DENOMINATOR])
+_IMPEDANCE = AnalyticalImpedanceStrategy()
+_PSD_R_CR = PSD_R_cr()
+
+
+def impedance_peak(R, L, C):
+    """
+    Closed form of the maximum of the RLC impedance magnitude |Z|, Z = (R + jLw) / (1 - LCw^2 + jRCw).
+    Setting the derivative of |Z|^2 with respect to w^2 to zero gives a quadratic equation, whose positive root is
+    w^2 = sqrt(1 + 2R^2C/L) / (LC) - R^2/L^2.
+
+    Parameters:
+        R, L, C: The resistance, inductance and capacitance of the coil, scalars or arrays.
+
+    Returns:
+        tuple: The squared angular frequency of the peak (NaN when the coil is too damped to have one)
+               and the squared impedance magnitude at the peak.
+    """
+    omega_squared = np.sqrt(1 + 2 * R ** 2 * C / L) / (L * C) - R ** 2 / L ** 2
+    omega_squared = np.where(omega_squared > 0, omega_squared, np.nan)
+    impedance_squared = (R ** 2 + L ** 2 * omega_squared) \
+        / ((1 - L * C * omega_squared) ** 2 + (R * C) ** 2 * omega_squared)
+    return omega_squared, impedance_squared
+
+
+class FrequencyResponse:
+    """
+    The curves of the default strategies of the graph, evaluated at arbitrary frequencies instead of over the
+    frequency vector: the feature strategies search their extrema with a few evaluations.
+    The formulas are the kernels and expressions of the strategies themselves.
+    """
+
+    def __init__(self, dependencies: dict, parameters: InputParameters):
+        self.dependencies = {name: value["data"] if isinstance(value, dict) else value
+                             for name, value in dependencies.items()}
+        self.parameters = parameters.data
+
+    def __getitem__(self, name):
+        if name in self.dependencies:
+            return self.dependencies[name]
+        return self.parameters[name]
+
+    def tf_stage(self, f, stage):
+        return self[f'gain_{stage}_linear'] / np.sqrt(1 + (f / self[f'stage_{stage}_cutting_freq']) ** 2)
+
+    def denominators(self, f):
+        omega = 2 * np.pi * f
+        values = {'omega': omega, 'omega_squared': omega ** 2, 'TF_ASIC_Stage_1': self.tf_stage(f, 1)}
+        return _DENOMINATORS.evaluate(lambda name, column: values[name] if name in values else self[name])
+
+    def impedance(self, f):
+        omega = 2 * np.pi * f
+        open_loop_denominator, _ = self.denominators(f)
+        return _IMPEDANCE.calculate_impedance(self['resistance'], self['inductance'], omega, open_loop_denominator)
+
+    def cltf(self, f):
+        """
+        The filtered closed loop transfer function.
+        """
+        _, closed_loop_denominator = self.denominators(f)
+        cltf = CLTF_Strategy_Non_Filtered_legacy.calculate_cltf(self['nb_spire'], self['ray_spire'], self['mu_app'],
+                                                                2 * np.pi * f, self.tf_stage(f, 1),
+                                                                closed_loop_denominator)
+        return cltf * self.tf_stage(f, 2)
+
+    def nemi(self, f):
+        """
+        The NEMI, the total noise density divided by the closed loop transfer function. The second stage gain
+        applies to both and cancels out.
+        """
+        open_loop_denominator, closed_loop_denominator = self.denominators(f)
+        tf_stage_1 = self.tf_stage(f, 1)
+        flicker = PSD_Flicker.calculate_psd_flicker(self['Para_A'], self['Para_B'], self['Alpha'], self['e_en'], f)
+        psd = [
+            PSD_e_in.calculate_psd_e_in(self.impedance(f), self['e_in'], tf_stage_1, open_loop_denominator,
+                                        closed_loop_denominator),
+            PSD_e_en.calculate_psd_e_en(flicker, tf_stage_1, open_loop_denominator, closed_loop_denominator),
+            PSD_R_Coil.calculate_psd(self['temperature'], self['resistance'], k, tf_stage_1,
+                                     closed_loop_denominator),
+            _PSD_R_CR.calculate_psd(self['temperature'], self['feedback_resistance']),
+        ]
+        psd_total = np.sqrt(sum(np.square(value) for value in psd))
+        cltf = CLTF_Strategy_Non_Filtered_legacy.calculate_cltf(self['nb_spire'], self['ray_spire'], self['mu_app'],
+                                                                2 * np.pi * f, tf_stage_1, closed_loop_denominator)
+        return psd_total / cltf
+
+
+def find_extremum(function, f_start, f_stop, maximum=True):
+    """
+    Finds the global extremum of a curve between two frequencies: the curve is sampled on a coarse log grid to
+    bracket it, then refined by Brent's method in log frequency.
+
+    Parameters:
+        function (callable): The curve, called with an array of frequencies.
+        f_start (float): The lowest frequency.
+        f_stop (float): The highest frequency.
+        maximum (bool): Whether to search the maximum or the minimum.
+
+    Returns:
+        tuple: The frequency and value of the extremum, and the coarse grid (log10 frequencies, values) used
+               to bracket it.
+    """
+    sign = -1 if maximum else 1
+    x = np.linspace(np.log10(f_start), np.log10(f_stop),
+                    max(int((np.log10(f_stop) - np.log10(f_start)) * BRACKET_POINTS_PER_DECADE), 2) + 1)
+    values = function(10 ** x)
+    index = np.argmin(sign * values)
+    bounds = (x[max(index - 1, 0)], x[min(index + 1, len(x) - 1)])
+
+    refined = minimize_scalar(lambda point: sign * function(10 ** point), bounds=bounds, method='bounded',
+                              options={'xatol': 1e-9})
+    if refined.fun < sign * values[index]:
+        return 10 ** refined.x, sign * refined.fun, (x, values)
+    return 10 ** x[index], values[index], (x, values)
+
+
+def find_crossings(function, level, f_peak, grid):
+    """
+    Finds the frequencies closest to a peak, on each side, where a curve crosses a level.
+
+    Parameters:
+        function (callable): The curve, called with an array of frequencies.
+        level (float): The level.
+        f_peak (float): The frequency of the peak, above the level.
+        grid (tuple): The coarse grid of `find_extremum`, bracketing the crossings.
+
+    Returns:
+        tuple: The lower and upper crossing frequencies, NaN when the curve stays above the level on that side.
+    """
+    x, values = grid
+    x_peak = np.log10(f_peak)
+    crossing = lambda point: function(10 ** point) - level
+
+    below = np.flatnonzero((values < level) & (x < x_peak))
+    lower = np.nan
+    if len(below):
+        upper_bound = x[below[-1] + 1] if below[-1] + 1 < len(x) and x[below[-1] + 1] < x_peak else x_peak
+        lower = 10 ** brentq(crossing, x[below[-1]], upper_bound, xtol=1e-12)
+
+    below = np.flatnonzero((values < level) & (x > x_peak))
+    upper = np.nan
+    if len(below):
+        lower_bound = x[below[0] - 1] if below[0] > 0 and x[below[0] - 1] > x_peak else x_peak
+        upper = 10 ** brentq(crossing, lower_bound, x[below[0]], xtol=1e-12)
+
+    return lower, upper
+
+
+class ResonanceFrequencyStrategy(CalculationStrategy):
+    """
+    Resonance frequency of the coil, the frequency of the maximum of its impedance magnitude.
+    Closed form from R, L and C (see `impedance_peak`), independent of the frequency vector.
+    """
+
+    def calculate(self, dependencies: dict, parameters: InputParameters):
+        R = dependencies['resistance']['data']
+        L = dependencies['inductance']['data']
+        C = dependencies['capacitance']['data']
+
+        omega_squared, _ = impedance_peak(R, L, C)
+        return {
+            "data": np.sqrt(omega_squared) / (2 * np.pi),
+            "labels": ["Resonance frequency"],
+            "units": ["Hz"]
+        }
+
+    @staticmethod
+    def get_dependencies():
+        return ['resistance', 'inductance', 'capacitance']
+
+    @staticmethod
+    def supports_batch():
+        return True
+
+
+class QualityFactorStrategy(CalculationStrategy):
+    """
+    Quality factor of the impedance resonance, f_res / (f_high - f_low), with f_low and f_high the frequencies
+    where the impedance magnitude is 3 dB below its peak.
+    |Z|^2 = |Z_peak|^2 / 2 is a quadratic equation in w^2, solved in closed form. NaN when the resonance is too
+    damped to have two -3 dB points.
+    """
+
+    def calculate(self, dependencies: dict, parameters: InputParameters):
+        R = dependencies['resistance']['data']
+        L = dependencies['inductance']['data']
+        C = dependencies['capacitance']['data']
+
+        omega_squared, peak = impedance_peak(R, L, C)
+        # 2 * (R^2 + L^2 u) = peak * ((1 - LCu)^2 + R^2C^2 u), u = w^2
+        a = peak * (L * C) ** 2
+        b = peak * ((R * C) ** 2 - 2 * L * C) - 2 * L ** 2
+        c = peak - 2 * R ** 2
+        q = -(b + np.sign(b) * np.sqrt(b ** 2 - 4 * a * c)) / 2
+        roots = np.sort(np.stack((q / a, c / q)), axis=0)
+        low, high = np.where(roots > 0, roots, np.nan)
+
+        quality_factor = np.sqrt(omega_squared) / (np.sqrt(high) - np.sqrt(low))
+        return {
+            "data": quality_factor,
+            "labels": ["Quality factor"],
+            "units": [""]
+        }
+
+    @staticmethod
+    def get_dependencies():
+        return ['resistance', 'inductance', 'capacitance']
+
+    @staticmethod
+    def supports_batch():
+        return True
+
+
+class CLTF_Bandwidth(CalculationStrategy):
+    """
+    -3 dB bandwidth of the filtered closed loop transfer function, searched between f_start and f_stop
+    with a few evaluations of the transfer function (see `find_extremum` and `find_crossings`), independent
+    of the frequency vector.
+    The result holds the lower and upper -3 dB frequencies and their difference, NaN when the transfer function
+    stays above the -3 dB level on one side.
+    """
+
+    def calculate(self, dependencies: dict, parameters: InputParameters):
+        response = FrequencyResponse(dependencies, parameters)
+        log_cltf = lambda f: np.log10(response.cltf(f))
+
+        f_peak, peak, grid = find_extremum(log_cltf, parameters.data['f_start'], parameters.data['f_stop'])
+        lower, upper = find_crossings(log_cltf, peak + MINUS_3_DB, f_peak, grid)
+        return {
+            "data": np.array([lower, upper, upper - lower]),
+            "labels": ["Lower cutoff frequency", "Upper cutoff frequency", "Bandwidth"],
+            "units": ["Hz", "Hz", "Hz"]
+        }
+
+    @staticmethod
+    def get_dependencies():
+        return ['f_start', 'f_stop', 'nb_spire', 'ray_spire', 'mu_app', 'resistance', 'inductance', 'capacitance',
+                'gain_1_linear', 'stage_1_cutting_freq', 'gain_2_linear', 'stage_2_cutting_freq',
+                'mutual_inductance', 'feedback_resistance']
+
+    @staticmethod
+    def supports_batch():
+        return False
+
+
+class NEMI_Minimum(CalculationStrategy):
+    """
+    Frequency and value of the minimum of the NEMI between f_start and f_stop, searched with a few evaluations
+    of the noise model (see `find_extremum`), independent of the frequency vector.
+    """
+
+    def calculate(self, dependencies: dict, parameters: InputParameters):
+        response = FrequencyResponse(dependencies, parameters)
+        log_nemi = lambda f: np.log10(response.nemi(f))
+
+        f_minimum, minimum, _ = find_extremum(log_nemi, parameters.data['f_start'], parameters.data['f_stop'],
+                                              maximum=False)
+        return {
+            "data": np.array([f_minimum, 10 ** minimum]),
+            "labels": ["Frequency", "NEMI"],
+            "units": ["Hz", ""]
+        }
+
+    @staticmethod
+    def get_dependencies():
+        return CLTF_Bandwidth.get_dependencies() + ['temperature', 'Para_A', 'Para_B', 'Alpha', 'e_en', 'e_in']
+
+    @staticmethod
+    def supports_batch():
+        return False
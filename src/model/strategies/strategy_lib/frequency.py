@@ -21,4 +21,138 @@ class FrequencyVectorStrategy(CalculationStrategy):
     def get_dependencies():
         return ['f_start', 'f_stop', 'nb_points_per_decade']
 
+    @staticmethod
+    def supports_batch():
+        return False
+
+
+
+
+class AdaptiveFrequencyVectorStrategy(CalculationStrategy):
+    """
+    Non-uniform logarithmic frequency vector, refined only around the resonance of the coil and the corners of
+    the transfer functions. The other nodes share this grid, the cost of the whole graph scales with the number
+    of points kept instead of the number of points per decade.
+
+    The grid starts from a coarse logarithmic grid, to which the resonance frequency of the coil and the cutting
+    frequencies of the ASIC stages are added. An interval is split at its (logarithmic) middle when the log-log
+    linear interpolation of the response at that point is off by more than the tolerance, until the intervals
+    reach the resolution of the uniform grid, 1 / nb_points_per_decade decade. The peaks are therefore resolved
+    as finely as by `FrequencyVectorStrategy` with the same nb_points_per_decade, never with more points.
+
+    The response is an analytical model of the curves of the graph, cheap to evaluate:
+        - the magnitude of the RLC impedance of the coil,
+        - the magnitude of the closed loop RLC term, with the flux feedback,
+        - the magnitudes of the two low-pass ASIC stages.
+
+    As the grid depends on the coil, its length changes with the parameters: batches with different grid
+    lengths cannot be stacked (see `run_batch`).
+    """
+
+    def __init__(self, coarse_points_per_decade=10, tolerance=1e-3):
+        """
+        Parameters:
+            coarse_points_per_decade (int): The density of the initial grid.
+            tolerance (float): The maximum interpolation error of the response, in decades (log10 of the
+                               magnitude), 1e-3 being about 0.02 dB.
+        """
+        self.coarse_points_per_decade = coarse_points_per_decade
+        self.tolerance = tolerance
+
+    def cache_key(self) -> tuple:
+        return self.coarse_points_per_decade, self.tolerance
+
+    def calculate(self, dependencies: dict, parameters: InputParameters):
+        f_start = parameters.data['f_start']
+        f_stop = parameters.data['f_stop']
+        nb_points_per_decade = parameters.data['nb_points_per_decade']
+        R = dependencies['resistance']['data']
+        L = dependencies['inductance']['data']
+        C = dependencies['capacitance']['data']
+        gain_1 = parameters.data['gain_1_linear']
+        stage_1_cutting_freq = parameters.data['stage_1_cutting_freq']
+        stage_2_cutting_freq = parameters.data['stage_2_cutting_freq']
+        mutual_inductance = parameters.data['mutual_inductance']
+        feedback_resistance = parameters.data['feedback_resistance']
+
+        def response(f):
+            omega = 2 * np.pi * f
+            resonance_term = (1 - L * C * omega ** 2) ** 2
+            damping_term = R * C * omega
+            tf_stage_1 = gain_1 / np.sqrt(1 + (f / stage_1_cutting_freq) ** 2)
+            tf_stage_2 = 1 / np.sqrt(1 + (f / stage_2_cutting_freq) ** 2)
+            impedance = np.sqrt((R ** 2 + (L * omega) ** 2) / (resonance_term + damping_term ** 2))
+            closed_loop = (resonance_term + (damping_term + tf_stage_1 * mutual_inductance * omega
+                                             / feedback_resistance) ** 2) ** -0.5
+            return np.log10(np.stack((impedance, closed_loop, tf_stage_1, tf_stage_2)))
+
+        characteristic_frequencies = [1 / (2 * np.pi * np.sqrt(L * C)), stage_1_cutting_freq, stage_2_cutting_freq]
+        frequency_vector = self.refine(np.log10(f_start), np.log10(f_stop), nb_points_per_decade,
+                                       np.log10(characteristic_frequencies), response)
+        return {
+            "data": frequency_vector,
+            "labels": ["Frequency"],
+            "units": ["Hz"]
+        }
+
+    def refine(self, log_start, log_stop, nb_points_per_decade, log_seeds, response):
+        """
+        Builds the adaptive grid.
+
+        Parameters:
+            log_start (float): log10 of the first frequency.
+            log_stop (float): log10 of the last frequency.
+            nb_points_per_decade (int): The density of the uniform grid, giving the finest resolution and the
+                                        maximum number of points.
+            log_seeds (array): log10 of frequencies added to the initial grid when they are in the range.
+            response (callable): Called as response(f), returns the log10 of the curves at the frequencies f,
+                                 as an (nb_curves, len(f)) array.
+
+        Returns:
+            np.ndarray: The increasing frequency vector, from 10**log_start to 10**log_stop.
+        """
+        decades = log_stop - log_start
+        max_points = max(int(decades * nb_points_per_decade), 2)
+        min_width = 1 / nb_points_per_decade
+
+        x = np.linspace(log_start, log_stop, min(max(int(decades * self.coarse_points_per_decade) + 1, 2),
+                                                 max_points))
+        seeds = np.asarray(log_seeds, dtype=float)
+        seeds = seeds[np.isfinite(seeds) & (seeds > log_start) & (seeds < log_stop)]
+        x = np.unique(np.concatenate((x, seeds)))
+        values = response(10 ** x)
 
+        while len(x) < max_points:
+            widths = np.diff(x)
+            candidates = np.flatnonzero(widths > min_width)
+            if not len(candidates):
+                break
+            middles = (x[candidates] + x[candidates + 1]) / 2
+            middle_values = response(10 ** middles)
+            interpolated = (values[:, candidates] + values[:, candidates + 1]) / 2
+            errors = np.abs(middle_values - interpolated).max(axis=0)
+
+            split = np.flatnonzero(errors > self.tolerance)
+            if not len(split):
+                break
+            budget = max_points - len(x)
+            if len(split) > budget:
+                split = split[np.argsort(errors[split])[::-1][:budget]]
+
+            x = np.concatenate((x, middles[split]))
+            values = np.concatenate((values, middle_values[:, split]), axis=1)
+            order = np.argsort(x, kind="stable")
+            x = x[order]
+            values = values[:, order]
+
+        return 10 ** x
+
+    @staticmethod
+    def get_dependencies():
+        return ['f_start', 'f_stop', 'nb_points_per_decade', 'resistance', 'inductance', 'capacitance',
+                'gain_1_linear', 'stage_1_cutting_freq', 'stage_2_cutting_freq', 'mutual_inductance',
+                'feedback_resistance']
+
+    @staticmethod
+    def supports_batch():
+        return False
@@ -1,6 +1,6 @@
 import numpy as np
 from src.model.input_parameters import InputParameters
-from src.model.strategies import CalculationStrategy
+from src.model.strategies import CalculationStrategy, stack_columns
 
 
 class AnalyticalImpedanceStrategy(CalculationStrategy):
@@ -8,14 +8,14 @@ class AnalyticalImpedanceStrategy(CalculationStrategy):
     def calculate(self, dependencies: dict, parameters: InputParameters):
         R = dependencies['resistance']['data']
         L = dependencies['inductance']['data']
-        C = dependencies['capacitance']['data']
+        omega = dependencies['omega']['data']
+        open_loop_denominator = dependencies['RLC_denominator_open_loop']['data']
 
         frequency_vector = dependencies['frequency_vector']['data']
 
 
-        vectorized_impedance = np.vectorize(self.calculate_impedance)
-        impedance_values = vectorized_impedance(R, L, C, frequency_vector)
-        frequency_impedance_tensor = np.column_stack((frequency_vector, impedance_values))
+        impedance_values = self.calculate_impedance(R, L, omega, open_loop_denominator)
+        frequency_impedance_tensor = stack_columns((frequency_vector, impedance_values))
         result = frequency_impedance_tensor
 
         return {
@@ -23,11 +23,14 @@ class AnalyticalImpedanceStrategy(CalculationStrategy):
             "labels": ["Frequency", "Impedance"],
             "units": ["Hz", "Ohm"]
         }
-    def calculate_impedance(self, R, L, C, f):
-        impedance_num = (R ** 2) + (L * 2 * np.pi * f) ** 2
-        impedance_den = (1 - L * C * (2 * np.pi * f) ** 2) ** 2 + (R * C * (2 * np.pi * f)) ** 2
-        return np.sqrt(impedance_num / impedance_den)
+    def calculate_impedance(self, R, L, omega, open_loop_denominator):
+        impedance_num = (R ** 2) + (L * omega) ** 2
+        return np.sqrt(impedance_num / open_loop_denominator)
 
     @staticmethod
     def get_dependencies():
-        return ['resistance', 'inductance', 'capacitance', 'frequency_vector']
+        return ['resistance', 'inductance', 'omega', 'RLC_denominator_open_loop', 'frequency_vector']
+
+    @staticmethod
+    def supports_batch():
+        return True
@@ -22,4 +22,8 @@ class AnalyticalInductanceStrategy(CalculationStrategy):
         }
     @staticmethod
     def get_dependencies():
-        return ['nb_spire', 'ray_spire', 'len_coil', 'lambda_param', 'mu_app']
\ No newline at end of file
+        return ['nb_spire', 'ray_spire', 'len_coil', 'lambda_param', 'mu_app']
+
+    @staticmethod
+    def supports_batch():
+        return True
\ No newline at end of file
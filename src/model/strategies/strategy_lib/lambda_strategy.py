@@ -22,3 +22,7 @@ class AnalyticalLambdaStrategy(CalculationStrategy):
     @staticmethod
     def get_dependencies():
         return ['len_coil', 'len_core']
+
+    @staticmethod
+    def supports_batch():
+        return True
@@ -22,3 +22,7 @@ class AnalyticalMu_appStrategy(CalculationStrategy):
     @staticmethod
     def get_dependencies():
         return ['mu_r', 'Nz']
+
+    @staticmethod
+    def supports_batch():
+        return True
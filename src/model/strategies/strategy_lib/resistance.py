@@ -18,6 +18,10 @@ class AnalyticalResistanceStrategy(CalculationStrategy):
     def get_dependencies():
         return ['nb_spire', 'ray_spire', 'rho_whire']
 
+    @staticmethod
+    def supports_batch():
+        return True
+
 class AnalyticalResistanceStrategyv2(CalculationStrategy):
     def calculate(self, dependencies: dict, parameters: InputParameters):
         N = parameters.data['nb_spire']
@@ -35,5 +39,9 @@ class AnalyticalResistanceStrategyv2(CalculationStrategy):
     def get_dependencies():
         return ['nb_spire', 'ray_spire', 'rho_whire', "resistance"]
 
+    @staticmethod
+    def supports_batch():
+        return True
+
 
 
@@ -0,0 +1,386 @@
+"""
+src/model/strategies/strategy_lib/spice_session.py
+PLASMAG 2024 Software, LPP
+"""
+import hashlib
+import inspect
+import os
+
+import numpy as np
+import PySpice.Logging.Logging as Logging
+from PySpice.Spice.NgSpice.Shared import NgSpiceShared
+
+from src.model.cache import DiskResultCache
+
+# Results of the SPICE analyses, kept across the sessions of the application
+SPICE_CACHE_DIR = os.environ.get("PLASMAG_SPICE_CACHE_DIR",
+                                 os.path.join(os.path.expanduser("~"), ".cache", "plasmag", "spice"))
+SPICE_CACHE_MAX_BYTES = int(os.environ.get("PLASMAG_SPICE_CACHE_MAX_BYTES", 256 * 1024 ** 2))
+SPICE_CACHE = DiskResultCache(SPICE_CACHE_DIR, SPICE_CACHE_MAX_BYTES)
+
+# The sessions of the current process, keyed by template name and temperature. They live as long as the process:
+# the engine process with the default SerialExecutor, or each worker of the process pool of a ParallelExecutor.
+_SESSIONS = {}
+_active_session = None
+_logger = None
+
+# Digests of the files included by the netlists (device models), keyed by path, with the modification time and
+# size of the file they were computed for
+_INCLUDE_DIGESTS = {}
+
+
+def ngspice_available() -> bool:
+    """
+    Tells whether the ngspice shared library can be loaded.
+    """
+    try:
+        NgSpiceShared.new_instance()
+    except (OSError, NameError):
+        return False
+    return True
+
+
+class SpiceCircuitTemplate:
+    """
+    Circuit whose structure is fixed and whose component values are given by parameters or node results.
+
+    Attributes:
+        name (str): The name of the template, identifying its sessions.
+        build (callable): Called as build(values), returns the PySpice Circuit with the given component values.
+        devices (dict): For each value name, the (device name, device parameter) to alter in the loaded circuit,
+                        e.g. {'resistance': ('R1', 'resistance')}.
+    """
+
+    def __init__(self, name: str, build, devices: dict):
+        self.name = name
+        self.build = build
+        self.devices = devices
+        self._structure_digest = None
+        self._includes = ()
+
+    def fingerprint(self, values: dict) -> str:
+        """
+        Returns the digest of the structure of the circuit, independent of its component values: the template
+        name, the source code of its build function, its devices and the content of the files its netlist
+        includes (device models).
+
+        The netlist is built once, to find the included files. Those are hashed again only when they change
+        on disk, see `file_digest`.
+
+        Parameters:
+            values (dict): The component values, used to build the netlist the first time.
+
+        Returns:
+            str: The hexadecimal digest.
+        """
+        if self._structure_digest is None:
+            netlist = str(self.build(values))
+            self._includes = tuple(line.split(None, 1)[1].strip().strip('"') for line in netlist.splitlines()
+                                   if line.lower().startswith('.include'))
+            try:
+                source = inspect.getsource(self.build)
+            except (OSError, TypeError):
+                source = self.build.__qualname__
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(repr((self.name, source, sorted(self.devices.items()), self._includes)).encode())
+            self._structure_digest = digest.hexdigest()
+
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self._structure_digest.encode())
+        for path in self._includes:
+            digest.update(file_digest(path).encode())
+        return digest.hexdigest()
+
+
+class SpiceSession:
+    """
+    Long-lived ngspice session of a circuit template. The netlist is built, parsed and loaded into the ngspice
+    shared library once. A change of the component values then alters them in place (`alter`), and only the
+    analysis is run again.
+
+    ngspice holds a single current circuit: when another session ran in between, the circuit of this session is
+    loaded again, with its current values.
+
+    Attributes:
+        template (SpiceCircuitTemplate): The circuit template.
+        temperature (float): The simulation temperature, in degrees Celsius.
+        values (dict): The current component values, keyed by value name.
+        ngspice (NgSpiceShared): The ngspice shared library.
+        simulator: The PySpice simulator of the circuit, used to convert the ngspice plots into analyses.
+    """
+
+    def __init__(self, template: SpiceCircuitTemplate, values: dict, temperature: float):
+        global _logger
+        if _logger is None:
+            _logger = Logging.setup_logging()
+
+        self.template = template
+        self.temperature = temperature
+        self.values = dict(values)
+        self.ngspice = NgSpiceShared.new_instance()
+        circuit = template.build(self.values)
+        self.simulator = circuit.simulator(temperature=temperature, nominal_temperature=25,
+                                           simulator='ngspice-shared', ngspice_shared=self.ngspice)
+        self._netlist = str(self.simulator)
+        self._netlist_values = dict(self.values)
+
+    def activate(self):
+        """
+        Makes the circuit of this session the current circuit of ngspice, loading it if needed.
+        """
+        global _active_session
+        if _active_session is self:
+            return
+        if _active_session is not None:
+            self.ngspice.remove_circuit()
+        self.ngspice.load_circuit(self._netlist)
+        _active_session = self
+
+        # The netlist holds the values the session was created with
+        current_values, self.values = self.values, dict(self._netlist_values)
+        self.set_values(current_values)
+
+    def set_values(self, values: dict):
+        """
+        Alters the component values which changed since the last analysis.
+
+        Parameters:
+            values (dict): The component values, keyed by value name.
+        """
+        for name, value in values.items():
+            if self.values.get(name) != value:
+                device, parameter = self.template.devices[name]
+                self.ngspice.alter_device(device, **{parameter: value})
+                self.values[name] = value
+
+    def run(self, values: dict, command: str):
+        """
+        Runs an analysis command with the given component values.
+
+        Parameters:
+            values (dict): The component values, keyed by value name.
+            command (str): The ngspice analysis command, see `simulate`.
+
+        Returns:
+            Plot: The vectors of the analysis, see `read_vectors`. They reference the ngspice memory: they are
+                  valid until the next analysis of any session and must be copied to be kept.
+
+        Raises:
+            NameError: If the simulation failed.
+        """
+        self.activate()
+        self.set_values(values)
+        # Release the plots of the previous analyses
+        self.ngspice.destroy()
+        self.ngspice.exec_command(command)
+
+        plot_name = self.ngspice.last_plot
+        if plot_name == 'const':
+            raise NameError(f'Simulation failed: {command}')
+        if plot_name.startswith('noise'):
+            # A noise analysis ends with the plot of the integrated noise, the spectra are in the other noise plot
+            plot_name = next(name for name in self.ngspice.plot_names
+                             if name.startswith('noise') and name != plot_name)
+        return self.ngspice.plot(self.simulator, plot_name)
+
+
+def get_session(template: SpiceCircuitTemplate, values: dict, temperature: float) -> SpiceSession:
+    """
+    Returns the session of a circuit template at a temperature, creating it on first use.
+    The temperature is applied when the netlist is parsed, a new temperature therefore opens a new session.
+
+    Parameters:
+        template (SpiceCircuitTemplate): The circuit template.
+        values (dict): The component values, used to build the netlist of a new session.
+        temperature (float): The simulation temperature, in degrees Celsius.
+
+    Returns:
+        SpiceSession: The session.
+    """
+    key = (template.name, temperature)
+    session = _SESSIONS.get(key)
+    if session is None:
+        session = _SESSIONS[key] = SpiceSession(template, values, temperature)
+    return session
+
+
+def ac_command(variation: str, number_of_points: int, start_frequency: float, stop_frequency: float) -> str:
+    """
+    Returns the ngspice command of a small-signal AC analysis.
+    """
+    return f'ac {variation} {int(number_of_points)} {start_frequency} {stop_frequency}'
+
+
+def noise_command(output_node: str, ref_node: str, source: str, variation: str, number_of_points: int,
+                  start_frequency: float, stop_frequency: float) -> str:
+    """
+    Returns the ngspice command of a noise analysis.
+    """
+    ref = f', {ref_node}' if ref_node else ''
+    return (f'noise v({output_node}{ref}) {source} {variation} {int(number_of_points)} '
+            f'{start_frequency} {stop_frequency}')
+
+
+def transient_command(step_time: float, end_time: float) -> str:
+    """
+    Returns the ngspice command of a transient analysis.
+    """
+    return f'tran {step_time} {end_time}'
+
+
+def aligned_sweep(frequency_vector) -> tuple[int, float, float]:
+    """
+    Returns the settings of a logarithmic ('dec') sweep aligned to a frequency vector of the engine: it spans
+    the vector with no more points than it has, at its average density. For a log-spaced vector the sweep has
+    the same density, so that resampling the analysis onto the vector (see `resample_loglog`) loses no detail.
+
+    An ngspice sweep is uniform: for a non-uniform vector, such as the adaptive grid (see
+    `AdaptiveFrequencyVectorStrategy`), sweeping at its finest resolution would simulate the whole band at the
+    density of its refined intervals, more points than the uniform grid it replaces. The density is therefore
+    capped to the average one, at the cost of resolving the features the grid refines (the resonance) less
+    finely than the grid, the curve being interpolated between the points of the sweep.
+
+    Parameters:
+        frequency_vector (np.ndarray): The increasing frequencies, at least two.
+
+    Returns:
+        tuple: The (number of points per decade, start frequency, stop frequency) of the sweep.
+    """
+    log_frequency = np.log10(frequency_vector)
+    decades = log_frequency[-1] - log_frequency[0]
+    # The tolerance absorbs the rounding of a log-spaced vector, whose steps are all equal
+    points_per_decade = max(1, int(np.ceil((len(log_frequency) - 1) / decades - 1e-6)))
+    return points_per_decade, float(frequency_vector[0]), float(frequency_vector[-1])
+
+
+def file_digest(path: str) -> str:
+    """
+    Returns the digest of the content of a file, read again only when its modification time or size changed.
+    A missing file has an empty digest: ngspice reports it when the circuit is loaded.
+    """
+    try:
+        status = os.stat(path)
+    except OSError:
+        return ''
+    stamp = (status.st_mtime_ns, status.st_size)
+    cached = _INCLUDE_DIGESTS.get(path)
+    if cached is None or cached[0] != stamp:
+        with open(path, 'rb') as file:
+            cached = _INCLUDE_DIGESTS[path] = (stamp, hashlib.blake2b(file.read(), digest_size=16).hexdigest())
+    return cached[1]
+
+
+def analysis_fingerprint(template: SpiceCircuitTemplate, values: dict, command: str, temperature: float,
+                         vectors) -> str:
+    """
+    Returns the digest identifying the result of an analysis: the structure of the circuit (see
+    `SpiceCircuitTemplate.fingerprint`), its component values, the analysis command, holding its type and
+    frequency settings, the temperature and the names of the vectors kept.
+
+    Parameters:
+        template (SpiceCircuitTemplate): The circuit template.
+        values (dict): The component values, keyed by value name.
+        command (str): The ngspice analysis command, see `ac_command`.
+        temperature (float): The simulation temperature, in degrees Celsius.
+        vectors (iterable): The names of the vectors kept from the analysis.
+
+    Returns:
+        str: The hexadecimal digest.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(template.fingerprint(values).encode())
+    digest.update(repr((sorted((name, float(value)) for name, value in values.items()),
+                        command, float(temperature), tuple(vectors))).encode())
+    return digest.hexdigest()
+
+
+def read_vectors(plot, vectors) -> dict:
+    """
+    Copies the scale ('frequency' or 'time') and the requested vectors of an ngspice plot into arrays.
+
+    Parameters:
+        plot (Plot): The plot of an analysis, see `SpiceSession.run`.
+        vectors (iterable): The names of the vectors: ngspice names (e.g. 'onoise_spectrum'), node names or,
+                            for branch currents, source names (e.g. 'vr2_plus'). Case insensitive.
+
+    Returns:
+        dict: The arrays, keyed by the scale name and the requested names.
+
+    Raises:
+        KeyError: If a vector is not in the plot.
+    """
+    by_name = {name.lower(): vector for name, vector in plot.items()}
+    by_name.update({vector.simplified_name.lower(): vector for vector in plot.values()})
+    arrays = {}
+    for scale in ('frequency', 'time'):
+        if scale in by_name:
+            arrays[scale] = np.array(by_name[scale].to_waveform(to_real=True), dtype=float)
+    for name in vectors:
+        if name.lower() not in by_name:
+            raise KeyError(f"Vector {name} not found in the {plot.plot_name} plot")
+        arrays[name] = np.array(by_name[name.lower()].to_waveform())
+    return arrays
+
+
+def simulate(template: SpiceCircuitTemplate, values: dict, temperature: float, command: str, vectors,
+             cache: DiskResultCache = None) -> dict:
+    """
+    Runs an analysis of a circuit template and returns copies of its scale (frequency or time) and of the
+    requested vectors.
+
+    The results are kept in the disk cache, keyed by `analysis_fingerprint`: the same design simulated again,
+    in this or a later session of the application, is read from the cache without running ngspice.
+
+    Parameters:
+        template (SpiceCircuitTemplate): The circuit template.
+        values (dict): The component values, keyed by value name.
+        temperature (float): The simulation temperature, in degrees Celsius.
+        command (str): The ngspice analysis command, see `ac_command`, `noise_command` and
+                       `transient_command`.
+        vectors (iterable): The names of the vectors to return, see `read_vectors`.
+        cache (DiskResultCache, optional): The cache of the results. Defaults to SPICE_CACHE.
+
+    Returns:
+        dict: The 'frequency' (or 'time') array and the array of each requested vector, keyed by name.
+    """
+    cache = SPICE_CACHE if cache is None else cache
+    vectors = list(vectors)
+    key = analysis_fingerprint(template, values, command, temperature, vectors)
+    found, arrays = cache.get(key)
+    if found:
+        return arrays
+
+    arrays = read_vectors(get_session(template, values, temperature).run(values, command), vectors)
+    try:
+        cache.put(key, arrays)
+    except OSError as e:
+        print(f"SPICE results not cached: {e}")
+    return arrays
+
+
+def simulate_batch(template: SpiceCircuitTemplate, runs: list, vectors, cache: DiskResultCache = None) -> list:
+    """
+    Runs the analyses of a batch of designs of a circuit template, e.g. the rows of a batched engine run or the
+    points of a sweep. See `simulate` for a single design.
+
+    The circuit is loaded once per temperature, in the persistent session of the process, and each design is
+    then only an `alter` of its component values followed by its analysis: the designs are run in the order of
+    their temperature, so that the loaded circuit is not swapped between them. The designs already simulated
+    are read from the disk cache.
+
+    Parameters:
+        template (SpiceCircuitTemplate): The circuit template.
+        runs (list): The designs, as (values, temperature, command) tuples, see `simulate`.
+        vectors (iterable): The names of the vectors to return, see `read_vectors`.
+        cache (DiskResultCache, optional): The cache of the results. Defaults to SPICE_CACHE.
+
+    Returns:
+        list: For each design, in the order of `runs`, its scale and requested vectors, see `simulate`.
+    """
+    vectors = list(vectors)
+    results = [None] * len(runs)
+    order = sorted(range(len(runs)), key=lambda index: runs[index][1])
+    for index in order:
+        values, temperature, command = runs[index]
+        results[index] = simulate(template, values, temperature, command, vectors, cache)
+    return results
@@ -0,0 +1,361 @@
+"""
+src/model/strategies/symbolic.py
+PLASMAG 2024 Software, LPP
+"""
+import operator
+
+import numpy as np
+
+from .generic_strategy import CalculationStrategy
+from .tensor import stack_columns
+
+
+class Expr:
+    """
+    Node of a symbolic expression over the dependencies of a strategy, built with the usual Python operators:
+    >> R, C, omega = Symbol('resistance'), Symbol('capacitance'), Symbol('omega')
+    >> expression = (R * C * omega) ** 2
+
+    Expressions are hash-consed: building the same operation on the same operands twice returns the same node.
+    Identical subexpressions, within a formula or across the formulas of different strategies, are therefore
+    a single node, which is evaluated once (see `Program`).
+    Equality and hashing are by identity, so nodes can be used as dictionary keys.
+
+    Attributes:
+        op (str): The operation: "symbol", "constant", an operator ("add", "mul", ...) or a function ("sqrt", ...).
+        args (tuple): The operands of the operation, the name and column of a symbol, or the value of a constant.
+    """
+
+    __slots__ = ("op", "args")
+    _table = {}
+
+    def __new__(cls, op, *args):
+        # The types are part of the key, so that e.g. the constants 2 and 2.0 stay distinct
+        key = (op, args, tuple(type(arg) for arg in args))
+        expr = cls._table.get(key)
+        if expr is None:
+            expr = super().__new__(cls)
+            expr.op = op
+            expr.args = args
+            cls._table[key] = expr
+        return expr
+
+    def __add__(self, other):
+        return Expr("add", self, as_expr(other))
+
+    def __radd__(self, other):
+        return Expr("add", as_expr(other), self)
+
+    def __sub__(self, other):
+        return Expr("sub", self, as_expr(other))
+
+    def __rsub__(self, other):
+        return Expr("sub", as_expr(other), self)
+
+    def __mul__(self, other):
+        return Expr("mul", self, as_expr(other))
+
+    def __rmul__(self, other):
+        return Expr("mul", as_expr(other), self)
+
+    def __truediv__(self, other):
+        return Expr("truediv", self, as_expr(other))
+
+    def __rtruediv__(self, other):
+        return Expr("truediv", as_expr(other), self)
+
+    def __pow__(self, other):
+        return Expr("pow", self, as_expr(other))
+
+    def __rpow__(self, other):
+        return Expr("pow", as_expr(other), self)
+
+    def __neg__(self):
+        return Expr("neg", self)
+
+    def __repr__(self):
+        if self.op == "symbol":
+            name, column = self.args
+            return name if column is None else f"{name}[{column}]"
+        if self.op == "constant":
+            return repr(self.args[0])
+        return f"{self.op}({', '.join(repr(arg) for arg in self.args)})"
+
+
+def Symbol(name: str, column: int = None) -> Expr:
+    """
+    Returns the symbol of a dependency: a parameter, or the result of another node.
+
+    Parameters:
+        name (str): The name of the dependency.
+        column (int, optional): For a frequency-domain result, the column to read, e.g. 1 for the values of
+                                an (N, 2) result. Defaults to None, the whole data of the result.
+
+    Returns:
+        Expr: The symbol.
+    """
+    return Expr("symbol", name, column)
+
+
+def as_expr(value) -> Expr:
+    """
+    Returns the value itself if it is an expression, otherwise a constant expression holding it.
+    """
+    return value if isinstance(value, Expr) else Expr("constant", value)
+
+
+def sqrt(expr) -> Expr:
+    return Expr("sqrt", as_expr(expr))
+
+
+def log10(expr) -> Expr:
+    return Expr("log10", as_expr(expr))
+
+
+def exp(expr) -> Expr:
+    return Expr("exp", as_expr(expr))
+
+
+OPERATIONS = {
+    "add": operator.add,
+    "sub": operator.sub,
+    "mul": operator.mul,
+    "truediv": operator.truediv,
+    "pow": operator.pow,
+    "neg": operator.neg,
+    "sqrt": np.sqrt,
+    "log10": np.log10,
+    "exp": np.exp,
+}
+
+
+def compile_expressions(expressions) -> list[Expr]:
+    """
+    Compiles expressions into a flat program: the list of their distinct subexpressions in evaluation order,
+    each operand before the operations using it. A subexpression shared by several expressions appears once.
+
+    Parameters:
+        expressions (iterable): The expressions to compile.
+
+    Returns:
+        list[Expr]: The program.
+    """
+    program = []
+    visited = set()
+    for expression in expressions:
+        stack = [(expression, False)]
+        while stack:
+            expr, operands_done = stack.pop()
+            if expr in visited:
+                continue
+            if operands_done or expr.op in ("symbol", "constant"):
+                visited.add(expr)
+                program.append(expr)
+            else:
+                stack.append((expr, True))
+                stack.extend((arg, False) for arg in reversed(expr.args) if arg not in visited)
+    return program
+
+
+# Ufuncs of the operations which can write their result into the buffer of an operand
+IN_PLACE_OPERATIONS = {
+    "add": np.add,
+    "sub": np.subtract,
+    "mul": np.multiply,
+    "truediv": np.divide,
+    "neg": np.negative,
+    "sqrt": np.sqrt,
+    "log10": np.log10,
+    "exp": np.exp,
+}
+
+# Exponents computed by NumPy with a dedicated ufunc, `x ** 2` being `np.square(x)`
+IN_PLACE_POWERS = {2: np.square, 0.5: np.sqrt}
+
+# Number of symbolic strategy classes whose program contains each operation
+_PROGRAM_USES = {}
+
+
+class Program:
+    """
+    Expressions compiled for evaluation with NumPy, one operation per distinct subexpression.
+
+    The operations shared with the programs of other symbolic strategies are looked up in, or stored to,
+    the memo of the engine, so they are evaluated once per run. The other intermediate values are released as
+    soon as they are no longer needed, and their buffers are reused for the results of the next operations,
+    keeping the memory footprint of a formula to a few arrays.
+
+    Attributes:
+        outputs (list[Expr]): The compiled expressions.
+        steps (list[Expr]): The distinct subexpressions in evaluation order, see `compile_expressions`.
+        releases (list[list[Expr]]): For each step, the intermediate values which can be released after it.
+    """
+
+    def __init__(self, expressions):
+        self.outputs = list(expressions)
+        self.steps = compile_expressions(self.outputs)
+
+        last_use = {}
+        for index, expr in enumerate(self.steps):
+            if expr.op not in ("symbol", "constant"):
+                for arg in expr.args:
+                    last_use[arg] = index
+        self.releases = [[] for _ in self.steps]
+        for expr, index in last_use.items():
+            if expr not in self.outputs:
+                self.releases[index].append(expr)
+
+    def register(self):
+        """
+        Counts the operations of the program as used by one more symbolic strategy.
+        """
+        for expr in self.steps:
+            if expr.op not in ("symbol", "constant"):
+                _PROGRAM_USES[expr] = _PROGRAM_USES.get(expr, 0) + 1
+
+    def evaluate(self, read_symbol, memo: dict = None) -> list:
+        """
+        Evaluates the program.
+
+        Parameters:
+            read_symbol (callable): Called as read_symbol(name, column), returns the value of a symbol.
+            memo (dict, optional): The values of the shared subexpressions already evaluated during the run,
+                                   keyed by expression. Completed in place.
+
+        Returns:
+            list: The values of the output expressions.
+        """
+        values = {}
+        for expr, releases in zip(self.steps, self.releases):
+            if expr.op == "symbol":
+                values[expr] = read_symbol(*expr.args)
+            elif expr.op == "constant":
+                values[expr] = expr.args[0]
+            elif memo is not None and _PROGRAM_USES.get(expr, 0) > 1:
+                value = memo.get(expr)
+                if value is None:
+                    value = memo[expr] = self._calculate(expr, values, releases, memo)
+                values[expr] = value
+            else:
+                values[expr] = self._calculate(expr, values, releases, memo)
+            for released in releases:
+                del values[released]
+        return [values[expr] for expr in self.outputs]
+
+    @staticmethod
+    def _calculate(expr, values, releases, memo):
+        """
+        Calculates an operation. When an operand is an intermediate array released after this step, with the shape
+        and type of the result, the result is written into it instead of a new array.
+        """
+        operands = [values[arg] for arg in expr.args]
+        function = IN_PLACE_OPERATIONS.get(expr.op)
+        if expr.op == "pow" and not isinstance(operands[1], np.ndarray):
+            function = IN_PLACE_POWERS.get(operands[1])
+            operands = operands[:1]
+        if function is not None:
+            for arg, operand in zip(expr.args, operands):
+                if arg in releases and arg.op not in ("symbol", "constant") \
+                        and not (memo is not None and _PROGRAM_USES.get(arg, 0) > 1) \
+                        and isinstance(operand, np.ndarray) and operand.dtype.kind == "f" \
+                        and np.broadcast_shapes(*[np.shape(item) for item in operands]) == operand.shape \
+                        and np.result_type(*operands) == operand.dtype:
+                    return function(*operands, out=operand)
+        return OPERATIONS[expr.op](*[values[arg] for arg in expr.args])
+
+
+class ExpressionMemo(dict):
+    """
+    The values of the subexpressions evaluated by the symbolic strategies of an engine during a run, shared
+    between its nodes: a subexpression common to the formulas of several nodes is evaluated once per run.
+
+    Only the subexpressions used by several symbolic strategies are stored. Within a run every dependency has
+    a single value, the engine clears the memo at the end of each run.
+    The memo is not sent to other processes, a pickled memo is empty.
+    """
+
+    def __reduce__(self):
+        return ExpressionMemo, ()
+
+
+class SymbolicStrategy(CalculationStrategy):
+    """
+    Calculation strategy declared as symbolic expressions over its dependencies, instead of NumPy code.
+
+    The dependencies are deduced from the symbols of the expressions. The expressions are compiled once per
+    class into a `Program`, and evaluated with NumPy against the engine memo: subexpressions shared with the
+    other symbolic strategies of the graph are evaluated once per run. The formulas shared by several
+    strategies should therefore be defined once, as module-level expressions, and reused.
+
+    Symbolic strategies are evaluated with NumPy whatever the engine backend.
+
+    Class attributes:
+        expressions (list[Expr]): One expression per output column.
+        labels (list[str]): The labels of the result.
+        units (list[str]): The units of the result.
+        frequency_column (bool): If True, the frequency vector is stacked as the first column of the result,
+                                 which has the (N, 1 + len(expressions)) shape. Otherwise, a single expression
+                                 gives its value as is, and several expressions are stacked as columns.
+
+    Attributes:
+        memo (ExpressionMemo, optional): The memo of the engine, bound by the node owning the strategy.
+        program (Program): The compiled expressions, shared by the instances of the class.
+
+    Example:
+        >> omega = Symbol('omega')
+        >> class OmegaSquaredStrategy(SymbolicStrategy):
+        >>     expressions = [omega ** 2]
+        >>     labels = ["Omega squared"]
+        >>     units = ["rad²/s²"]
+    """
+
+    expressions = []
+    labels = []
+    units = []
+    frequency_column = False
+    memo = None
+    program = Program([])
+    _dependencies = []
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.program = Program(cls.expressions)
+        cls.program.register()
+        dependencies = [expr.args[0] for expr in cls.program.steps if expr.op == "symbol"]
+        if cls.frequency_column:
+            dependencies.append('frequency_vector')
+        cls._dependencies = list(dict.fromkeys(dependencies))
+
+    def bind(self, engine):
+        super().bind(engine)
+        self.memo = engine.expression_memo
+
+    def calculate(self, dependencies: dict, parameters):
+        def read_symbol(name, column):
+            value = dependencies[name]
+            if isinstance(value, dict):
+                value = value["data"]
+            return value if column is None else value[..., column]
+
+        values = self.program.evaluate(read_symbol, self.memo)
+
+        if self.frequency_column:
+            data = stack_columns((dependencies['frequency_vector']["data"], *values))
+        elif len(values) == 1:
+            data = values[0]
+        else:
+            data = stack_columns(values)
+
+        return {
+            "data": data,
+            "labels": list(self.labels),
+            "units": list(self.units)
+        }
+
+    @classmethod
+    def get_dependencies(cls) -> list[str]:
+        return cls._dependencies
+
+    @staticmethod
+    def supports_batch():
+        return True
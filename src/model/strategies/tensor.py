@@ -0,0 +1,131 @@
+"""
+src/model/strategies/tensor.py
+PLASMAG 2024 Software, LPP
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from src.model.cache import fingerprint
+
+
+def stack_columns(columns) -> np.ndarray:
+    """
+    Stacks the columns of a frequency-domain result along the last axis, like `np.column_stack`,
+    broadcasting them against each other first.
+
+    With 1D columns of N points, the result has the usual (N, C) shape. During a batched run
+    (see `CalculationEngine.run_batch`) the columns may carry a leading batch axis, e.g. a (K, N) gain next to
+    the shared (N,) frequency vector, and the result then has the (K, N, C) shape.
+    Columns of a result are read with `data[..., i]`, which works for both shapes.
+
+    Parameters:
+        columns (sequence): The columns to stack, first one being the frequency vector.
+
+    Returns:
+        np.ndarray: The stacked columns.
+    """
+    return np.stack(np.broadcast_arrays(*columns), axis=-1)
+
+
+def apply_stage_gain(signal, gain, power=1) -> np.ndarray:
+    """
+    Applies the linear gain of a stage to a linear magnitude, i.e. (signal * gain) ** power.
+
+    This is the linear-domain equivalent of adding the two magnitudes in dB and converting the sum back,
+    10 ** ((20 * log10(signal) + 20 * log10(gain)) / 20), without the logarithms and exponentials.
+    The result is allocated once and the power is applied in place.
+
+    Parameters:
+        signal (np.ndarray): The linear magnitude, e.g. a transfer function or a noise density.
+        gain (np.ndarray): The linear gain of the stage, broadcast against the signal.
+        power (float): The power the product is raised to, e.g. 2 for a density in V²/Hz. Defaults to 1.
+
+    Returns:
+        np.ndarray: The filtered magnitude.
+    """
+    result = np.multiply(signal, gain, dtype=float)
+    if power != 1:
+        np.power(result, power, out=result)
+    return result
+
+
+def remove_stage_gain(signal, gain, power=1) -> np.ndarray:
+    """
+    Divides a linear magnitude by the linear gain of a stage, i.e. (signal / gain) ** power.
+
+    This is the linear-domain equivalent of subtracting the two magnitudes in dB and converting the difference
+    back, see `apply_stage_gain`.
+
+    Parameters:
+        signal (np.ndarray): The linear magnitude, e.g. a noise density.
+        gain (np.ndarray): The linear gain to remove, broadcast against the signal.
+        power (float): The power the ratio is raised to. Defaults to 1.
+
+    Returns:
+        np.ndarray: The ratio.
+    """
+    result = np.divide(signal, gain, dtype=float)
+    if power != 1:
+        np.power(result, power, out=result)
+    return result
+
+
+# Interpolation indices and weights of the recent resamplings, see `resample_loglog`
+_RESAMPLING_WEIGHTS = OrderedDict()
+_RESAMPLING_WEIGHTS_SIZE = 32
+_resampling_lock = threading.Lock()
+
+
+def _loglog_weights(source_frequency: np.ndarray, target_frequency: np.ndarray) -> tuple:
+    """
+    Returns the index of the lower source point bracketing each target frequency, and the weight of the upper
+    point, in log-frequency. Computed once per pair of frequency vectors.
+    """
+    key = (fingerprint(source_frequency), fingerprint(target_frequency))
+    with _resampling_lock:
+        weights = _RESAMPLING_WEIGHTS.get(key)
+        if weights is not None:
+            _RESAMPLING_WEIGHTS.move_to_end(key)
+            return weights
+
+    log_source = np.log10(source_frequency)
+    log_target = np.clip(np.log10(target_frequency), log_source[0], log_source[-1])
+    index = np.clip(np.searchsorted(log_source, log_target, side='right') - 1, 0, len(log_source) - 2)
+    weight = (log_target - log_source[index]) / (log_source[index + 1] - log_source[index])
+    weights = (index, weight)
+
+    with _resampling_lock:
+        _RESAMPLING_WEIGHTS[key] = weights
+        while len(_RESAMPLING_WEIGHTS) > _RESAMPLING_WEIGHTS_SIZE:
+            _RESAMPLING_WEIGHTS.popitem(last=False)
+    return weights
+
+
+def resample_loglog(source_frequency, values, target_frequency) -> np.ndarray:
+    """
+    Resamples a frequency-domain curve onto other frequencies, interpolating linearly in log-log space, i.e.
+    along the straight lines of a Bode plot: power laws (e.g. -20 dB/decade slopes) are resampled exactly,
+    where a linear interpolation of sparse log-spaced points overshoots between them.
+    Curves with non-positive values are interpolated linearly in log-frequency only. Beyond the source
+    frequencies the end values are repeated, like `np.interp`.
+
+    The interpolation indices and weights of a pair of frequency vectors are cached: curves simulated on the same
+    sweep are resampled with a single gather and blend.
+
+    Parameters:
+        source_frequency (np.ndarray): The increasing frequencies of the curve, at least two.
+        values (np.ndarray): The curve at the source frequencies.
+        target_frequency (np.ndarray): The frequencies to resample the curve at.
+
+    Returns:
+        np.ndarray: The curve at the target frequencies.
+    """
+    index, weight = _loglog_weights(np.asarray(source_frequency, dtype=float),
+                                    np.asarray(target_frequency, dtype=float))
+    values = np.asarray(values)
+    lower, upper = values[index], values[index + 1]
+    if np.all(values > 0):
+        return np.exp(np.log(lower) + weight * (np.log(upper) - np.log(lower)))
+    return lower + weight * (upper - lower)
@@ -0,0 +1,143 @@
+"""
+src/model/tracing.py
+PLASMAG 2024 Software, LPP
+"""
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+
+class Tracer:
+    """
+    Opt-in recorder of nested timing spans, exported in the Chrome trace-event format.
+    The exported JSON file can be opened in chrome://tracing or https://ui.perfetto.dev to display the timeline
+    of a calculation, from the GUI event down to each node of the engine.
+
+    Recording is disabled by default. While disabled, `span` returns a shared no-op context manager and `complete`
+    returns immediately, so the instrumentation points can stay in the code.
+
+    Attributes:
+        enabled (bool): Whether spans are recorded.
+        events (list): The recorded trace events.
+
+    Example:
+        >> tracer.start()
+        >> with tracer.span("update_parameters", "controller"):
+        >>     ...
+        >> tracer.stop()
+        >> tracer.save("trace.json")
+    """
+
+    _NO_SPAN = contextlib.nullcontext()
+
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def start(self):
+        """
+        Clears the previous events and starts recording.
+        """
+        with self._lock:
+            self.events = []
+        self._origin = time.perf_counter()
+        self.enabled = True
+
+    def stop(self):
+        """
+        Stops recording, the recorded events are kept until the next `start` call.
+        """
+        self.enabled = False
+
+    def span(self, name: str, category: str = "", **args):
+        """
+        Returns a context manager recording the time spent in its block as a span.
+
+        Parameters:
+            name (str): The name of the span, e.g. the method or node name.
+            category (str): The category of the span, e.g. "gui", "controller", "engine" or "node".
+            **args: Extra information displayed with the span.
+
+        Returns:
+            A context manager.
+        """
+        if not self.enabled:
+            return self._NO_SPAN
+        return self._span(name, category, args)
+
+    @contextlib.contextmanager
+    def _span(self, name, category, args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.complete(name, category, start, time.perf_counter() - start, **args)
+
+    def complete(self, name: str, category: str, start: float, duration: float, **args):
+        """
+        Records a span already timed by the caller, e.g. with the timings of the engine statistics.
+
+        Parameters:
+            name (str): The name of the span.
+            category (str): The category of the span.
+            start (float): The `time.perf_counter()` value at the beginning of the span.
+            duration (float): The duration of the span, in seconds.
+            **args: Extra information displayed with the span.
+        """
+        if not self.enabled:
+            return
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (start - self._origin) * 1e6,
+            "dur": duration * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = {key: str(value) for key, value in args.items()}
+        with self._lock:
+            self.events.append(event)
+
+    def save(self, path: str):
+        """
+        Writes the recorded events to a trace-event JSON file.
+
+        Parameters:
+            path (str): The path of the JSON file.
+        """
+        with self._lock:
+            events = list(self.events)
+        with open(path, 'w') as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+
+tracer = Tracer()
+
+
+def traced(category: str = ""):
+    """
+    Decorator recording each call of a function or method as a span of the global tracer,
+    named after the function qualified name. Only an attribute check is added while tracing is disabled.
+
+    Parameters:
+        category (str): The category of the spans, e.g. "gui", "controller" or "engine".
+
+    Returns:
+        The decorator.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return function(*args, **kwargs)
+            with tracer.span(function.__qualname__, category):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
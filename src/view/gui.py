@@ -30,6 +30,7 @@ from matplotlib.figure import Figure
 
 from qtrangeslider import QRangeSlider
 from src.controler.controller import CalculationController, STRATEGY_MAP
+from src.model.tracing import tracer, traced
 
 from src.model.visualisation.create_tree import create_tree, add_title_description
 
@@ -495,9 +496,12 @@ class MainGUI(QMainWindow):
     def init_controller(self, backups_count=3):
         """
         Initializes the CalculationController for handling the calculation logic.
+        The node results cache size is read from the "cache_size_mb" configuration key (0 disables the cache).
         :return:
         """
-        self.controller = CalculationController(backups_count=backups_count)
+        cache_size_mb = self.config_dict.get("cache_size_mb", 0) if self.config_dict is not None else 0
+        self.controller = CalculationController(backups_count=backups_count,
+                                                cache_max_bytes=int(cache_size_mb * 1024 ** 2) or None)
 
         for parameter, line_edit in self.inputs.items():
             line_edit.mousePressEvent = (lambda event, le=line_edit,
@@ -742,17 +746,15 @@ class MainGUI(QMainWindow):
         if strategy is not None:
             strategies_loaded = self.load_strategy(strategy)
             if strategies_loaded:
-                for strategy_name, strategy_instance in strategies_loaded.items():
-                    self.saved_spice_strategies.append(strategy_name)
-                    print(f"Loaded strategy {strategy_name}")
-                    print(type(strategy_instance))
-                    print(strategy_instance)
-                    self.update_node_strategy(strategy_name, strategy_instance)
-
-                    if not self.first_run:
-                        progress_value += 1
-                        progress_dialog.setValue(progress_value)
-                        QApplication.processEvents()
+                # Load all the circuit strategies at once: the graph is validated and recalculated a single time
+                self.saved_spice_strategies.extend(strategies_loaded)
+                print(f"Loaded strategies {list(strategies_loaded)}")
+                self.update_node_strategies(strategies_loaded, recalculate=False)
+
+                if not self.first_run:
+                    progress_value += len(strategies_loaded)
+                    progress_dialog.setValue(progress_value)
+                    QApplication.processEvents()
 
         if not self.first_run:
             progress_dialog.setValue(num_strategies)
@@ -940,6 +942,10 @@ class MainGUI(QMainWindow):
         change_plot_count_action = options_menu.addAction('Change Plot Count')
         change_plot_count_action.triggered.connect(self.change_plot_count)
 
+        record_timeline_action = options_menu.addAction('Record Timeline')
+        record_timeline_action.setCheckable(True)
+        record_timeline_action.toggled.connect(self.toggle_timeline_recording)
+
         help_menu = main_menu.addMenu('&Help')
         about_action = help_menu.addAction('&About PLASMAG')
         about_action.triggered.connect(self.show_about_dialog)
@@ -947,6 +953,12 @@ class MainGUI(QMainWindow):
         export_dep_tree_action = help_menu.addAction('&Export Dependency Tree')
         export_dep_tree_action.triggered.connect(self.export_dependency_tree)
 
+        export_stats_action = help_menu.addAction('Export Engine Statistics')
+        export_stats_action.triggered.connect(self.export_engine_stats)
+
+        reset_stats_action = help_menu.addAction('Reset Engine Statistics')
+        reset_stats_action.triggered.connect(self.reset_engine_stats)
+
         display_graph_action = help_menu.addAction('Display Community Graph ')
         display_graph_action.triggered.connect(self.display_graph_community)
 
@@ -1037,6 +1049,48 @@ class MainGUI(QMainWindow):
             QMessageBox.critical(self, "Export Failed",
                                  f"An error occurred while exporting the dependency tree: {str(e)}")
 
+    def export_engine_stats(self):
+        """
+        Exports the per-node statistics of the calculation engine (time, calls, cache hits, skips, memory)
+        to a CSV file, sorted by total time.
+        """
+        try:
+            path, _ = QFileDialog.getSaveFileName(self, "Export Engine Statistics", "", "CSV Files (*.csv)")
+            if not path:
+                return
+            pd.DataFrame(self.controller.engine.stats()).to_csv(path, index=False)
+            QMessageBox.information(self, "Export Successful", "The engine statistics have been exported successfully.")
+        except Exception as e:
+            QMessageBox.critical(self, "Export Failed",
+                                 f"An error occurred while exporting the engine statistics: {str(e)}")
+
+    def toggle_timeline_recording(self, checked):
+        """
+        Starts recording a timeline of the calculations (GUI, controller, engine and node spans), or stops it
+        and exports it to a trace-event JSON file, to be opened in chrome://tracing or https://ui.perfetto.dev.
+        :param checked: True to start recording, False to stop and export
+        """
+        if checked:
+            tracer.start()
+            return
+
+        tracer.stop()
+        path, _ = QFileDialog.getSaveFileName(self, "Export Timeline", "", "JSON Files (*.json)")
+        if not path:
+            return
+        try:
+            tracer.save(path)
+            QMessageBox.information(self, "Export Successful", "The timeline has been exported successfully.")
+        except Exception as e:
+            QMessageBox.critical(self, "Export Failed", f"An error occurred while exporting the timeline: {str(e)}")
+
+    def reset_engine_stats(self):
+        """
+        Clears the per-node statistics of the calculation engine (time, calls, cache hits, skips, memory),
+        so that the next export only covers the calculations made from now on.
+        """
+        self.controller.engine.reset_stats()
+
     def change_plot_count(self):
         num, ok = QInputDialog.getInt(self, "Change Plot Count", "Number of Plots:", min=1, max=5, step=1)
         if ok and num != len(self.canvases):
@@ -1097,6 +1151,10 @@ class MainGUI(QMainWindow):
         if not fileName:
             return  # User canceled the dialog
 
+        # Calculate the results left stale by the plot-driven calculations
+        self.controller.compute(self.controller.get_available_results())
+        self.latest_results = self.controller.get_current_results()
+
         frequency_vector = (self.latest_results.get('frequency_vector', []))["data"]
         headers = ['Frequency'] if len(frequency_vector) else []
         data = [frequency_vector] if len(frequency_vector) else []
@@ -1275,6 +1333,7 @@ class MainGUI(QMainWindow):
             f"Frequency Start: {self.f_start_value}, Frequency Stop: {self.f_stop_value}")
         self.calculation_timer.start()
 
+    @traced("gui")
     def delayed_calculate(self):
         """
         Performs calculation after a delay to avoid UI lag during slider adjustments.
@@ -1389,6 +1448,7 @@ class MainGUI(QMainWindow):
         except RuntimeError as e:
             print(f"Error updating input value: {e}")
 
+    @traced("gui")
     def retrieve_parameters(self):
         params_dict = {}
 
@@ -1420,6 +1480,7 @@ class MainGUI(QMainWindow):
 
         return params_dict
 
+    @traced("gui")
     def calculate(self):
         """
         Gathers the current parameter values from the input fields, initiates the calculation process through
@@ -1433,10 +1494,21 @@ class MainGUI(QMainWindow):
         params_dict = self.retrieve_parameters()
 
         if hasattr(self.controller, 'update_parameters'):
-            self.controller.update_parameters(params_dict)
+            self.controller.update_parameters(params_dict, self.get_plot_targets())
 
         self.on_calculation_finished(self.controller.get_current_results())
 
+    def get_plot_targets(self):
+        """
+        Returns the results needed by the plots: the keys selected in the comboboxes and the frequency vector.
+        The other results are only calculated when they are selected.
+        :return: list of result names, or None to calculate all the results (no plot selection yet)
+        """
+        selected_keys = [combo_box.currentText() for combo_box in self.comboboxes if combo_box.currentText()]
+        if not selected_keys:
+            return None
+        return selected_keys + ['frequency_vector']
+
     def on_calculation_finished(self, calculation_results):
         """
         Callback method for handling the completion of the calculation process.
@@ -1459,6 +1531,7 @@ class MainGUI(QMainWindow):
 
         QMessageBox.critical(self, "An error occurred", f"Calculation failed: {error_message}")
 
+    @traced("gui")
     def update_plot(self, index):
         def plot_curve(data_with_meta, x_vector, linestyle='-', color=None):
             """Plot a curve with metadata based on either frequency or time."""
@@ -1494,6 +1567,8 @@ class MainGUI(QMainWindow):
 
             canvas.axes.clear()  # Clear the canvas for new plotting
 
+            # The selected result may be stale if it was not plotted during the last calculation
+            self.controller.compute([selected_key, 'frequency_vector'])
             current_results = self.controller.get_current_results()
             old_results = self.controller.get_old_results()
 
@@ -1532,7 +1607,8 @@ class MainGUI(QMainWindow):
 
             canvas.axes.grid(which='both')
             canvas.axes.legend()
-            canvas.draw()
+            with tracer.span("canvas.draw", "gui", plot=selected_key):
+                canvas.draw()
 
     def set_labels(self, data_meta, canvas):
         """Set labels and scales based on data type."""
@@ -1547,6 +1623,7 @@ class MainGUI(QMainWindow):
             canvas.axes.set_yscale('log')
             canvas.axes.set_xscale('log')
 
+    @traced("gui")
     def plot_results(self, calculation_results):
         """
         Plots the calculation results on the canvas based on the selected key from the combo box a
@@ -1557,10 +1634,11 @@ class MainGUI(QMainWindow):
         self.latest_results = calculation_results  # Store the latest results
 
         if self.latest_results is not None:
-            available_results = list(self.latest_results.keys())
+            # Stale results are listed too, they are calculated when selected
+            available_results = self.controller.get_available_results()
         else:
             available_results = None
-        if 'frequency_vector' in available_results:
+        if available_results and 'frequency_vector' in available_results:
             available_results.remove('frequency_vector')
 
         # Loop through each plot and remember the current selection
@@ -1683,11 +1761,15 @@ class MainGUI(QMainWindow):
         self.strategy_tab.layout().addWidget(scroll_area)
 
     def update_node_strategy(self, node_name, strategy_class):
-        print("update")
-        print(strategy_class)
-        print(type(strategy_class))
         print(f"Gui - try to update strategy for {node_name} to {strategy_class.__name__}")
+        self.update_node_strategies({node_name: strategy_class})
 
+    def update_node_strategies(self, strategy_classes, recalculate=True):
+        """
+        Swaps the strategies of one or several nodes with the current input parameters.
+        :param strategy_classes: The strategy classes to use, keyed by node name.
+        :param recalculate: Whether to run the calculation and refresh the plots afterwards.
+        """
         params_dict = {}
         for category, parameters in self.input_parameters.items():
             for param, attrs in parameters.items():
@@ -1713,8 +1795,9 @@ class MainGUI(QMainWindow):
                         print(f"Invalid input for parameter '{param}': '{text}'. Skipping calculation.")
                         return
 
-        self.controller.set_node_strategy(node_name, strategy_class, params_dict)
-        self.calculate()
+        self.controller.set_node_strategies(strategy_classes, params_dict, self.get_plot_targets())
+        if recalculate:
+            self.calculate()
 
     def save_results(self, index, button):
         if self.button_states[index] == 0:
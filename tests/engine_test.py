@@ -0,0 +1,821 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from src.model.backends import kernel, numba, NumbaBackend, NUMPY_BACKEND
+from src.model.batch import split_rows
+from src.model.cache import DiskResultCache, ResultCache
+from src.model.engine import CalculationEngine
+from src.model.executors import ParallelExecutor
+from src.model.input_parameters import InputParameters
+from src.model.results import CalculationResults
+from src.model.strategies import CalculationStrategy, SymbolicStrategy, Symbol
+from src.model.strategies import symbolic
+from src.model.tracing import tracer
+
+
+class CountingStrategy(CalculationStrategy):
+    """
+    Sums its dependencies and counts how many times it has been calculated.
+    """
+
+    def __init__(self, dependencies, offset=0):
+        self.dependencies = dependencies
+        self.offset = offset
+        self.calls = 0
+
+    def calculate(self, dependencies: dict, parameters: InputParameters):
+        self.calls += 1
+        return sum(dependencies[name] for name in self.dependencies) + self.offset
+
+    def get_dependencies(self):
+        return self.dependencies
+
+    @staticmethod
+    def supports_batch():
+        return True
+
+
+class FailingStrategy(CalculationStrategy):
+    def calculate(self, dependencies: dict, parameters: InputParameters):
+        raise ZeroDivisionError("division by zero")
+
+    @staticmethod
+    def get_dependencies():
+        return ['A']
+
+
+class VectorStrategy(CalculationStrategy):
+    def calculate(self, dependencies: dict, parameters: InputParameters):
+        return np.arange(float(parameters.data['n']))
+
+    @staticmethod
+    def get_dependencies():
+        return ['n']
+
+
+class ProcessStrategy(CalculationStrategy):
+    """
+    Scales an array dependency, calculated in the process pool of the parallel executor.
+    """
+
+    def calculate(self, dependencies: dict, parameters: InputParameters):
+        vector = dependencies['vector']
+        return {"data": vector * parameters.data['x'], "read_only": not vector.flags.writeable}
+
+    @staticmethod
+    def get_dependencies():
+        return ['vector', 'x']
+
+    @staticmethod
+    def get_execution_hint():
+        return "process"
+
+
+class BackendReportingStrategy(CalculationStrategy):
+    """
+    Returns the name of the backend it is bound to, calculated in the process pool of the parallel executor.
+    """
+
+    def calculate(self, dependencies: dict, parameters: InputParameters):
+        return self.backend.name
+
+    @staticmethod
+    def get_dependencies():
+        return ['x']
+
+    @staticmethod
+    def get_execution_hint():
+        return "process"
+
+
+class TruncatingStrategy(CalculationStrategy):
+    """
+    Truncates x to its tens, absorbing the smaller changes.
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def calculate(self, dependencies: dict, parameters: InputParameters):
+        self.calls += 1
+        return parameters.data['x'] // 10 * 10
+
+    @staticmethod
+    def get_dependencies():
+        return ['x']
+
+
+class RowStrategy(CalculationStrategy):
+    """
+    Builds a small frequency-domain record from A, one parameter set at a time.
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def calculate(self, dependencies: dict, parameters: InputParameters):
+        self.calls += 1
+        value = float(dependencies['A'])
+        return {"data": np.column_stack((np.arange(3.0), np.full(3, value))), "labels": ["i", "A"], "units": ["", ""]}
+
+    @staticmethod
+    def get_dependencies():
+        return ['A']
+
+    @staticmethod
+    def supports_batch():
+        return False
+
+
+class KernelStrategy(CalculationStrategy):
+    """
+    Scales x through an element-wise kernel.
+    """
+
+    def calculate(self, dependencies: dict, parameters: InputParameters):
+        return self.scale(np.asarray(dependencies['x'], dtype=float), 2.0)
+
+    @kernel
+    def scale(x, factor):
+        return x * factor
+
+    @staticmethod
+    def get_dependencies():
+        return ['x']
+
+
+SHARED_PRODUCT = Symbol('x') * Symbol('y')
+
+
+class SumStrategy(SymbolicStrategy):
+    expressions = [SHARED_PRODUCT + Symbol('x')]
+    labels = ["sum"]
+    units = [""]
+
+
+class DifferenceStrategy(SymbolicStrategy):
+    expressions = [SHARED_PRODUCT - Symbol('y')]
+    labels = ["difference"]
+    units = [""]
+
+
+class ResultSumStrategy(CalculationStrategy):
+    """
+    Sums the data of the results of S and D.
+    """
+
+    def calculate(self, dependencies: dict, parameters: InputParameters):
+        return dependencies['S']["data"] + dependencies['D']["data"]
+
+    @staticmethod
+    def get_dependencies():
+        return ['S', 'D']
+
+
+class RecordingBackend:
+    """
+    NumPy backend recording the kernels it runs.
+    """
+
+    name = "recording"
+
+    def __init__(self):
+        self.selected = []
+
+    def select(self, selected_kernel):
+        self.selected.append(selected_kernel.__name__)
+        return selected_kernel.function
+
+    def warm_up(self):
+        pass
+
+
+def build_engine(executor=None, cache_max_bytes=None):
+    """
+    A -- B -- D
+      \\- C -/
+    """
+    engine = CalculationEngine(executor=executor, cache_max_bytes=cache_max_bytes)
+    strategies = {
+        'A': CountingStrategy(['x']),
+        'B': CountingStrategy(['A', 'y']),
+        'C': CountingStrategy(['A']),
+        'D': CountingStrategy(['B', 'C']),
+    }
+    for node_name, strategy in strategies.items():
+        engine.add_or_update_node(node_name, strategy)
+    return engine, strategies
+
+
+class TestExecutionPlan(unittest.TestCase):
+    def test_plan_is_topological(self):
+        engine, _ = build_engine()
+        plan = engine.compile_execution_plan()
+        self.assertEqual(set(plan), {'A', 'B', 'C', 'D'})
+        self.assertLess(plan.index('A'), plan.index('B'))
+        self.assertLess(plan.index('A'), plan.index('C'))
+        self.assertLess(plan.index('B'), plan.index('D'))
+        self.assertLess(plan.index('C'), plan.index('D'))
+
+    def test_update_runs_only_affected_nodes(self):
+        engine, strategies = build_engine()
+        engine.update_parameters(InputParameters({'x': 1, 'y': 2}))
+        self.assertEqual(engine.current_output_data.get_result('D'), 4)
+
+        engine.update_parameters(InputParameters({'x': 1, 'y': 5}))
+        self.assertEqual(engine.current_output_data.get_result('D'), 7)
+        self.assertEqual(strategies['A'].calls, 1)
+        self.assertEqual(strategies['C'].calls, 1)
+        self.assertEqual(strategies['B'].calls, 2)
+        self.assertEqual(strategies['D'].calls, 2)
+
+    def test_plan_recompiled_after_strategy_change(self):
+        engine, _ = build_engine()
+        engine.update_parameters(InputParameters({'x': 1, 'y': 2}))
+        engine.add_or_update_node('C', CountingStrategy(['y'], offset=10))
+        self.assertIsNone(engine.execution_plan)
+        engine.run_calculations()
+        self.assertEqual(engine.current_output_data.get_result('C'), 12)
+        self.assertLess(engine.execution_plan.index('C'), engine.execution_plan.index('D'))
+
+    def test_node_calculate_pulls_missing_dependencies(self):
+        engine, _ = build_engine()
+        engine.current_parameters = InputParameters({'x': 1, 'y': 2})
+        self.assertEqual(engine.nodes['D'].calculate(), 4)
+        self.assertEqual(engine.current_output_data.get_result('A'), 1)
+
+    def test_cycle_is_rejected(self):
+        engine, _ = build_engine()
+        self.assertRaises(Exception, engine.add_or_update_node, 'A', CountingStrategy(['D']))
+
+
+class TestLazyTargets(unittest.TestCase):
+    def test_only_targets_are_calculated(self):
+        engine, strategies = build_engine()
+        engine.update_parameters(InputParameters({'x': 1, 'y': 2}), targets=['C'])
+        self.assertEqual(engine.current_output_data.get_result('C'), 1)
+        self.assertEqual(strategies['B'].calls, 0)
+        self.assertEqual(strategies['D'].calls, 0)
+        self.assertEqual(engine.get_stale_nodes(), {'B', 'D'})
+
+        self.assertEqual(engine.compute(['D']), {'D': 4})
+        self.assertEqual(engine.get_stale_nodes(), set())
+
+    def test_affected_nodes_stay_stale_until_requested(self):
+        engine, strategies = build_engine()
+        engine.update_parameters(InputParameters({'x': 1, 'y': 2}))
+        engine.update_parameters(InputParameters({'x': 2, 'y': 2}), targets=['B'])
+        self.assertEqual(engine.current_output_data.get_result('B'), 4)
+        self.assertEqual(engine.get_stale_nodes(), {'C', 'D'})
+        self.assertEqual([strategies[name].calls for name in 'ABCD'], [2, 2, 1, 1])
+
+        # A later full update also calculates the nodes left stale
+        engine.update_parameters(InputParameters({'x': 2, 'y': 2}))
+        self.assertEqual(engine.current_output_data.get_result('D'), 6)
+        self.assertEqual(engine.get_stale_nodes(), set())
+
+    def test_save_calculates_stale_nodes(self):
+        engine, _ = build_engine()
+        engine.update_parameters(InputParameters({'x': 1, 'y': 2}), targets=['A'])
+        engine.save_calculation_results(0)
+        self.assertEqual(engine.saved_data_results[0].get_result('D'), 4)
+
+
+class TestEarlyCutoff(unittest.TestCase):
+    def build_engine(self):
+        engine = CalculationEngine()
+        strategies = {'T': TruncatingStrategy(), 'U': CountingStrategy(['T']), 'V': CountingStrategy(['U', 'y'])}
+        engine.add_or_update_nodes(strategies)
+        engine.update_parameters(InputParameters({'x': 12, 'y': 1}))
+        return engine, strategies
+
+    def test_unchanged_value_stops_propagation(self):
+        engine, strategies = self.build_engine()
+        engine.update_parameters(InputParameters({'x': 15, 'y': 1}))
+        self.assertEqual([strategies[name].calls for name in 'TUV'], [2, 1, 1])
+        self.assertEqual(engine.get_stale_nodes(), set())
+
+        engine.update_parameters(InputParameters({'x': 25, 'y': 1}))
+        self.assertEqual([strategies[name].calls for name in 'TUV'], [3, 2, 2])
+        self.assertEqual(engine.current_output_data.get_result('V'), 21)
+
+    def test_other_input_change_is_propagated(self):
+        engine, strategies = self.build_engine()
+        engine.update_parameters(InputParameters({'x': 15, 'y': 2}))
+        self.assertEqual([strategies[name].calls for name in 'TUV'], [2, 1, 2])
+        self.assertEqual(engine.current_output_data.get_result('V'), 12)
+
+    def test_cutoff_with_stale_nodes(self):
+        engine, strategies = self.build_engine()
+        engine.update_parameters(InputParameters({'x': 35, 'y': 1}), targets=['T'])
+        engine.update_parameters(InputParameters({'x': 36, 'y': 1}), targets=['T'])
+        # U was left stale by the first update, the change of T must still reach it
+        self.assertEqual(engine.compute(['V']), {'V': 31})
+
+    def test_strategy_change_is_not_cut_off(self):
+        engine, strategies = self.build_engine()
+        engine.add_or_update_node('U', CountingStrategy(['T'], offset=1))
+        engine.update_parameters(InputParameters({'x': 12, 'y': 1}))
+        self.assertEqual(engine.current_output_data.get_result('U'), 11)
+
+
+class TestStrategySwap(unittest.TestCase):
+    def test_only_downstream_nodes_are_recalculated(self):
+        engine, strategies = build_engine()
+        engine.update_parameters(InputParameters({'x': 1, 'y': 2}))
+        result_b = engine.current_output_data.get_result('B')
+
+        new_c = CountingStrategy(['A'], offset=10)
+        engine.swap_strategy_for_node('C', new_c, {'x': 1, 'y': 2})
+        self.assertEqual([strategies[name].calls for name in 'ABD'], [1, 1, 2])
+        self.assertEqual(new_c.calls, 1)
+        self.assertIs(engine.current_output_data.get_result('B'), result_b)
+        self.assertEqual(engine.current_output_data.get_result('D'), 14)
+
+        # The next update with the same parameters has nothing to calculate
+        engine.update_parameters(InputParameters({'x': 1, 'y': 2}))
+        self.assertEqual([strategies[name].calls for name in 'ABD'], [1, 1, 2])
+        self.assertEqual(new_c.calls, 1)
+
+    def test_changed_parameters_are_propagated(self):
+        engine, strategies = build_engine()
+        engine.update_parameters(InputParameters({'x': 1, 'y': 2}))
+        engine.swap_strategy_for_node('C', CountingStrategy(['A'], offset=10), {'x': 1, 'y': 5})
+        self.assertEqual(strategies['A'].calls, 1)
+        self.assertEqual(strategies['B'].calls, 2)
+        self.assertEqual(engine.current_output_data.get_result('D'), 17)
+        self.assertEqual(engine.old_output_data.get_result('D'), 4)
+
+    def test_only_targets_are_recalculated(self):
+        engine, strategies = build_engine()
+        engine.update_parameters(InputParameters({'x': 1, 'y': 2}))
+        new_c = CountingStrategy(['A'], offset=10)
+        with mock.patch.object(engine, 'build_inverse_dependencies') as rebuild:
+            engine.swap_strategy_for_node('C', new_c, {'x': 1, 'y': 2}, targets=['C'])
+        rebuild.assert_not_called()
+        self.assertEqual((new_c.calls, strategies['D'].calls), (1, 1))
+        self.assertEqual(engine.get_stale_nodes(), {'D'})
+        self.assertEqual(engine.compute(['D'])['D'], 14)
+
+    def test_cyclic_swap_is_rolled_back(self):
+        engine, strategies = build_engine()
+        engine.update_parameters(InputParameters({'x': 1, 'y': 2}))
+        self.assertRaises(Exception, engine.swap_strategies_for_nodes,
+                          {'C': CountingStrategy(['A'], offset=10), 'A': CountingStrategy(['D'])}, {'x': 1, 'y': 2})
+        self.assertIs(engine.nodes['C'].get_strategy(), strategies['C'])
+        self.assertEqual(engine.inverse_dependencies['A'], {'B', 'C', 'D'})
+
+    def test_swap_before_first_run(self):
+        engine, strategies = build_engine()
+        engine.swap_strategy_for_node('C', CountingStrategy(['A'], offset=10), {'x': 1, 'y': 2})
+        self.assertEqual(engine.current_output_data.get_result('D'), 14)
+        self.assertEqual(strategies['D'].calls, 1)
+
+
+class TestStats(unittest.TestCase):
+    def test_counters(self):
+        engine, _ = build_engine(cache_max_bytes=1 << 20)
+        engine.add_or_update_node('vector', VectorStrategy())
+        engine.update_parameters(InputParameters({'x': 1, 'y': 2, 'n': 4}))
+        engine.update_parameters(InputParameters({'x': 2, 'y': 2, 'n': 4}))
+        engine.update_parameters(InputParameters({'x': 1, 'y': 2, 'n': 4}))
+
+        stats = {row["node"]: row for row in engine.stats()}
+        self.assertEqual(set(stats), {'A', 'B', 'C', 'D', 'vector'})
+        self.assertEqual((stats['A']["calls"], stats['A']["executions"], stats['A']["cache_hits"]), (3, 2, 1))
+        self.assertEqual(stats['vector']["nbytes"], 4 * 8)
+        self.assertEqual(stats['vector']["calls"], 1)
+        self.assertEqual(engine.instrumentation.runs, 3)
+        self.assertGreaterEqual(stats['D']["total_time"], stats['D']["last_time"])
+        self.assertIn('vector', engine.instrumentation.format_table())
+
+        engine.reset_stats()
+        self.assertEqual(engine.stats(), [])
+
+    def test_skipped_nodes(self):
+        engine = CalculationEngine()
+        engine.add_or_update_nodes({'T': TruncatingStrategy(), 'U': CountingStrategy(['T'])})
+        engine.update_parameters(InputParameters({'x': 12}))
+        engine.update_parameters(InputParameters({'x': 15}))
+        stats = {row["node"]: row for row in engine.stats()}
+        self.assertEqual(stats['U']["skipped"], 1)
+        self.assertEqual(stats['U']["last_outcome"], "skipped")
+        self.assertEqual(stats['T']["executions"], 2)
+
+
+class TestTracing(unittest.TestCase):
+    def test_trace_events(self):
+        engine, _ = build_engine()
+        tracer.start()
+        try:
+            engine.update_parameters(InputParameters({'x': 1, 'y': 2}))
+        finally:
+            tracer.stop()
+        engine.update_parameters(InputParameters({'x': 2, 'y': 2}))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "trace.json")
+            tracer.save(path)
+            with open(path) as file:
+                events = {event["name"]: event for event in json.load(file)["traceEvents"]}
+
+        self.assertEqual(set(events), {'A', 'B', 'C', 'D', 'run_calculations', 'CalculationEngine.update_parameters'})
+        run = events['run_calculations']
+        for node_name in 'ABCD':
+            self.assertEqual(events[node_name]["ph"], "X")
+            self.assertGreaterEqual(events[node_name]["ts"], run["ts"])
+            self.assertLessEqual(events[node_name]["ts"] + events[node_name]["dur"], run["ts"] + run["dur"] + 1)
+
+    def test_disabled_by_default(self):
+        self.assertFalse(tracer.enabled)
+        self.assertIs(tracer.span("noop"), tracer.span("noop"))
+
+
+class TestDependencyIndex(unittest.TestCase):
+    def assertIndexMatchesRebuild(self, engine):
+        incremental = ({k: set(v) for k, v in engine.inverse_dependencies.items()},
+                       {k: set(v) for k, v in engine.upstream_dependencies.items()},
+                       {k: set(v) for k, v in engine.direct_dependents.items()})
+        engine.build_inverse_dependencies()
+        self.assertEqual(incremental, (engine.inverse_dependencies, engine.upstream_dependencies,
+                                       engine.direct_dependents))
+
+    def test_transitive_closure(self):
+        engine, _ = build_engine()
+        self.assertEqual(engine.inverse_dependencies['x'], {'A', 'B', 'C', 'D'})
+        self.assertEqual(engine.inverse_dependencies['y'], {'B', 'D'})
+        self.assertEqual(engine.upstream_dependencies['D'], {'A', 'B', 'C', 'x', 'y'})
+        self.assertEqual(engine.direct_dependents['A'], {'B', 'C'})
+        self.assertIndexMatchesRebuild(engine)
+
+    def test_incremental_edits_match_rebuild(self):
+        engine, _ = build_engine()
+        engine.add_or_update_node('C', CountingStrategy(['y']))
+        self.assertEqual(engine.inverse_dependencies['y'], {'B', 'C', 'D'})
+        self.assertIndexMatchesRebuild(engine)
+
+        engine.delete_node('B')
+        self.assertEqual(engine.inverse_dependencies['B'], {'D'})
+        self.assertNotIn('B', engine.inverse_dependencies.get('A', set()))
+        self.assertIndexMatchesRebuild(engine)
+
+    def test_cycle_leaves_graph_unchanged(self):
+        engine, strategies = build_engine()
+        self.assertRaises(Exception, engine.add_or_update_node, 'A', CountingStrategy(['D']))
+        self.assertIs(engine.nodes['A'].get_strategy(), strategies['A'])
+        self.assertIndexMatchesRebuild(engine)
+
+    def test_bulk_construction(self):
+        engine, _ = build_engine()
+        bulk_engine = CalculationEngine()
+        bulk_engine.add_or_update_nodes({
+            'D': CountingStrategy(['B', 'C']),
+            'C': CountingStrategy(['A']),
+            'B': CountingStrategy(['A', 'y']),
+            'A': CountingStrategy(['x']),
+        })
+        self.assertIsNotNone(bulk_engine.execution_plan)
+        self.assertEqual(bulk_engine.inverse_dependencies, engine.inverse_dependencies)
+        bulk_engine.update_parameters(InputParameters({'x': 1, 'y': 2}))
+        self.assertEqual(bulk_engine.current_output_data.get_result('D'), 4)
+
+    def test_bulk_cycle_restores_graph(self):
+        engine, strategies = build_engine()
+        self.assertRaises(Exception, engine.add_or_update_nodes,
+                          {'A': CountingStrategy(['E']), 'E': CountingStrategy(['D'])})
+        self.assertNotIn('E', engine.nodes)
+        self.assertIs(engine.nodes['A'].get_strategy(), strategies['A'])
+        self.assertIndexMatchesRebuild(engine)
+
+
+class TestResultSnapshots(unittest.TestCase):
+    def test_results_are_read_only(self):
+        results = CalculationResults()
+        results.set_result('vector', {"data": np.ones(3), "labels": ["Vector"], "units": [""]})
+        with self.assertRaises(ValueError):
+            results.get_result('vector')["data"][0] = 2
+
+    def test_snapshot_shares_unchanged_results(self):
+        engine, _ = build_engine()
+        engine.add_or_update_node('vector', VectorStrategy())
+        engine.update_parameters(InputParameters({'x': 1, 'y': 2, 'n': 4}))
+        engine.update_parameters(InputParameters({'x': 1, 'y': 3, 'n': 4}))
+
+        old_results = engine.old_output_data.results
+        current_results = engine.current_output_data.results
+        self.assertIs(old_results['vector'], current_results['vector'])
+        self.assertEqual(old_results['D'], 4)
+        self.assertEqual(current_results['D'], 5)
+
+        engine.save_calculation_results(0)
+        engine.update_parameters(InputParameters({'x': 1, 'y': 3, 'n': 6}))
+        self.assertEqual(len(engine.saved_data_results[0].get_result('vector')), 4)
+        self.assertEqual(len(engine.current_output_data.get_result('vector')), 6)
+
+
+class TestResultCache(unittest.TestCase):
+    def test_revisited_parameters_hit_the_cache(self):
+        engine, strategies = build_engine(cache_max_bytes=1024 ** 2)
+        for y in (2, 3, 2, 3):
+            engine.update_parameters(InputParameters({'x': 1, 'y': y}))
+            self.assertEqual(engine.current_output_data.get_result('D'), 2 + y)
+        self.assertEqual(strategies['B'].calls, 2)
+        self.assertEqual(strategies['D'].calls, 2)
+        self.assertEqual(engine.cache_hits, 4)
+
+    def test_lru_eviction(self):
+        engine, strategies = build_engine(cache_max_bytes=8 * ResultCache.ENTRY_OVERHEAD)
+        for y in range(4):
+            engine.update_parameters(InputParameters({'x': 1, 'y': y}))
+        self.assertLessEqual(engine.cache.current_bytes, engine.cache.max_bytes)
+        engine.update_parameters(InputParameters({'x': 1, 'y': 0}))
+        self.assertEqual(strategies['B'].calls, 5)
+
+        engine.clear_cache()
+        self.assertEqual((len(engine.cache), engine.cache_hits), (0, 0))
+
+
+class TestDiskResultCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_entries_persist_across_instances(self):
+        arrays = {'frequency': np.logspace(0, 6, 61), 'out': np.linspace(1, 2, 61) * (1 + 1j)}
+        DiskResultCache(self.directory.name, 1 << 20).put('abc', arrays)
+        found, cached = DiskResultCache(self.directory.name, 1 << 20).get('abc')
+        self.assertTrue(found)
+        for name in arrays:
+            np.testing.assert_array_equal(cached[name], arrays[name])
+        self.assertEqual(DiskResultCache(self.directory.name, 1 << 20).get('abd'), (False, None))
+
+    def test_lru_eviction(self):
+        cache = DiskResultCache(self.directory.name, 1 << 20)
+        rng = np.random.default_rng(0)
+        cache.put('a', {'x': rng.random(10000)})
+        entry_bytes = os.path.getsize(os.path.join(self.directory.name, 'a.npz'))
+        cache.max_bytes = int(2.5 * entry_bytes)
+        os.utime(os.path.join(self.directory.name, 'a.npz'), ns=(0, 0))
+        cache.put('b', {'x': rng.random(10000)})
+        os.utime(os.path.join(self.directory.name, 'b.npz'), ns=(1, 1))
+        self.assertTrue(cache.get('a')[0])  # 'a' becomes the most recently used
+        cache.put('c', {'x': rng.random(10000)})
+        self.assertEqual([cache.get(key)[0] for key in 'abc'], [True, False, True])
+
+        cache.clear()
+        self.assertEqual((cache.get('a'), cache.hits), ((False, None), 0))
+
+    def test_oversized_entry_keeps_the_others(self):
+        cache = DiskResultCache(self.directory.name, 20000)
+        rng = np.random.default_rng(0)
+        for key in 'abc':
+            cache.put(key, {'x': rng.random(100)})
+        cache.put('d', {'x': rng.random(100000)})
+        self.assertEqual([cache.get(key)[0] for key in 'abcd'], [True, True, True, False])
+        self.assertEqual(sorted(os.listdir(self.directory.name)), ['a.npz', 'b.npz', 'c.npz'])
+
+    def test_corrupted_entry_is_a_miss(self):
+        cache = DiskResultCache(self.directory.name, 1 << 20)
+        with open(os.path.join(self.directory.name, 'a.npz'), 'wb') as file:
+            file.write(b'not an archive')
+        self.assertEqual(cache.get('a'), (False, None))
+
+
+class TestParallelExecutor(unittest.TestCase):
+    def test_same_results_as_serial(self):
+        serial_engine, _ = build_engine()
+        parallel_engine, strategies = build_engine(ParallelExecutor(max_workers=4))
+        for parameters in ({'x': 1, 'y': 2}, {'x': 3, 'y': 2}, {'x': 3, 'y': -1}):
+            serial_engine.update_parameters(InputParameters(parameters))
+            parallel_engine.update_parameters(InputParameters(parameters))
+            self.assertEqual(serial_engine.current_output_data.results, parallel_engine.current_output_data.results)
+        self.assertEqual(strategies['C'].calls, 2)
+        parallel_engine.executor.shutdown()
+
+    def test_error_is_propagated(self):
+        engine, _ = build_engine(ParallelExecutor(max_workers=2))
+        engine.add_or_update_node('E', FailingStrategy())
+        self.assertRaises(Exception, engine.update_parameters, InputParameters({'x': 1, 'y': 2}))
+        engine.executor.shutdown()
+
+    def test_process_hint(self):
+        engine, _ = build_engine(ParallelExecutor(max_workers=2, max_processes=1))
+        engine.add_or_update_node('vector', VectorStrategy())
+        engine.add_or_update_node('P', ProcessStrategy())
+        engine.update_parameters(InputParameters({'x': 2, 'y': 2, 'n': 5}))
+        result = engine.current_output_data.get_result('P')
+        np.testing.assert_array_equal(result["data"], np.arange(5.0) * 2)
+        self.assertTrue(result["read_only"])
+        self.assertEqual(engine.current_output_data.get_result('D'), 6)
+        engine.executor.shutdown()
+
+    def test_bound_backend_is_shipped_to_the_process(self):
+        engine, _ = build_engine(ParallelExecutor(max_workers=2, max_processes=1))
+        strategy = BackendReportingStrategy()
+        engine.add_or_update_node('backend', strategy)
+        # Bound as by set_backend("numba"), which falls back to NumPy when numba is not installed
+        strategy.backend = NumbaBackend()
+        engine.update_parameters(InputParameters({'x': 2, 'y': 2}))
+        self.assertEqual(engine.current_output_data.get_result('backend'), "numba")
+        engine.executor.shutdown()
+
+
+class TestBatch(unittest.TestCase):
+    parameter_sets = [{'x': 1, 'y': 2}, {'x': 2, 'y': 2}, {'x': 3, 'y': 2}]
+
+    def test_batch_matches_single_runs(self):
+        engine, strategies = build_engine()
+        results = engine.run_batch(self.parameter_sets)
+        np.testing.assert_array_equal(results['A'], [1, 2, 3])
+        np.testing.assert_array_equal(results['D'], [4, 6, 8])
+        # Each batch-aware node is calculated once for the whole batch
+        self.assertEqual([strategy.calls for strategy in strategies.values()], [1, 1, 1, 1])
+        # The current results of the engine are left untouched
+        self.assertEqual(engine.current_output_data.results, {})
+
+    def test_constant_nodes_are_broadcast(self):
+        engine, _ = build_engine()
+        engine.add_or_update_node('Y', CountingStrategy(['y']))
+        results = engine.run_batch(self.parameter_sets, ['Y'])
+        np.testing.assert_array_equal(results['Y'], [2, 2, 2])
+
+    def test_batching_is_opt_in(self):
+        class ScalarStrategy(CalculationStrategy):
+            def calculate(self, dependencies: dict, parameters: InputParameters):
+                return 2 * float(dependencies['A'])
+
+            @staticmethod
+            def get_dependencies():
+                return ['A']
+
+        engine, _ = build_engine()
+        engine.add_or_update_node('S', ScalarStrategy())
+        results = engine.run_batch(self.parameter_sets, ['S'])
+        np.testing.assert_array_equal(results['S'], [2, 4, 6])
+
+    def test_row_by_row_fallback(self):
+        engine, strategies = build_engine()
+        row_strategy = RowStrategy()
+        engine.add_or_update_node('R', row_strategy)
+        results = engine.run_batch(self.parameter_sets, ['R'])
+        self.assertEqual(row_strategy.calls, 3)
+        self.assertEqual(results['R']["data"].shape, (3, 3, 2))
+        np.testing.assert_array_equal(results['R']["data"][..., 1], [[1] * 3, [2] * 3, [3] * 3])
+        self.assertEqual(results['R']["labels"], ["i", "A"])
+        # Only the requested node and its dependencies are calculated
+        self.assertEqual(strategies['B'].calls, 0)
+
+    def test_inconsistent_parameter_sets(self):
+        engine, _ = build_engine()
+        self.assertRaises(ValueError, engine.run_batch, [{'x': 1, 'y': 2}, {'x': 1}])
+        self.assertRaises(ValueError, engine.run_batch, [])
+        self.assertRaises(KeyError, engine.run_batch, self.parameter_sets, ['Z'])
+
+    def test_split_rows(self):
+        self.assertEqual(split_rows({'x': 1, 'y': 2}), ([{'x': 1, 'y': 2}], False))
+        rows, batched = split_rows({'x': np.array([[1], [2]]), 'y': 2})
+        self.assertEqual((rows, batched), ([{'x': 1, 'y': 2}, {'x': 2, 'y': 2}], True))
+        self.assertRaises(ValueError, split_rows, {'x': np.zeros((2, 1)), 'y': np.zeros((3, 1))})
+
+
+class TestBackends(unittest.TestCase):
+    def test_strategies_use_the_engine_backend(self):
+        engine = CalculationEngine()
+        engine.backend = RecordingBackend()
+        strategy = KernelStrategy()
+        engine.add_or_update_node('S', strategy)
+        self.assertIs(strategy.backend, engine.backend)
+
+        engine.update_parameters(InputParameters({'x': 3}))
+        self.assertEqual(engine.current_output_data.get_result('S'), 6)
+        self.assertEqual(engine.backend.selected, ['scale'])
+
+    def test_set_backend_rebinds_strategies(self):
+        engine = CalculationEngine()
+        strategy = KernelStrategy()
+        engine.add_or_update_node('S', strategy)
+        engine.set_backend("numpy")
+        self.assertIs(strategy.backend, NUMPY_BACKEND)
+        self.assertRaises(ValueError, engine.set_backend, "fortran")
+
+    @unittest.skipIf(numba is not None, "numba is installed")
+    def test_numba_falls_back_to_numpy(self):
+        engine = CalculationEngine(backend="numba")
+        self.assertIs(engine.backend, NUMPY_BACKEND)
+
+    @unittest.skipIf(numba is None, "numba is not installed")
+    def test_numba_matches_numpy(self):
+        results = []
+        for backend in ("numpy", "numba"):
+            engine = CalculationEngine(backend=backend)
+            engine.add_or_update_node('S', KernelStrategy())
+            engine.update_parameters(InputParameters({'x': 3}))
+            results.append(engine.current_output_data.get_result('S'))
+        self.assertEqual(results[0], results[1])
+
+
+class TestSymbolicStrategies(unittest.TestCase):
+    def test_expressions_are_hash_consed(self):
+        self.assertIs(Symbol('x') * Symbol('y'), SHARED_PRODUCT)
+        self.assertIsNot(Symbol('x') * 2, Symbol('x') * 2.0)
+        program = symbolic.compile_expressions(SumStrategy.expressions + DifferenceStrategy.expressions)
+        self.assertEqual(program.count(SHARED_PRODUCT), 1)
+
+    def test_dependencies_are_deduced(self):
+        self.assertEqual(SumStrategy.get_dependencies(), ['x', 'y'])
+
+    def test_common_subexpressions_are_shared_between_nodes(self):
+        engine = CalculationEngine()
+        engine.add_or_update_nodes({'S': SumStrategy(), 'D': DifferenceStrategy()})
+        calls = []
+
+        def multiply(first, second):
+            calls.append((first, second))
+            return first * second
+
+        with mock.patch.dict(symbolic.OPERATIONS, {"mul": multiply}):
+            engine.update_parameters(InputParameters({'x': 3, 'y': 4}))
+            self.assertEqual(engine.current_output_data.get_result('S')["data"], 15)
+            self.assertEqual(engine.current_output_data.get_result('D')["data"], 8)
+            self.assertEqual(calls, [(3, 4)])
+            self.assertEqual(engine.expression_memo, {})
+
+            # The memo is cleared after each run, new inputs are taken into account
+            engine.update_parameters(InputParameters({'x': 1, 'y': 4}))
+            self.assertEqual(engine.current_output_data.get_result('S')["data"], 5)
+            self.assertEqual(calls, [(3, 4), (1, 4)])
+
+    def test_batch(self):
+        engine = CalculationEngine()
+        engine.add_or_update_nodes({'S': SumStrategy(), 'D': DifferenceStrategy()})
+        results = engine.run_batch([{'x': 1, 'y': 2}, {'x': 2, 'y': 2}])
+        np.testing.assert_array_equal(results['S']["data"], [3, 6])
+        np.testing.assert_array_equal(results['D']["data"], [0, 2])
+
+
+class TestFusedFunction(unittest.TestCase):
+    def test_matches_engine_results(self):
+        engine, strategies = build_engine()
+        engine.update_parameters(InputParameters({'x': 1, 'y': 2}))
+        fused = engine.compile_function(['D'], ['y'])
+        calls_a = strategies['A'].calls
+
+        self.assertEqual(fused([5]), {'D': 7})
+        self.assertEqual(fused([7]), {'D': 9})
+        # A does not depend on y, it was calculated once and embedded in the function
+        self.assertEqual(strategies['A'].calls, calls_a)
+        self.assertEqual(strategies['B'].calls, 3)
+
+        engine.update_parameters(InputParameters({'x': 1, 'y': 7}))
+        self.assertEqual(engine.current_output_data.get_result('D'), 9)
+
+    def test_symbolic_strategies_are_inlined(self):
+        engine = CalculationEngine()
+        engine.add_or_update_nodes({'S': SumStrategy(), 'D': DifferenceStrategy(), 'E': ResultSumStrategy()})
+        engine.update_parameters(InputParameters({'x': 3, 'y': 4}))
+        fused = engine.compile_function(['E', 'S'], ['x'])
+
+        # S = x*y + x, D = x*y - y
+        self.assertEqual(fused([1]), {'E': 5 + 0, 'S': 5})
+        self.assertEqual(fused.source.count(".calculate("), 1)
+        self.assertEqual(fused.source.count(" * "), 1)
+
+    def test_cache(self):
+        engine, strategies = build_engine()
+        engine.update_parameters(InputParameters({'x': 1, 'y': 2}))
+        fused = engine.compile_function(['D'], ['y'])
+        self.assertIs(engine.compile_function(['D'], ['y']), fused)
+
+        # Varying parameter changed: the function is still valid
+        engine.update_parameters(InputParameters({'x': 1, 'y': 3}))
+        self.assertIs(engine.compile_function(['D'], ['y']), fused)
+
+        # Embedded parameter changed
+        engine.update_parameters(InputParameters({'x': 2, 'y': 3}))
+        fused = engine.compile_function(['D'], ['y'])
+        self.assertEqual(fused([2]), {'D': 6})
+
+        # Graph changed
+        engine.add_or_update_node('C', CountingStrategy(['A'], offset=10))
+        refreshed = engine.compile_function(['D'], ['y'])
+        self.assertIsNot(refreshed, fused)
+        self.assertEqual(refreshed([2]), {'D': 16})
+
+    def test_errors(self):
+        engine, _ = build_engine()
+        with self.assertRaises(ValueError):
+            engine.compile_function(['D'], ['y'])
+        engine.update_parameters(InputParameters({'x': 1, 'y': 2}))
+        with self.assertRaises(KeyError):
+            engine.compile_function(['Z'], ['y'])
+        with self.assertRaises(ValueError):
+            engine.compile_function(['D'], ['A'])
+
+
+if __name__ == '__main__':
+    unittest.main()
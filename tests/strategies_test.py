@@ -0,0 +1,494 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from src.controler.controller import CalculationController
+from src.model.input_parameters import InputParameters
+from src.model.strategies.strategy_lib.CLTF import CLTF_Strategy_Non_Filtered, CLTF_Strategy_Non_Filtered_legacy
+from src.model.strategies.strategy_lib.Noise import PSD_R_Coil, PSD_R_Coil_V2, PSD_Flicker, PSD_Flicker_V2, \
+    PSD_e_en, PSD_e_en_V2, PSD_e_in, PSD_e_in_V2
+from src.model.strategies.strategy_lib.OLTF import OLTF_Strategy_Non_Filtered
+from src.model.strategies.strategy_lib.TF_ASIC import TF_ASIC_Stage_1_Strategy_linear, \
+    TF_ASIC_Stage_2_Strategy_linear
+from src.model.strategies.strategy_lib.frequency import AdaptiveFrequencyVectorStrategy, FrequencyVectorStrategy
+from src.model.strategies.strategy_lib.impedance import AnalyticalImpedanceStrategy
+from src.model.strategies.strategy_lib.SPICE import SPICE_impedance, SPICE_op_Amp_noise, IMPEDANCE_TEMPLATE, \
+    OP_AMP_GAIN_TEMPLATE, build_impedance_circuit, build_op_amp_gain_circuit
+from src.model.cache import DiskResultCache
+from src.model.strategies.strategy_lib import spice_session
+from src.model.strategies import resample_loglog
+from src.model.strategies.strategy_lib.spice_session import SpiceCircuitTemplate, ac_command, aligned_sweep, \
+    analysis_fingerprint, file_digest, get_session, ngspice_available, noise_command, read_vectors
+from src.model.strategies.strategy_lib.RLC import OmegaStrategy, OmegaSquaredStrategy, RLC_Denominator_Open_Loop, \
+    RLC_Denominator_Closed_Loop
+from src.model.strategies.strategy_lib.OLTF import OLTF_Strategy_Filtered
+from src.model.strategies.strategy_lib.CLTF import CLTF_Strategy_Filtered
+from src.model.strategies.strategy_lib.Noise import PSD_R_cr_filtered, PSD_R_cr_filtered_V2, PSD_R_Coil_filtered, \
+    PSD_R_Coil_filtered_V2, PSD_e_en_filtered, PSD_e_en_filtered_V2, PSD_e_in_filtered, PSD_e_in_filtered_V2, \
+    PSD_Total_filtered, PSD_Total_filtered_V2, NEMI, NEMI_FIltered, NEMI_FIlteredv2, NEMI_FIlteredv3, PSD_Total, \
+    PSD_Total_V2
+
+PARAMETERS = {
+    'f_start': 1, 'f_stop': 1000000, 'nb_points_per_decade': 100,
+    'mu_insulator': 1, 'len_coil': 155e-3, 'kapthon_thick': 30e-6, 'insulator_thick': 10e-6,
+    'diam_out_mandrel': 3.2e-3, 'diam_wire': 90e-6, 'capa_tuning': 1e-12, 'capa_triwire': 150e-12,
+    'len_core': 20e-2, 'diam_core': 3.2e-3, 'mu_r': 100000, 'nb_spire': 10000, 'ray_spire': 5e-3,
+    'rho_whire': 1.6, 'coeff_expansion': 1, 'stage_1_cutting_freq': 20000, 'stage_2_cutting_freq': 20000,
+    'gain_1_linear': 1, 'gain_2_linear': 1, 'mutual_inductance': 0.1, 'feedback_resistance': 1000,
+    'temperature': 300, 'Para_A': 1, 'Para_B': 1, 'e_en': 1, 'e_in': 1, 'Alpha': 1,
+}
+
+# Strategy class, name of its array kernel
+KERNELS = [
+    (AnalyticalImpedanceStrategy, 'calculate_impedance'),
+    (TF_ASIC_Stage_1_Strategy_linear, 'calculate_tf_stage_1'),
+    (TF_ASIC_Stage_2_Strategy_linear, 'calculate_tf_stage_2'),
+    (OLTF_Strategy_Non_Filtered, 'calculate_oltf'),
+    (CLTF_Strategy_Non_Filtered_legacy, 'calculate_cltf'),
+    (PSD_R_Coil, 'calculate_psd'),
+    (PSD_R_Coil_V2, 'calculate_psd'),
+    (PSD_Flicker, 'calculate_psd_flicker'),
+    (PSD_Flicker_V2, 'calculate_psd_flicker'),
+    (PSD_e_en, 'calculate_psd_e_en'),
+    (PSD_e_en_V2, 'calculate_psd_e_en'),
+    (PSD_e_in, 'calculate_psd_e_in'),
+    (PSD_e_in_V2, 'calculate_psd_e_in'),
+]
+
+
+class TestVectorizedKernels(unittest.TestCase):
+    """
+    The strategies call their kernels once on the whole frequency vector. Check they give the same results
+    as the previous implementation, calling the kernels point by point through np.vectorize.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        controller = CalculationController()
+        cls.results = controller.update_parameters(dict(PARAMETERS))
+        cls.parameters = InputParameters(dict(PARAMETERS))
+
+    def get_dependencies(self, strategy, raw=False):
+        dependencies = {}
+        for name in strategy.get_dependencies():
+            if name in self.results:
+                dependencies[name] = self.results[name]["data"] if raw else self.results[name]
+            else:
+                dependencies[name] = PARAMETERS[name]
+        return dependencies
+
+    def assertMatchesReference(self, strategy, kernel_name, raw=False):
+        dependencies = self.get_dependencies(strategy, raw)
+        result = strategy.calculate(dependencies, self.parameters)
+
+        reference_strategy = type(strategy)()
+        setattr(reference_strategy, kernel_name, np.vectorize(getattr(reference_strategy, kernel_name)))
+        reference = reference_strategy.calculate(dependencies, self.parameters)
+
+        self.assertEqual(result["data"].shape, reference["data"].shape)
+        np.testing.assert_allclose(result["data"], reference["data"], rtol=1e-12, atol=0)
+
+    def test_kernels_match_point_by_point_reference(self):
+        for strategy_class, kernel_name in KERNELS:
+            with self.subTest(strategy=strategy_class.__name__):
+                self.assertMatchesReference(strategy_class(), kernel_name)
+
+    def test_cltf_kernel(self):
+        # This variant reads the raw data of its dependencies
+        self.assertMatchesReference(CLTF_Strategy_Non_Filtered(), 'calculate_cltf', raw=True)
+
+
+# Strategy class, signal and gain dependencies, previous dB-domain formula
+DB_ROUND_TRIPS = [
+    (OLTF_Strategy_Filtered, 'OLTF_Non_filtered', 'TF_ASIC_Stage_2', lambda a, b: 10 ** ((a + b) / 20)),
+    (CLTF_Strategy_Filtered, 'CLTF_Non_filtered', 'TF_ASIC_Stage_2', lambda a, b: 10 ** ((a + b) / 20)),
+    (PSD_R_cr_filtered, 'PSD_R_cr', 'TF_ASIC_Stage_2', lambda a, b: 10 ** ((a + b) / 20)),
+    (PSD_R_cr_filtered_V2, 'PSD_R_cr', 'TF_ASIC_Stage_2', lambda a, b: (10 ** ((a + b) / 20)) ** 2),
+    (PSD_R_Coil_filtered, 'PSD_R_Coil', 'TF_ASIC_Stage_2', lambda a, b: 10 ** ((a + b) / 20)),
+    (PSD_R_Coil_filtered_V2, 'PSD_R_Coil', 'TF_ASIC_Stage_2', lambda a, b: (10 ** ((a + b) / 20)) ** 2),
+    (PSD_e_en_filtered, 'PSD_e_en', 'TF_ASIC_Stage_2', lambda a, b: 10 ** ((a + b) / 20)),
+    (PSD_e_en_filtered_V2, 'PSD_e_en', 'TF_ASIC_Stage_2', lambda a, b: (10 ** ((a + b) / 20)) ** 2),
+    (PSD_e_in_filtered, 'PSD_e_in', 'TF_ASIC_Stage_2', lambda a, b: 10 ** ((a + b) / 20)),
+    (PSD_e_in_filtered_V2, 'PSD_e_in', 'TF_ASIC_Stage_2', lambda a, b: (10 ** ((a + b) / 20)) ** 2),
+    (PSD_Total_filtered, 'PSD_Total', 'TF_ASIC_Stage_2', lambda a, b: 10 ** ((a + b) / 20)),
+    (PSD_Total_filtered_V2, 'PSD_Total', 'TF_ASIC_Stage_2', lambda a, b: (10 ** ((a + b) / 20)) ** 2),
+    (NEMI, 'PSD_Total', 'CLTF_Non_filtered', lambda a, b: 10 ** ((a - b) / 20)),
+    (NEMI_FIltered, 'PSD_Total_filtered', 'CLTF_Filtered', lambda a, b: 10 ** ((a - b) / 20)),
+    (NEMI_FIlteredv2, 'PSD_Total_filtered', 'CLTF_Filtered', lambda a, b: 10 ** ((a - b) / 200)),
+    (NEMI_FIlteredv3, 'PSD_Total_filtered', 'CLTF_Filtered', lambda a, b: 100 ** ((a - b) / 20)),
+]
+
+
+class TestLinearDomainGains(unittest.TestCase):
+    """
+    The filtered and NEMI strategies multiply or divide the linear magnitudes. Check they give the same results
+    as the previous implementation, adding or subtracting the magnitudes in dB and converting the result back.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        controller = CalculationController()
+        cls.results = controller.update_parameters(dict(PARAMETERS))
+        cls.parameters = InputParameters(dict(PARAMETERS))
+
+    def test_strategies_match_db_reference(self):
+        for strategy_class, signal_name, gain_name, reference_formula in DB_ROUND_TRIPS:
+            with self.subTest(strategy=strategy_class.__name__):
+                dependencies = {name: self.results[name] for name in strategy_class.get_dependencies()}
+                result = strategy_class().calculate(dependencies, self.parameters)
+
+                signal = 20 * np.log10(self.results[signal_name]["data"][:, 1])
+                gain = 20 * np.log10(self.results[gain_name]["data"][:, 1])
+                np.testing.assert_allclose(result["data"][:, 1], reference_formula(signal, gain), rtol=1e-9)
+                np.testing.assert_array_equal(result["data"][:, 0], self.results[signal_name]["data"][:, 0])
+
+
+def open_loop_denominator(d):
+    R, L, C = d['resistance']["data"], d['inductance']["data"], d['capacitance']["data"]
+    omega, omega_squared = d['omega']["data"], d['omega_squared']["data"]
+    return (1 - L * C * omega_squared) ** 2 + (R * C * omega) ** 2
+
+
+def closed_loop_denominator(d):
+    R, L, C = d['resistance']["data"], d['inductance']["data"], d['capacitance']["data"]
+    omega, omega_squared = d['omega']["data"], d['omega_squared']["data"]
+    TF_ASIC_Stage_1 = d['TF_ASIC_Stage_1']["data"][:, 1]
+    return (1 - L * C * omega_squared) ** 2 \
+        + (R * C * omega + (TF_ASIC_Stage_1 * d['mutual_inductance'] * omega) / d['feedback_resistance']) ** 2
+
+
+def psd_total(d):
+    return (d['PSD_e_in']["data"][:, 1] ** 2 + d['PSD_e_en']["data"][:, 1] ** 2
+            + d['PSD_R_Coil']["data"][:, 1] ** 2 + d['PSD_R_cr']["data"][:, 1] ** 2) ** 0.5
+
+
+# Symbolic strategy class, previous NumPy implementation of its values
+SYMBOLIC_FORMULAS = [
+    (OmegaStrategy, lambda d: 2 * np.pi * d['frequency_vector']["data"]),
+    (OmegaSquaredStrategy, lambda d: d['omega']["data"] ** 2),
+    (RLC_Denominator_Open_Loop, open_loop_denominator),
+    (RLC_Denominator_Closed_Loop, closed_loop_denominator),
+    (PSD_Total, psd_total),
+    (PSD_Total_V2, lambda d: psd_total(d) ** 2),
+]
+
+
+class TestSymbolicStrategies(unittest.TestCase):
+    """
+    Check the strategies declared as symbolic expressions give the same results as their previous NumPy code.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        controller = CalculationController()
+        cls.results = controller.update_parameters(dict(PARAMETERS))
+        cls.parameters = InputParameters(dict(PARAMETERS))
+
+    def test_strategies_match_numpy_reference(self):
+        for strategy_class, reference_formula in SYMBOLIC_FORMULAS:
+            with self.subTest(strategy=strategy_class.__name__):
+                dependencies = {name: self.results[name] if name in self.results else PARAMETERS[name]
+                                for name in strategy_class.get_dependencies()}
+                result = strategy_class().calculate(dependencies, self.parameters)["data"]
+                values = result[:, 1] if strategy_class.frequency_column else result
+                np.testing.assert_array_equal(values, reference_formula(dependencies))
+
+
+class TestFusedFunction(unittest.TestCase):
+    """
+    Check the function generated over the default graph gives the same results as the engine.
+    """
+
+    def test_matches_engine_results(self):
+        controller = CalculationController()
+        controller.update_parameters(dict(PARAMETERS))
+        parameter_names = ['len_coil', 'diam_wire', 'nb_spire']
+        targets = ['impedance', 'NEMI_FIltered', 'PSD_Total']
+        fused = controller.compile_function(targets, parameter_names)
+
+        values = (0.1, 80e-6, 12000)
+        data = fused(values)
+        parameters = dict(PARAMETERS)
+        parameters.update(zip(parameter_names, values))
+        results = controller.update_parameters(parameters)
+        for name in targets:
+            with self.subTest(target=name):
+                np.testing.assert_array_equal(data[name], results[name]["data"])
+
+
+class TestAdaptiveFrequencyVector(unittest.TestCase):
+    """
+    Check the adaptive grid resolves the curves of the uniform grid with a fraction of its points.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        parameters = dict(PARAMETERS, nb_points_per_decade=5000)
+        controller = CalculationController()
+        cls.uniform = dict(controller.update_parameters(dict(parameters)))
+        controller.set_node_strategy('frequency_vector', AdaptiveFrequencyVectorStrategy, parameters)
+        cls.adaptive = controller.update_parameters(dict(parameters))
+
+    def test_grid(self):
+        frequency_vector = self.adaptive['frequency_vector']["data"]
+        self.assertAlmostEqual(frequency_vector[0], PARAMETERS['f_start'])
+        self.assertAlmostEqual(frequency_vector[-1], PARAMETERS['f_stop'])
+        self.assertTrue(np.all(np.diff(frequency_vector) > 0))
+        self.assertLess(len(frequency_vector), len(self.uniform['frequency_vector']["data"]) / 50)
+
+        # The resonance frequency is a point of the grid
+        L, C = self.adaptive['inductance']["data"], self.adaptive['capacitance']["data"]
+        impedance = self.adaptive['impedance']["data"]
+        self.assertAlmostEqual(impedance[impedance[:, 1].argmax(), 0], 1 / (2 * np.pi * np.sqrt(L * C)))
+
+    def test_cached_grid_depends_on_the_settings(self):
+        parameters = dict(PARAMETERS)
+        controller = CalculationController(cache_max_bytes=64 * 1024 ** 2)
+        controller.update_parameters(dict(parameters))
+        lengths = []
+        for tolerance in (1e-3, 1e-1, 1e-3):
+            controller.engine.swap_strategy_for_node('frequency_vector',
+                                                     AdaptiveFrequencyVectorStrategy(tolerance=tolerance), parameters)
+            lengths.append(len(controller.engine.current_output_data.get_result('frequency_vector')["data"]))
+        self.assertLess(lengths[1], lengths[0])
+        self.assertEqual(lengths[2], lengths[0])
+        self.assertGreater(controller.engine.cache_hits, 0)
+
+    def test_curves_match_uniform_grid(self):
+        for name in ['impedance', 'CLTF_Filtered', 'NEMI_FIltered']:
+            with self.subTest(result=name):
+                uniform = self.uniform[name]["data"]
+                adaptive = self.adaptive[name]["data"]
+                interpolated = np.interp(np.log10(uniform[:, 0]), np.log10(adaptive[:, 0]), np.log10(adaptive[:, 1]))
+                np.testing.assert_allclose(interpolated, np.log10(uniform[:, 1]), atol=0.01)
+
+
+class TestControllerParameters(unittest.TestCase):
+    def test_dict_modified_in_place_is_recalculated(self):
+        # The optimization loop of main_headless updates its parameters dict in place
+        parameters = dict(PARAMETERS)
+        controller = CalculationController()
+        controller.update_parameters(parameters)
+        parameters['nb_spire'] = 12000
+        results = controller.update_parameters(parameters)
+        expected = CalculationController().update_parameters(dict(PARAMETERS, nb_spire=12000))
+        self.assertEqual(results['resonance_frequency']["data"], expected['resonance_frequency']["data"])
+
+
+class TestFeatureNodes(unittest.TestCase):
+    """
+    Check the scalar features against the extrema of the curves over a dense frequency vector.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.points_per_decade = 20000
+        controller = CalculationController()
+        cls.controller = controller
+        cls.results = controller.update_parameters(dict(PARAMETERS, nb_points_per_decade=cls.points_per_decade))
+
+    def assertCloseOnGrid(self, frequency, reference):
+        # The dense grid locates the extrema within one grid step
+        self.assertLess(abs(np.log10(frequency) - np.log10(reference)), 1 / self.points_per_decade)
+
+    def test_resonance_and_quality_factor(self):
+        impedance = self.results['impedance']["data"]
+        resonance_frequency = self.results['resonance_frequency']["data"]
+        self.assertCloseOnGrid(resonance_frequency, impedance[impedance[:, 1].argmax(), 0])
+
+        peak = impedance[:, 1] >= impedance[:, 1].max() * np.sqrt(0.5)
+        bandwidth = impedance[peak, 0][-1] - impedance[peak, 0][0]
+        grid_step = resonance_frequency * (10 ** (1 / self.points_per_decade) - 1)
+        self.assertLess(abs(resonance_frequency / self.results['quality_factor']["data"] - bandwidth), 2 * grid_step)
+
+    def test_cltf_bandwidth(self):
+        cltf = self.results['CLTF_Filtered']["data"]
+        lower, upper, bandwidth = self.results['CLTF_bandwidth']["data"]
+        above = np.flatnonzero(cltf[:, 1] >= cltf[:, 1].max() * np.sqrt(0.5))
+        self.assertCloseOnGrid(lower, cltf[above[0], 0])
+        self.assertCloseOnGrid(upper, cltf[above[-1], 0])
+        self.assertEqual(bandwidth, upper - lower)
+
+    def test_nemi_minimum(self):
+        nemi = self.results['NEMI_FIltered']["data"]
+        frequency, value = self.results['NEMI_minimum']["data"]
+        self.assertCloseOnGrid(frequency, nemi[nemi[:, 1].argmin(), 0])
+        self.assertLessEqual(value, nemi[:, 1].min())
+        self.assertAlmostEqual(value / nemi[:, 1].min(), 1, places=6)
+
+    def test_batch(self):
+        parameters = [dict(PARAMETERS, nb_spire=nb_spire) for nb_spire in (8000, 10000, 12000)]
+        results = self.controller.update_parameters_batch(parameters, ['resonance_frequency', 'quality_factor',
+                                                                        'NEMI_minimum'])
+        for index, row in enumerate(parameters):
+            single = CalculationController().update_parameters(row)
+            for name in ['resonance_frequency', 'quality_factor', 'NEMI_minimum']:
+                np.testing.assert_allclose(results[name]["data"][index], single[name]["data"], rtol=1e-12)
+
+
+class TestSpiceResultCache(unittest.TestCase):
+    """
+    Check the SPICE results are read from the disk cache, without ngspice, when the same design was simulated.
+    """
+
+    values = {'resistance': 500.0, 'capacitance': 150e-12, 'inductance': 12.0}
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = DiskResultCache(directory.name, 1 << 20)
+        patcher = mock.patch.object(spice_session, 'SPICE_CACHE', self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def key(self, values, command, temperature=PARAMETERS['temperature'] - 273.15):
+        return analysis_fingerprint(IMPEDANCE_TEMPLATE, values, command, temperature, ['N001', 'vr2_plus'])
+
+    def test_key_changes_with_the_design(self):
+        command = ac_command('dec', 100, 1, 1000000)
+        key = self.key(self.values, command)
+        self.assertEqual(self.key(dict(self.values), command), key)
+        self.assertNotEqual(self.key(dict(self.values, resistance=501.0), command), key)
+        self.assertNotEqual(self.key(self.values, ac_command('dec', 50, 1, 1000000)), key)
+        self.assertNotEqual(self.key(self.values, command, temperature=0), key)
+
+    def test_key_builds_the_netlist_once(self):
+        calls = []
+
+        def build(values):
+            calls.append(values)
+            return build_op_amp_gain_circuit(values)
+
+        template = SpiceCircuitTemplate('op_amp_gain', build, OP_AMP_GAIN_TEMPLATE.devices)
+        values = {'R1': 1e3, 'R2': 1e3, 'R3': 1e3, 'R4': 1e3, 'R5': 1e4}
+        command = ac_command('dec', 100, 1, 1000000)
+        key = analysis_fingerprint(template, values, command, 25, ['out'])
+        self.assertNotEqual(analysis_fingerprint(template, dict(values, R1=2e3), command, 25, ['out']), key)
+        self.assertEqual(analysis_fingerprint(template, dict(values), command, 25, ['out']), key)
+        self.assertEqual(len(calls), 1)
+
+    def test_include_digest_follows_the_file(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'model.lib')
+        with open(path, 'w') as file:
+            file.write('.model D1 D(IS=1n)')
+        digest = file_digest(path)
+        with mock.patch('builtins.open', side_effect=AssertionError("the file was read again")):
+            self.assertEqual(file_digest(path), digest)
+        with open(path, 'w') as file:
+            file.write('.model D1 D(IS=2n)\n')
+        self.assertNotEqual(file_digest(path), digest)
+
+    def test_strategy_reads_the_cache(self):
+        frequency = np.logspace(0, 6, 601)
+        self.cache.put(self.key(self.values, ac_command('dec', *aligned_sweep(np.logspace(0, 6, 50)))), {
+            'frequency': frequency, 'N001': np.full(601, 2.0 + 0j), 'vr2_plus': np.full(601, 1e-3 + 0j),
+        })
+        dependencies = {'frequency_vector': {"data": np.logspace(0, 6, 50)},
+                        **{name: {"data": value} for name, value in self.values.items()}}
+        with mock.patch.object(spice_session, 'get_session', side_effect=AssertionError("ngspice was run")):
+            result = SPICE_impedance().calculate(dependencies, InputParameters(dict(PARAMETERS)))["data"]
+        np.testing.assert_allclose(result[:, 1], 2000.0)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_batch_is_stacked(self):
+        frequency = np.logspace(0, 6, 601)
+        resistances = [500.0, 550.0, 600.0]
+        for resistance in resistances:
+            values = dict(self.values, resistance=resistance)
+            self.cache.put(self.key(values, ac_command('dec', *aligned_sweep(np.logspace(0, 6, 50)))), {
+                'frequency': frequency, 'N001': np.full(601, resistance + 0j), 'vr2_plus': np.full(601, 1 + 0j),
+            })
+        dependencies = {'frequency_vector': {"data": np.logspace(0, 6, 50)},
+                        **{name: {"data": value} for name, value in self.values.items()}}
+        dependencies['resistance'] = {"data": np.array(resistances).reshape(3, 1)}
+        with mock.patch.object(spice_session, 'get_session', side_effect=AssertionError("ngspice was run")):
+            result = SPICE_impedance().calculate(dependencies, InputParameters(dict(PARAMETERS)))["data"]
+        self.assertEqual(result.shape, (3, 50, 2))
+        np.testing.assert_allclose(result[..., 1], np.repeat([[500.0], [550.0], [600.0]], 50, axis=1))
+
+    def test_noise_reads_the_cache(self):
+        values = {'R1': 1e3, 'R2': 1e3, 'R3': 1e3, 'R4': 1e3, 'R5': 1e4}
+        command = noise_command('out', None, 'V1', 'dec', *aligned_sweep(np.logspace(0, 6, 50)))
+        key = analysis_fingerprint(OP_AMP_GAIN_TEMPLATE, values, command, PARAMETERS['temperature'] - 273.15,
+                                   ['onoise_spectrum'])
+        self.cache.put(key, {'frequency': np.logspace(0, 6, 601), 'onoise_spectrum': np.full(601, 1e-8)})
+        dependencies = {'frequency_vector': {"data": np.logspace(0, 6, 50)}}
+        with mock.patch.object(spice_session, 'get_session', side_effect=AssertionError("ngspice was run")):
+            result = SPICE_op_Amp_noise().calculate(dependencies, InputParameters(dict(PARAMETERS, **values)))["data"]
+        np.testing.assert_allclose(result[:, 1], 1e-8)
+
+
+class TestLogLogResampling(unittest.TestCase):
+    def test_aligned_sweep(self):
+        frequency_vector = FrequencyVectorStrategy().calculate({}, InputParameters(dict(PARAMETERS)))["data"]
+        self.assertEqual(aligned_sweep(frequency_vector), (100, 1.0, 1000000.0))
+        self.assertEqual(aligned_sweep(np.logspace(1, 3, 21)), (10, 10.0, 1000.0))
+        # A non-uniform grid is swept at its average density
+        self.assertEqual(aligned_sweep(np.array([1.0, 10.0, 10 ** 1.05, 100.0]))[0], 2)
+
+    def test_aligned_sweep_of_the_adaptive_grid(self):
+        parameters = dict(PARAMETERS, nb_points_per_decade=5000)
+        frequency_vector = CalculationController().update_parameters(dict(parameters))['frequency_vector']["data"]
+        controller = CalculationController()
+        controller.set_node_strategy('frequency_vector', AdaptiveFrequencyVectorStrategy, parameters)
+        adaptive_vector = controller.update_parameters(dict(parameters))['frequency_vector']["data"]
+
+        points_per_decade, f_first, f_last = aligned_sweep(adaptive_vector)
+        self.assertEqual((f_first, f_last), (adaptive_vector[0], adaptive_vector[-1]))
+        # The sweep has about as many points as the adaptive grid, far fewer than the uniform grid
+        sweep_points = points_per_decade * np.log10(f_last / f_first) + 1
+        self.assertLessEqual(sweep_points, len(adaptive_vector) + np.log10(f_last / f_first))
+        self.assertLess(sweep_points, len(frequency_vector) / 50)
+
+    def test_power_laws_are_exact(self):
+        source = np.logspace(0, 6, 61)
+        target = np.logspace(0, 6, 600)
+        np.testing.assert_allclose(resample_loglog(source, 1e3 / source, target), 1e3 / target, rtol=1e-12)
+        # The linear interpolation of the same sparse points overshoots between them
+        self.assertGreater(np.max(np.interp(target, source, 1e3 / source) / (1e3 / target)), 1.01)
+
+    def test_non_positive_values_and_bounds(self):
+        source = np.array([1.0, 10.0, 100.0])
+        np.testing.assert_allclose(resample_loglog(source, [0.0, 1.0, 2.0], [np.sqrt(10.0), 0.5, 1000.0]),
+                                   [0.5, 0.0, 2.0])
+
+
+@unittest.skipUnless(ngspice_available(), "the ngspice shared library is not installed")
+class TestSpiceSession(unittest.TestCase):
+    """
+    Check the persistent ngspice session gives the same results as a simulation of a freshly built circuit.
+    """
+
+    def simulate(self, values):
+        circuit = build_impedance_circuit(values)
+        simulator = circuit.simulator(temperature=26.85, nominal_temperature=25)
+        analysis = simulator.ac(start_frequency=1, stop_frequency=1e6, number_of_points=20, variation='dec')
+        return np.absolute(analysis['N001']) / np.absolute(analysis['vr2_plus'])
+
+    def test_altered_values_match_new_circuit(self):
+        values = {'resistance': 500.0, 'capacitance': 150e-12, 'inductance': 12.0}
+        session = get_session(IMPEDANCE_TEMPLATE, values, 26.85)
+        for resistance in (500.0, 550.0):
+            values = dict(values, resistance=resistance)
+            analysis = read_vectors(session.run(values, ac_command('dec', 20, 1, 1e6)), ['N001', 'vr2_plus'])
+            impedance = np.absolute(analysis['N001']) / np.absolute(analysis['vr2_plus'])
+            np.testing.assert_allclose(impedance, self.simulate(values), rtol=1e-9)
+        self.assertIs(get_session(IMPEDANCE_TEMPLATE, values, 26.85), session)
+
+    def test_strategy(self):
+        parameters = InputParameters(dict(PARAMETERS))
+        dependencies = {
+            'frequency_vector': {"data": np.logspace(0, 6, 50)},
+            'resistance': {"data": 500.0}, 'capacitance': {"data": 150e-12}, 'inductance': {"data": 12.0},
+        }
+        result = SPICE_impedance().calculate(dependencies, parameters)["data"]
+        self.assertEqual(result.shape, (50, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()